@@ -1,6 +1,6 @@
 """Content crew agents."""
-from crewai import Agent
 
+from crewai import Agent
 from prompts import EDITOR_BACKSTORY, EDITOR_GOAL, WRITER_BACKSTORY, WRITER_GOAL
 
 
@@ -1,37 +1,20 @@
 """Content Crew - Writer and Editor agents for blog post creation."""
-import os
-import sys
 
-from crewai import Crew, LLM, Task
-from dotenv import load_dotenv
-from opentelemetry import trace
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from traceloop.sdk import Traceloop
+import sys
 
 from agents import create_editor_agent, create_writer_agent
-from shared import logger
+from crewai import Crew, Task
 
-load_dotenv()
-
-Traceloop.init(
-    app_name="content-crew",
-    resource_attributes={
-        "galileo.project.name": "galileo-agents",
-        "galileo.logstream.name": "content-crew",
-    },
-    disable_batch=True,
-)
-
-# Add console exporter for debugging if enabled
-if os.getenv("TRACELOOP_CONSOLE_EXPORTER_ENABLED", "false").lower() == "true":
-    tracer_provider = trace.get_tracer_provider()
-    if hasattr(tracer_provider, "add_span_processor"):
-        console_processor = BatchSpanProcessor(ConsoleSpanExporter())
-        tracer_provider.add_span_processor(console_processor)
+from shared import logger
+from shared.lazy import load_env
+from shared.models import crew_llm
+from shared.telemetry import init_telemetry
 
 
 def create_crew(topic: str):
-    llm = LLM(model="gpt-4o-mini", temperature=0.7)
+    load_env()
+    init_telemetry("content-crew")
+    llm = crew_llm("gpt-4o-mini", temperature=0.7)
     writer = create_writer_agent(llm)
     editor = create_editor_agent(llm)
 
@@ -47,7 +30,7 @@ def create_crew(topic: str):
         context=[write_task],
     )
 
-    return Crew(agents=[writer, editor], tasks=[write_task, edit_task], verbose=True)
+    return Crew(name="content-crew", agents=[writer, editor], tasks=[write_task, edit_task], verbose=True)
 
 
 def main(topic: str = "The Future of AI Agents"):
@@ -1,6 +1,6 @@
 """Research crew agents."""
-from crewai import Agent
 
+from crewai import Agent
 from prompts import ANALYST_BACKSTORY, ANALYST_GOAL, RESEARCHER_BACKSTORY, RESEARCHER_GOAL
 
 
@@ -1,50 +1,87 @@
-"""Research Crew - Researcher and Analyst agents with knowledge base search."""
-import os
-import sys
+"""Research Crew - Researcher and Analyst agents with knowledge base search.
 
-from crewai import Crew, LLM, Task
-from crewai.tools import tool
-from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-from opentelemetry import trace
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from traceloop.sdk import Traceloop
+By default one researcher task feeds one analyst task. With ``fan_out=N`` the topic is
+split into N sub-questions (one per research angle), their researcher tasks run
+concurrently as CrewAI async tasks, at most ``concurrency`` at a time on a pool shared by
+every crew in the process, and the analyst task takes all of their findings as context.
+"""
+
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from agents import create_analyst_agent, create_researcher_agent
-from shared import logger
-from tools import create_knowledge_retriever, search_knowledge_base
+from crewai import Crew, Task
+from crewai.tools import tool
+from prompts import RESEARCH_ANGLES
+from pydantic import PrivateAttr
+from tools import create_knowledge_retriever, retrieval_cache, search_knowledge_base
 
-load_dotenv()
+from shared import logger
+from shared.lazy import load_env, once
+from shared.models import crew_llm, embeddings_model
+from shared.telemetry import init_telemetry
 
-Traceloop.init(
-    app_name="research-crew",
-    resource_attributes={
-        "galileo.project.name": "galileo-agents",
-        "galileo.logstream.name": "research-crew",
-    },
-    disable_batch=True,
-)
+# Researcher pools by size, shared by every crew: the server builds a crew per request
+_pools = {}
+_pools_lock = threading.Lock()
 
-# Add console exporter for debugging if enabled
-if os.getenv("TRACELOOP_CONSOLE_EXPORTER_ENABLED", "false").lower() == "true":
-    tracer_provider = trace.get_tracer_provider()
-    if hasattr(tracer_provider, "add_span_processor"):
-        console_processor = BatchSpanProcessor(ConsoleSpanExporter())
-        tracer_provider.add_span_processor(console_processor)
 
-# Knowledge base setup
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-retriever = create_knowledge_retriever(embeddings)
+@once
+def get_retriever():
+    """Knowledge base retriever, built (or loaded from the on-disk cache) on first use."""
+    load_env()
+    return create_knowledge_retriever(embeddings_model("text-embedding-3-small"))
 
 
 @tool
 def knowledge_search(query: str) -> str:
     """Search the knowledge base for relevant information."""
-    return search_knowledge_base(query, retriever)
+    return search_knowledge_base(query, get_retriever())
+
+
+class PooledTask(Task):
+    """Task whose async execution runs on a shared bounded pool instead of its own thread.
+
+    CrewAI starts a thread per async task, so this is what caps fan-out concurrency. Errors
+    also reach the crew through the future instead of leaving it waiting forever.
+    """
+
+    _pool: ThreadPoolExecutor | None = PrivateAttr(default=None)
+
+    def execute_async(self, agent=None, context=None, tools=None) -> Future:
+        if self._pool is None:
+            return super().execute_async(agent, context, tools)
+        return self._pool.submit(self.execute_sync, agent, context, tools)
+
+
+def research_pool(concurrency: int) -> ThreadPoolExecutor:
+    """The process-wide pool running at most ``concurrency`` researcher tasks at once."""
+    with _pools_lock:
+        pool = _pools.get(concurrency)
+        if pool is None:
+            pool = _pools[concurrency] = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="research")
+        return pool
+
+
+def sub_questions(topic: str, n: int) -> list[str]:
+    """Split a topic into up to len(RESEARCH_ANGLES) sub-questions."""
+    if n < 0:
+        raise ValueError(f"Number of sub-questions must not be negative, got {n}")
+    return [f"{topic}: {angle}" for angle in RESEARCH_ANGLES[:n]]
 
 
-def create_crew(topic: str):
-    llm = LLM(model="gpt-4o-mini", temperature=0.3)
+def create_crew(topic: str, fan_out: int = 0, concurrency: int = 4):
+    if fan_out < 0:
+        raise ValueError(f"fan_out must not be negative, got {fan_out}")
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    load_env()
+    init_telemetry("research-crew")
+    get_retriever()
+    llm = crew_llm("gpt-4o-mini", temperature=0.3)
+    if fan_out:
+        return create_fan_out_crew(topic, llm, fan_out, concurrency)
     researcher = create_researcher_agent(llm, tools=[knowledge_search])
     analyst = create_analyst_agent(llm)
 
@@ -60,17 +97,75 @@ def create_crew(topic: str):
         context=[research_task],
     )
 
-    return Crew(agents=[researcher, analyst], tasks=[research_task, analysis_task], verbose=True)
+    return Crew(name="research-crew", agents=[researcher, analyst], tasks=[research_task, analysis_task], verbose=True)
+
+
+def create_fan_out_crew(topic: str, llm, fan_out: int, concurrency: int):
+    pool = research_pool(concurrency)
+    researchers, research_tasks = [], []
+    for question in sub_questions(topic, fan_out):
+        # One agent per task: an agent keeps its executor on itself, so concurrent tasks can't share one
+        researcher = create_researcher_agent(llm, tools=[knowledge_search])
+        task = PooledTask(
+            description=f"Research the question: {question}. Use knowledge_search to find relevant information.",
+            expected_output="Research findings with key facts for this question.",
+            agent=researcher,
+            async_execution=True,
+        )
+        task._pool = pool
+        researchers.append(researcher)
+        research_tasks.append(task)
 
+    analyst = create_analyst_agent(llm)
+    analysis_task = Task(
+        description=(
+            f"Analyze the research findings on each aspect of {topic} "
+            "and combine them into one summary with key insights."
+        ),
+        expected_output="A well-structured analysis report with findings and recommendations.",
+        agent=analyst,
+        context=research_tasks,
+    )
+
+    return Crew(
+        name="research-crew", agents=[*researchers, analyst], tasks=[*research_tasks, analysis_task], verbose=True
+    )
 
-def main(topic: str = "Benefits of microservices architecture"):
+
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {value}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def main(topic: str = "Benefits of microservices architecture", fan_out: int = 0, concurrency: int = 4):
     logger.info(f"Research Crew - Topic: {topic}")
-    crew = create_crew(topic)
+    crew = create_crew(topic, fan_out=fan_out, concurrency=concurrency)
     result = crew.kickoff()
     logger.info(f"Result: {result}")
+    logger.info(f"Retrieval cache: {retrieval_cache.stats()}")
     return result
 
 
 if __name__ == "__main__":
-    topic = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else "Benefits of microservices architecture"
-    main(topic)
+    parser = argparse.ArgumentParser(description="Research a topic with the research crew")
+    parser.add_argument("topic", nargs="*", help="Topic to research")
+    parser.add_argument(
+        "--fan-out",
+        type=non_negative_int,
+        default=0,
+        help=f"Split the topic into N sub-questions researched in parallel (max {len(RESEARCH_ANGLES)})",
+    )
+    parser.add_argument(
+        "--concurrency", type=positive_int, default=4, help="Researcher tasks running at once (default: 4)"
+    )
+    args = parser.parse_args()
+    main(" ".join(args.topic) or "Benefits of microservices architecture", args.fan_out, args.concurrency)
@@ -5,3 +5,13 @@ RESEARCHER_GOAL = "Find comprehensive information using the knowledge_search too
 
 ANALYST_BACKSTORY = "You are an analytical thinker who synthesizes information into coherent insights."
 ANALYST_GOAL = "Analyze findings and create a clear summary with key insights and recommendations."
+
+# Angles a topic is split into for fan-out research, one researcher task each
+RESEARCH_ANGLES = [
+    "core concepts and how it works",
+    "benefits and main use cases",
+    "challenges, risks and trade-offs",
+    "best practices and tooling",
+    "real-world examples",
+    "recent trends and future outlook",
+]
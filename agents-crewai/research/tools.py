@@ -1,6 +1,12 @@
 """Research crew tools."""
+
 from langchain_core.documents import Document
 
+from shared.retrieval_cache import RetrievalCache
+from shared.vectorstore import IndexSpec, load_or_build_faiss
+
+retrieval_cache = RetrievalCache()
+
 KNOWLEDGE_BASE_DOCS = [
     {
         "id": "arch1",
@@ -40,23 +46,27 @@ KNOWLEDGE_BASE_DOCS = [
 ]
 
 
-def create_knowledge_retriever(embeddings):
-    """Create a retriever from the knowledge base."""
-    from langchain_community.vectorstores import FAISS
+def create_knowledge_retriever(embeddings, index: IndexSpec | None = None):
+    """Create a retriever from the knowledge base, reusing the on-disk index when unchanged.
 
+    ``index`` selects the FAISS index type (default: from VECTOR_INDEX, flat).
+    """
     docs = [
-        Document(page_content=d["content"], metadata={"id": d["id"], "title": d["title"]})
-        for d in KNOWLEDGE_BASE_DOCS
+        Document(page_content=d["content"], metadata={"id": d["id"], "title": d["title"]}) for d in KNOWLEDGE_BASE_DOCS
     ]
-    vector_store = FAISS.from_documents(docs, embeddings)
-    return vector_store.as_retriever(search_kwargs={"k": 3})
+    vector_store, index_version = load_or_build_faiss(docs, embeddings, "research", index=index)
+    retrieval_cache.set_version(index_version)
+    # Labels the retriever metrics, which crews record outside any LangChain run
+    return vector_store.as_retriever(search_kwargs={"k": 3}, metadata={"agent": "research-crew"})
 
 
 def search_knowledge_base(query: str, retriever) -> str:
-    """Search the knowledge base."""
-    docs = retriever.invoke(query)
-    if not docs:
-        return "No relevant documents found."
-    return "\n\n".join(
-        f"[{i}] {d.metadata.get('title')}:\n{d.page_content}" for i, d in enumerate(docs, 1)
-    )
+    """Search the knowledge base, serving repeated queries from the retrieval cache."""
+
+    def search():
+        docs = retriever.invoke(query)
+        if not docs:
+            return "No relevant documents found."
+        return "\n\n".join(f"[{i}] {d.metadata.get('title')}:\n{d.page_content}" for i, d in enumerate(docs, 1))
+
+    return retrieval_cache.get_or_compute(query, retriever.search_kwargs.get("k"), search)
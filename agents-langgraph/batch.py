@@ -0,0 +1,120 @@
+"""Batch Runner - Runs a JSONL file of queries through one compiled LangGraph agent.
+
+The agent is created and compiled once, then queries are fanned out with ``ainvoke``
+under a concurrency limit. Results are streamed out as JSONL in completion order, and a
+throughput and latency-percentile summary is printed to stderr at the end.
+
+    uv run agents-langgraph/batch.py weather queries.jsonl --concurrency 8 --output results.jsonl
+
+Each input line is either a JSON object with a ``query`` field (other fields are passed
+through to the output) or a bare JSON string. A line that isn't is written out with an
+``error`` like a failed query and counted as invalid, and the rest of the batch still runs.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+import time
+
+from shared import logger
+from shared.registry import LANGGRAPH_AGENTS, get_factory
+from shared.stats import format_latency_summary, latency_summary
+
+
+def read_queries(path: str):
+    """Yield (line number, line) for each non-blank input line; workers parse them."""
+    with sys.stdin if path == "-" else open(path, encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            if line.strip():
+                yield index, line
+
+
+def parse_record(index: int, line: str) -> dict:
+    record = json.loads(line)
+    if isinstance(record, str):
+        record = {"query": record}
+    if not isinstance(record, dict) or not isinstance(record.get("query"), str):
+        raise ValueError('expected a JSON string or an object with a "query" string')
+    record.setdefault("id", index)
+    return record
+
+
+async def run_batch(agent, lines, out, concurrency: int) -> dict:
+    """Run read_queries lines through the agent with at most `concurrency` queries in flight."""
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    latencies, errors, invalid = [], 0, 0
+
+    def write(record: dict):
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    async def worker():
+        nonlocal errors, invalid
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, line = item
+            try:
+                record = parse_record(index, line)
+            except ValueError as e:
+                invalid += 1
+                write({"id": index, "input": line.rstrip("\n"), "error": f"Invalid input line: {e}"})
+                continue
+            start = time.perf_counter()
+            try:
+                result = await agent.ainvoke({"messages": [("user", record["query"])]})
+                record["response"] = result["messages"][-1].content
+            except Exception as e:
+                # Results go to stdout, like the log, so the traceback only shows at debug level
+                logger.debug(f"Query {record['id']} failed", exc_info=True)
+                record["error"] = f"{type(e).__name__}: {e}"
+                errors += 1
+            latency = time.perf_counter() - start
+            record["latency_ms"] = round(latency * 1000, 1)
+            latencies.append(latency)
+            write(record)
+
+    start = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    for item in lines:
+        await queue.put(item)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries": len(latencies),
+        "errors": errors,
+        "invalid": invalid,
+        "elapsed_s": elapsed,
+        "throughput_qps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of queries through a LangGraph agent")
+    parser.add_argument("agent", choices=LANGGRAPH_AGENTS, help="Agent to run")
+    parser.add_argument("queries", help="JSONL file of queries ('-' for stdin)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum queries in flight (default: 8)")
+    parser.add_argument("--output", default="-", help="JSONL results file (default: stdout)")
+    args = parser.parse_args()
+
+    agent = get_factory(args.agent)()
+    with contextlib.nullcontext(sys.stdout) if args.output == "-" else open(args.output, "w", encoding="utf-8") as out:
+        summary = asyncio.run(run_batch(agent, read_queries(args.queries), out, max(args.concurrency, 1)))
+
+    print(
+        f"{summary['queries']} queries ({summary['errors']} errors, {summary['invalid']} invalid lines) "
+        f"in {summary['elapsed_s']:.2f}s, {summary['throughput_qps']:.2f} queries/sec",
+        file=sys.stderr,
+    )
+    print(f"Latency: {format_latency_summary(summary['latency'])}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,19 @@
 """Calculator Agent - Performs calculations and unit conversions."""
-import os
-import sys
 
-from dotenv import load_dotenv
+import argparse
+
 from langchain.agents import create_agent
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
-from opentelemetry import trace
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from traceloop.sdk import Traceloop
-
 from prompt import CALCULATOR_AGENT_SYSTEM_PROMPT
-from shared import logger
 from tools import calculate, convert_units
 
-load_dotenv()
-
-Traceloop.init(
-    app_name="calculator-agent",
-    resource_attributes={
-        "galileo.project.name": "galileo-agents",
-        "galileo.logstream.name": "calculator-agent",
-    },
-    disable_batch=True,
-)
-
-# Add console exporter for debugging if enabled
-if os.getenv("TRACELOOP_CONSOLE_EXPORTER_ENABLED", "false").lower() == "true":
-    tracer_provider = trace.get_tracer_provider()
-    if hasattr(tracer_provider, "add_span_processor"):
-        console_processor = BatchSpanProcessor(ConsoleSpanExporter())
-        tracer_provider.add_span_processor(console_processor)
+from shared import logger
+from shared.checkpoint import conversation_options, get_checkpointer, thread_config
+from shared.lazy import load_env
+from shared.models import chat_model
+from shared.streaming import print_stream
+from shared.telemetry import init_telemetry
+from shared.tool_execution import ToolConcurrencyMiddleware
 
 
 @tool
@@ -44,27 +27,51 @@ def calc_tool(expression: str) -> str:
 
 @tool
 def convert_tool(value: float, from_unit: str, to_unit: str) -> str:
-    """Convert a value between units."""
+    """Convert a value between units of the same dimension, including compound units like km/h or kg/m^3."""
     result = convert_units(value, from_unit, to_unit)
     if result["success"]:
         return f"{result['original']} = {result['converted']}"
     return f"Error: {result['error']}"
 
 
-def create_calculator_agent():
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    return create_agent(llm, [calc_tool, convert_tool], system_prompt=CALCULATOR_AGENT_SYSTEM_PROMPT)
+def create_calculator_agent(checkpointer=None, tool_concurrency: int | None = None):
+    """With a checkpointer, conversations continue across calls on the same thread id.
+
+    tool_concurrency caps the tool calls run at once (default TOOL_MAX_CONCURRENCY).
+    """
+    load_env()
+    init_telemetry("calculator-agent")
+    llm = chat_model("gpt-4o-mini", temperature=0)
+    middleware = [ToolConcurrencyMiddleware(tool_concurrency)]
+    agent = create_agent(
+        llm,
+        [calc_tool, convert_tool],
+        system_prompt=CALCULATOR_AGENT_SYSTEM_PROMPT,
+        **conversation_options(llm, checkpointer, middleware),
+    )
+    return agent.with_config(metadata={"agent": "calculator-agent"})
 
 
-def main(query: str = "Convert 100 km to mi"):
+def main(query: str = "Convert 100 km to mi", stream: bool = False, thread: str | None = None):
+    # Before anything reads its settings, e.g. CHECKPOINT_KEEP_LAST in get_checkpointer()
+    load_env()
     logger.info(f"Calculator Agent - Query: {query}")
-    agent = create_calculator_agent()
-    result = agent.invoke({"messages": [("user", query)]})
-    response = result["messages"][-1].content
-    logger.info(f"Response: {response}")
+    agent = create_calculator_agent(get_checkpointer() if thread else None)
+    config = thread_config(thread)
+    if stream:
+        response, timings = print_stream(agent, query, config=config)
+        logger.info(f"Stream timings: {timings}")
+    else:
+        result = agent.invoke({"messages": [("user", query)]}, config)
+        response = result["messages"][-1].content
+        logger.info(f"Response: {response}")
     return response
 
 
 if __name__ == "__main__":
-    query = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else "Convert 100 km to mi"
-    main(query)
+    parser = argparse.ArgumentParser(description="Calculator agent")
+    parser.add_argument("query", nargs="*", help="Question to ask")
+    parser.add_argument("--stream", action="store_true", help="Print tokens and tool calls as they arrive")
+    parser.add_argument("--thread", help="Conversation id; runs with the same id continue the conversation")
+    args = parser.parse_args()
+    main(" ".join(args.query) or "Convert 100 km to mi", stream=args.stream, thread=args.thread)
@@ -0,0 +1,231 @@
+"""AST-validated expression compiler for the calculator.
+
+Expressions are parsed once, checked against a whitelist of node types, operators and
+ALLOWED_NAMES functions, and compiled to code objects kept in an LRU cache keyed by the
+expression text. Names that aren't functions or constants are free variables, which
+evaluate_batch binds to NumPy arrays so a whole what-if table is evaluated in one
+vectorized pass instead of one eval per row.
+"""
+
+import ast
+import math
+from functools import lru_cache, reduce
+
+import numpy as np
+
+# Largest integer power accepted, in bits, so "9 ** 9 ** 9" or "(9 ** 9999) ** 9999" can't
+# hang the process
+MAX_RESULT_BITS = 100_000
+
+
+class ExpressionError(ValueError):
+    """The expression is malformed or uses something outside the whitelist."""
+
+
+def _safe_pow(base, exponent, mod=None):
+    if mod is not None:
+        # Modular powers stay below mod at every step
+        return pow(base, exponent, mod)
+    # Only int ** positive int is exact and unbounded; float powers overflow quickly instead
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        bits = exponent * math.log2(abs(base))
+        if bits > MAX_RESULT_BITS:
+            raise ExpressionError(f"Result too large: about {bits:.3g} bits, limit {MAX_RESULT_BITS}")
+    return base**exponent
+
+
+ALLOWED_NAMES = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "pow": _safe_pow,
+    "sqrt": math.sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "log": math.log,
+    "log10": math.log10,
+    "exp": math.exp,
+    "pi": math.pi,
+    "e": math.e,
+}
+
+
+def _log(x, base=None):
+    return np.log(x) if base is None else np.log(x) / np.log(base)
+
+
+def _pow(base, exponent, mod=None):
+    return np.power(base, exponent) if mod is None else np.mod(np.power(base, exponent), mod)
+
+
+def _items(values, name: str) -> list:
+    # A variable holds one value per row, so only a list or tuple literal is a sequence
+    if not isinstance(values, list | tuple):
+        raise TypeError(f"{name}() needs several values or a list of them")
+    return values
+
+
+def _elementwise(ufunc, name: str):
+    # min(a, b, ...) and min([a, b, ...]) are both elementwise across the values, row by row
+    def apply(*args):
+        return reduce(ufunc, args if len(args) > 1 else _items(args[0], name))
+
+    return apply
+
+
+def _sum(values, start=0):
+    return reduce(np.add, _items(values, "sum"), start)
+
+
+# Same names as ALLOWED_NAMES, but elementwise over arrays
+ARRAY_NAMES = {
+    "abs": np.abs,
+    "round": np.round,
+    "min": _elementwise(np.minimum, "min"),
+    "max": _elementwise(np.maximum, "max"),
+    "sum": _sum,
+    "pow": _pow,
+    "sqrt": np.sqrt,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "log": _log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "pi": math.pi,
+    "e": math.e,
+}
+
+_POW = "pow"
+
+_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.List,
+    ast.Tuple,
+)
+_OPERATORS = (
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+
+
+class CompiledExpression:
+    """A validated, compiled expression and the free variables it needs."""
+
+    def __init__(self, expression: str, code, variables: frozenset[str]):
+        self.expression = expression
+        self.code = code
+        self.variables = variables
+
+    def _namespace(self, names: dict, bindings: dict) -> dict:
+        missing = self.variables - bindings.keys()
+        if missing:
+            raise ExpressionError(f"Unbound variable(s): {', '.join(sorted(missing))}")
+        return {**names, **{name: bindings[name] for name in self.variables}}
+
+    def evaluate(self, variables: dict | None = None):
+        return eval(self.code, {"__builtins__": {}}, self._namespace(ALLOWED_NAMES, variables or {}))
+
+    def evaluate_batch(self, bindings: dict) -> np.ndarray:
+        arrays = {name: np.asarray(value, dtype=np.float64) for name, value in bindings.items()}
+        namespace = self._namespace(ARRAY_NAMES, arrays)
+        shape = np.broadcast_shapes(*(arrays[name].shape for name in self.variables)) if self.variables else ()
+        with np.errstate(all="ignore"):
+            result = eval(self.code, {"__builtins__": {}}, namespace)
+        return np.broadcast_to(np.asarray(result, dtype=np.float64), shape)
+
+
+class _PowRewriter(ast.NodeTransformer):
+    """Route ``a ** b`` through pow(), which is the guarded _safe_pow for scalars."""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            call = ast.Call(func=ast.Name(id=_POW, ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+            return ast.copy_location(call, node)
+        return node
+
+
+def _is_sequence(node) -> bool:
+    if isinstance(node, ast.List | ast.Tuple):
+        return True
+    return isinstance(node, ast.BinOp) and (_is_sequence(node.left) or _is_sequence(node.right))
+
+
+def _validate(tree: ast.Expression) -> frozenset[str]:
+    variables = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.operator, ast.unaryop, ast.cmpop)):
+            if not isinstance(node, _OPERATORS):
+                raise ExpressionError(f"Operator not allowed: {type(node).__name__}")
+            continue
+        if not isinstance(node, _NODES):
+            raise ExpressionError(f"Syntax not allowed: {type(node).__name__}")
+        # [1] * 10 ** 9 would allocate gigabytes; a literal is only as long as the expression
+        if (
+            isinstance(node, ast.BinOp)
+            and isinstance(node.op, ast.Mult)
+            and (_is_sequence(node.left) or _is_sequence(node.right))
+        ):
+            raise ExpressionError("Repeating a list or tuple is not allowed")
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, int | float)):
+            raise ExpressionError(f"Constant not allowed: {node.value!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or not callable(ALLOWED_NAMES.get(node.func.id)):
+                raise ExpressionError(f"Function not allowed: {ast.unparse(node.func)}")
+            if node.keywords:
+                raise ExpressionError("Keyword arguments are not allowed")
+        if isinstance(node, ast.Name) and node.id not in ALLOWED_NAMES:
+            if node.id.startswith("_"):
+                raise ExpressionError(f"Name not allowed: {node.id}")
+            variables.add(node.id)
+    return frozenset(variables)
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse, validate and compile an expression (cached by expression text)."""
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    variables = _validate(tree)
+    tree = ast.fix_missing_locations(_PowRewriter().visit(tree))
+    return CompiledExpression(expression, compile(tree, "<expression>", "eval"), variables)
+
+
+def evaluate(expression: str, variables: dict | None = None):
+    """Evaluate an expression with scalar variable bindings."""
+    return compile_expression(expression).evaluate(variables)
+
+
+def evaluate_batch(expression: str, bindings: dict) -> np.ndarray:
+    """Evaluate an expression over arrays of variable bindings in one vectorized pass.
+
+    Bindings broadcast against each other, e.g. ``{"rate": rates[:, None], "years": years}``
+    yields a rates x years table.
+    """
+    return compile_expression(expression).evaluate_batch(bindings)
@@ -0,0 +1,143 @@
+"""Dimension-aware unit registry for the calculator.
+
+Every unit has a scale to SI, an offset (only for the affine temperature units) and a
+dimension vector over (length, mass, time, temperature). Conversions between two units
+are an affine map ``value * scale + offset``: for simple units the whole pair table is
+precomputed at import, and compound units such as ``km/h`` or ``kg/m^3`` are parsed once
+and memoized. Converting across dimensions ("km" to "kg") raises UnitError.
+"""
+
+import re
+from fractions import Fraction
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+# Dimension vectors: exponents of (length, mass, time, temperature)
+LENGTH = (1, 0, 0, 0)
+MASS = (0, 1, 0, 0)
+TIME = (0, 0, 1, 0)
+TEMPERATURE = (0, 0, 0, 1)
+VOLUME = (3, 0, 0, 0)
+SPEED = (1, 0, -1, 0)
+
+DIMENSION_NAMES = {
+    LENGTH: "length",
+    MASS: "mass",
+    TIME: "time",
+    TEMPERATURE: "temperature",
+    VOLUME: "volume",
+    SPEED: "speed",
+}
+
+
+def _unit(scale, dimension: tuple, offset=0) -> tuple[Fraction, Fraction, tuple]:
+    # Exact fractions (decimal strings, not floats), so derived factors carry no float noise
+    return Fraction(scale), Fraction(offset), dimension
+
+
+# name -> (scale to SI, offset added before scaling, dimension)
+UNITS = {
+    "m": _unit(1, LENGTH),
+    "km": _unit(1000, LENGTH),
+    "cm": _unit("0.01", LENGTH),
+    "mm": _unit("0.001", LENGTH),
+    "mi": _unit("1609.344", LENGTH),
+    "yd": _unit("0.9144", LENGTH),
+    "ft": _unit("0.3048", LENGTH),
+    "in": _unit("0.0254", LENGTH),
+    "kg": _unit(1, MASS),
+    "g": _unit("0.001", MASS),
+    "mg": _unit("1e-6", MASS),
+    "lb": _unit("0.453592", MASS),
+    "oz": _unit("0.0283495", MASS),
+    "s": _unit(1, TIME),
+    "min": _unit(60, TIME),
+    "h": _unit(3600, TIME),
+    "day": _unit(86400, TIME),
+    "l": _unit("0.001", VOLUME),
+    "ml": _unit("1e-6", VOLUME),
+    "gal": _unit("0.003785411784", VOLUME),
+    "mph": _unit("0.44704", SPEED),
+    "kph": _unit(Fraction(5, 18), SPEED),
+    "k": _unit(1, TEMPERATURE),
+    "c": _unit(1, TEMPERATURE, "273.15"),
+    "f": _unit(Fraction(5, 9), TEMPERATURE, "459.67"),
+}
+
+_SEPARATOR = re.compile(r"[*·]")
+_TERM = re.compile(r"^([a-z]+)(?:(?:\^|\*\*)?(-?\d+))?$")
+
+
+class UnitError(ValueError):
+    """Unknown unit, malformed compound unit or incompatible dimensions."""
+
+
+def _affine(source: tuple, target: tuple) -> tuple[float, float]:
+    # value -> SI: (value + offset) * scale; SI -> target: si / scale - offset
+    scale = source[0] / target[0]
+    return float(scale), float(source[1] * scale - target[1])
+
+
+# Precomputed (scale, offset) for every pair of simple units with the same dimension
+CONVERSIONS = {(a, b): _affine(UNITS[a], UNITS[b]) for a, b in product(UNITS, repeat=2) if UNITS[a][2] == UNITS[b][2]}
+
+
+@lru_cache(maxsize=512)
+def parse_unit(unit: str) -> tuple[Fraction, Fraction, tuple]:
+    """Parse a simple or compound unit (``km/h``, ``kg/m^3``, ``m*s^-2``) to (scale, offset, dimension)."""
+    name = unit.strip().lower()
+    if name in UNITS:
+        return UNITS[name]
+    numerator, _, denominator = name.partition("/")
+    if not numerator or "/" in denominator:
+        raise UnitError(f"Unknown unit: {unit}")
+    scale, dimension = Fraction(1), (0, 0, 0, 0)
+    for sign, part in ((1, numerator), (-1, denominator)):
+        terms = _SEPARATOR.split(part.replace("**", "^")) if part else []
+        for term in terms:
+            match = _TERM.match(term.strip())
+            base = UNITS.get(match.group(1)) if match else None
+            if base is None:
+                raise UnitError(f"Unknown unit: {term.strip()}" + (f" in {unit}" if term.strip() != name else ""))
+            if base[1]:
+                raise UnitError(f"Temperature unit {match.group(1)} can't be part of a compound unit")
+            power = sign * int(match.group(2) or 1)
+            scale *= base[0] ** power
+            dimension = tuple(d + power * b for d, b in zip(dimension, base[2], strict=True))
+    return scale, Fraction(0), dimension
+
+
+def _describe(dimension: tuple) -> str:
+    return DIMENSION_NAMES.get(dimension) or "·".join(
+        f"{name}^{power}"
+        for name, power in zip(("length", "mass", "time", "temperature"), dimension, strict=True)
+        if power
+    )
+
+
+@lru_cache(maxsize=1024)
+def conversion(from_unit: str, to_unit: str) -> tuple[float, float]:
+    """Return (scale, offset) such that ``value * scale + offset`` converts from_unit to to_unit."""
+    pair = (from_unit.strip().lower(), to_unit.strip().lower())
+    if pair in CONVERSIONS:
+        return CONVERSIONS[pair]
+    source, target = parse_unit(from_unit), parse_unit(to_unit)
+    if source[2] != target[2]:
+        raise UnitError(f"Can't convert {from_unit} ({_describe(source[2])}) to {to_unit} ({_describe(target[2])})")
+    return _affine(source, target)
+
+
+def convert(value: float, from_unit: str, to_unit: str) -> float:
+    scale, offset = conversion(from_unit, to_unit)
+    return value * scale + offset
+
+
+def convert_array(values, from_unit: str, to_unit: str) -> np.ndarray:
+    """Convert a whole column of values in one vectorized multiply-add."""
+    scale, offset = conversion(from_unit, to_unit)
+    result = np.asarray(values, dtype=np.float64) * scale
+    if offset:
+        result += offset
+    return result
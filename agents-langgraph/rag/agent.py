@@ -1,65 +1,89 @@
-"""RAG Agent - Q&A over documents with vector search."""
+"""RAG Agent - Q&A over documents with vector search.
+
+Searches SAMPLE_DOCUMENTS, or the index in RAG_INDEX_DIR written by shared/ingest.py.
+"""
+
+import argparse
 import os
-import sys
 
-from dotenv import load_dotenv
 from langchain.agents import create_agent
-from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from opentelemetry import trace
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from traceloop.sdk import Traceloop
-
+from langchain_core.tools import StructuredTool
 from prompt import RAG_AGENT_SYSTEM_PROMPT, SAMPLE_DOCUMENTS
+from tools import asearch_documents, create_knowledge_base, load_knowledge_base, retrieval_cache, search_documents
+
 from shared import logger
-from tools import create_knowledge_base, format_docs
+from shared.checkpoint import conversation_options, get_checkpointer, thread_config
+from shared.lazy import load_env, once
+from shared.models import chat_model, embeddings_model
+from shared.streaming import print_stream
+from shared.telemetry import init_telemetry
+from shared.tool_execution import ToolConcurrencyMiddleware
 
-load_dotenv()
 
-Traceloop.init(
-    app_name="rag-agent",
-    resource_attributes={
-        "galileo.project.name": "galileo-agents",
-        "galileo.logstream.name": "rag-agent",
-    },
-    disable_batch=True,
-)
+@once
+def get_retriever():
+    """Knowledge base retriever, built (or loaded from the on-disk cache) on first use."""
+    load_env()
+    embeddings = embeddings_model("text-embedding-3-small")
+    if os.getenv("RAG_INDEX_DIR"):
+        _, retriever = load_knowledge_base(os.getenv("RAG_INDEX_DIR"), embeddings)
+    else:
+        _, retriever = create_knowledge_base(SAMPLE_DOCUMENTS, embeddings)
+    return retriever
 
-# Add console exporter for debugging if enabled
-if os.getenv("TRACELOOP_CONSOLE_EXPORTER_ENABLED", "false").lower() == "true":
-    tracer_provider = trace.get_tracer_provider()
-    if hasattr(tracer_provider, "add_span_processor"):
-        console_processor = BatchSpanProcessor(ConsoleSpanExporter())
-        tracer_provider.add_span_processor(console_processor)
 
-# Knowledge base setup
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-_, retriever = create_knowledge_base(SAMPLE_DOCUMENTS, embeddings)
+def retrieve(query: str) -> str:
+    """Search the knowledge base for relevant documents about RAG, embeddings, and vector search."""
+    return search_documents(query, get_retriever())
 
 
-@tool
-def retrieve_documents(query: str) -> str:
-    """Search the knowledge base for relevant documents about RAG, embeddings, and vector search."""
-    docs = retriever.invoke(query)
-    if not docs:
-        return "No relevant documents found."
-    return format_docs(docs)
+async def aretrieve(query: str) -> str:
+    return await asearch_documents(query, get_retriever())
+
+
+retrieve_documents = StructuredTool.from_function(retrieve, coroutine=aretrieve, name="retrieve_documents")
+
 
+def create_rag_agent(checkpointer=None, tool_concurrency: int | None = None):
+    """With a checkpointer, conversations continue across calls on the same thread id.
 
-def create_rag_agent():
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    return create_agent(llm, [retrieve_documents], system_prompt=RAG_AGENT_SYSTEM_PROMPT)
+    tool_concurrency caps the tool calls run at once (default TOOL_MAX_CONCURRENCY).
+    """
+    load_env()
+    init_telemetry("rag-agent")
+    get_retriever()
+    llm = chat_model("gpt-4o-mini", temperature=0)
+    middleware = [ToolConcurrencyMiddleware(tool_concurrency)]
+    agent = create_agent(
+        llm,
+        [retrieve_documents],
+        system_prompt=RAG_AGENT_SYSTEM_PROMPT,
+        **conversation_options(llm, checkpointer, middleware),
+    )
+    return agent.with_config(metadata={"agent": "rag-agent"})
 
 
-def main(query: str = "What is RAG and how does it work?"):
+def main(query: str = "What is RAG and how does it work?", stream: bool = False, thread: str | None = None):
+    # Before anything reads its settings, e.g. CHECKPOINT_KEEP_LAST in get_checkpointer()
+    load_env()
     logger.info(f"RAG Agent - Query: {query}")
-    agent = create_rag_agent()
-    result = agent.invoke({"messages": [("user", query)]})
-    response = result["messages"][-1].content
-    logger.info(f"Response: {response}")
+    agent = create_rag_agent(get_checkpointer() if thread else None)
+    config = thread_config(thread)
+    if stream:
+        response, timings = print_stream(agent, query, config=config)
+        logger.info(f"Stream timings: {timings}")
+    else:
+        result = agent.invoke({"messages": [("user", query)]}, config)
+        response = result["messages"][-1].content
+        logger.info(f"Response: {response}")
+    logger.info(f"Retrieval cache: {retrieval_cache.stats()}")
     return response
 
 
 if __name__ == "__main__":
-    query = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else "What is RAG and how does it work?"
-    main(query)
+    parser = argparse.ArgumentParser(description="RAG agent")
+    parser.add_argument("query", nargs="*", help="Question to ask")
+    parser.add_argument("--stream", action="store_true", help="Print tokens and tool calls as they arrive")
+    parser.add_argument("--thread", help="Conversation id; runs with the same id continue the conversation")
+    args = parser.parse_args()
+    main(" ".join(args.query) or "What is RAG and how does it work?", stream=args.stream, thread=args.thread)
@@ -1,23 +1,71 @@
 """RAG tools."""
+
+from pathlib import Path
+
 from langchain_core.documents import Document
 
+from shared.mmap_store import META_FILE, MmapVectorStore, is_mmap_store
+from shared.retrieval_cache import RetrievalCache
+from shared.vectorstore import MANIFEST_FILE, IndexSpec, load_or_build_faiss
+
+retrieval_cache = RetrievalCache()
 
-def create_knowledge_base(documents: list[dict], embeddings) -> tuple:
-    """Create an in-memory vector store from documents."""
-    from langchain_community.vectorstores import FAISS
 
+def create_knowledge_base(documents: list[dict], embeddings, index: IndexSpec | None = None) -> tuple:
+    """Create a vector store from documents, reusing the on-disk index when unchanged.
+
+    ``index`` selects the FAISS index type (default: from VECTOR_INDEX, flat).
+    """
     docs = [
-        Document(page_content=doc["content"], metadata={"id": doc["id"], "title": doc["title"]})
-        for doc in documents
+        Document(page_content=doc["content"], metadata={"id": doc["id"], "title": doc["title"]}) for doc in documents
     ]
-    vector_store = FAISS.from_documents(docs, embeddings)
+    vector_store, index_version = load_or_build_faiss(docs, embeddings, "rag", index=index)
+    retrieval_cache.set_version(index_version)
+    retriever = vector_store.as_retriever(search_kwargs={"k": 3})
+    return vector_store, retriever
+
+
+def load_knowledge_base(directory: str, embeddings) -> tuple:
+    """Load an index written by shared/ingest.py instead of building one from documents."""
+    if is_mmap_store(directory):
+        vector_store, manifest = MmapVectorStore(directory, embeddings), META_FILE
+    else:
+        from langchain_community.vectorstores import FAISS
+
+        vector_store = FAISS.load_local(directory, embeddings, allow_dangerous_deserialization=True)
+        manifest = MANIFEST_FILE
+    retrieval_cache.set_version(f"{directory}:{(Path(directory) / manifest).read_text(encoding='utf-8')}")
     retriever = vector_store.as_retriever(search_kwargs={"k": 3})
     return vector_store, retriever
 
 
+def search_documents(query: str, retriever) -> str:
+    """Retrieve and format documents, serving repeated queries from the retrieval cache."""
+
+    def search():
+        docs = retriever.invoke(query)
+        if not docs:
+            return "No relevant documents found."
+        return format_docs(docs)
+
+    return retrieval_cache.get_or_compute(query, retriever.search_kwargs.get("k"), search)
+
+
+async def asearch_documents(query: str, retriever) -> str:
+    """search_documents for async runs; cache hits return without leaving the event loop."""
+
+    async def search():
+        docs = await retriever.ainvoke(query)
+        if not docs:
+            return "No relevant documents found."
+        return format_docs(docs)
+
+    return await retrieval_cache.aget_or_compute(query, retriever.search_kwargs.get("k"), search)
+
+
 def format_docs(docs: list[Document]) -> str:
     """Format retrieved documents for display."""
     return "\n\n".join(
-        f"[{i}] {doc.metadata.get('title', 'Unknown')}:\n{doc.page_content}"
+        f"[{i}] {doc.metadata.get('title') or doc.metadata.get('source', 'Unknown')}:\n{doc.page_content}"
         for i, doc in enumerate(docs, 1)
     )
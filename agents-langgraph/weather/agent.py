@@ -1,66 +1,125 @@
 """Weather Agent - Answers weather questions using tools."""
 
-import os
-import sys
+import argparse
 
-from dotenv import load_dotenv
 from langchain.agents import create_agent
-from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
-from opentelemetry import trace
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from langchain_core.tools import StructuredTool
 from prompt import WEATHER_AGENT_SYSTEM_PROMPT
-from tools import get_current_weather, get_forecast
-from traceloop.sdk import Traceloop
+from tools import (
+    aget_current_weather,
+    aget_forecast,
+    aget_weather_batch,
+    get_current_weather,
+    get_forecast,
+    get_weather_batch,
+)
 
 from shared import logger
+from shared.checkpoint import conversation_options, get_checkpointer, thread_config
+from shared.lazy import load_env
+from shared.models import chat_model
+from shared.streaming import print_stream
+from shared.telemetry import init_telemetry
+from shared.tool_execution import ToolConcurrencyMiddleware
 
-load_dotenv()
 
-Traceloop.init(
-    app_name="weather-agent",
-    disable_batch=True,
-)
+def format_current(result: dict) -> str:
+    return (
+        f"Weather in {result['city']}: {result['temperature_f']}F, {result['conditions']}, "
+        f"{result['humidity']}% humidity"
+    )
+
+
+def format_forecast(city: str, forecast: list[dict]) -> str:
+    lines = [f"Forecast for {city}:"]
+    for day in forecast:
+        lines.append(f"  Day {day['day']}: High {day['high_f']}F, Low {day['low_f']}F, {day['conditions']}")
+    return "\n".join(lines)
 
-# Add console exporter for debugging if enabled
-if os.getenv("TRACELOOP_CONSOLE_EXPORTER_ENABLED", "false").lower() == "true":
-    tracer_provider = trace.get_tracer_provider()
-    if hasattr(tracer_provider, "add_span_processor"):
-        console_processor = BatchSpanProcessor(ConsoleSpanExporter())
-        tracer_provider.add_span_processor(console_processor)
 
+def format_reports(reports: dict[str, dict]) -> str:
+    return "\n\n".join(
+        f"{format_current(report['current'])}\n{format_forecast(city, report['forecast'])}"
+        for city, report in reports.items()
+    )
 
-@tool
-def weather_tool(city: str) -> str:
+
+# Each tool has a sync function for invoke and a coroutine for ainvoke / astream, which
+# awaits the provider without holding a thread
+
+
+def current_weather(city: str) -> str:
     """Get current weather for a city."""
-    result = get_current_weather(city)
-    return f"Weather in {result['city']}: {result['temperature_f']}F, {result['conditions']}, {result['humidity']}% humidity"
+    return format_current(get_current_weather(city))
 
 
-@tool
-def forecast_tool(city: str, days: int = 3) -> str:
+async def acurrent_weather(city: str) -> str:
+    return format_current(await aget_current_weather(city))
+
+
+def forecast(city: str, days: int = 3) -> str:
     """Get multi-day weather forecast for a city."""
     result = get_forecast(city, days)
-    lines = [f"Forecast for {result['city']}:"]
-    for day in result["forecast"]:
-        lines.append(f"  Day {day['day']}: High {day['high_f']}F, Low {day['low_f']}F, {day['conditions']}")
-    return "\n".join(lines)
+    return format_forecast(result["city"], result["forecast"])
+
+
+async def aforecast(city: str, days: int = 3) -> str:
+    result = await aget_forecast(city, days)
+    return format_forecast(result["city"], result["forecast"])
+
+
+def multi_city_weather(cities: list[str], days: int = 3) -> str:
+    """Get current weather and a multi-day forecast for several cities at once."""
+    return format_reports(get_weather_batch(cities, days))
+
+
+async def amulti_city_weather(cities: list[str], days: int = 3) -> str:
+    return format_reports(await aget_weather_batch(cities, days))
+
+
+weather_tool = StructuredTool.from_function(current_weather, coroutine=acurrent_weather, name="weather_tool")
+forecast_tool = StructuredTool.from_function(forecast, coroutine=aforecast, name="forecast_tool")
+multi_city_weather_tool = StructuredTool.from_function(
+    multi_city_weather, coroutine=amulti_city_weather, name="multi_city_weather_tool"
+)
+
 
+def create_weather_agent(checkpointer=None, tool_concurrency: int | None = None):
+    """With a checkpointer, conversations continue across calls on the same thread id.
 
-def create_weather_agent():
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    return create_agent(llm, [weather_tool, forecast_tool], system_prompt=WEATHER_AGENT_SYSTEM_PROMPT)
+    tool_concurrency caps the tool calls run at once (default TOOL_MAX_CONCURRENCY).
+    """
+    load_env()
+    init_telemetry("weather-agent")
+    llm = chat_model("gpt-4o-mini", temperature=0)
+    tools = [weather_tool, forecast_tool, multi_city_weather_tool]
+    middleware = [ToolConcurrencyMiddleware(tool_concurrency)]
+    agent = create_agent(
+        llm, tools, system_prompt=WEATHER_AGENT_SYSTEM_PROMPT, **conversation_options(llm, checkpointer, middleware)
+    )
+    return agent.with_config(metadata={"agent": "weather-agent"})
 
 
-def main(query: str = "What's the weather like in San Francisco?"):
+def main(query: str = "What's the weather like in San Francisco?", stream: bool = False, thread: str | None = None):
+    # Before anything reads its settings, e.g. CHECKPOINT_KEEP_LAST in get_checkpointer()
+    load_env()
     logger.info(f"Weather Agent - Query: {query}")
-    agent = create_weather_agent()
-    result = agent.invoke({"messages": [("user", query)]})
-    response = result["messages"][-1].content
-    logger.info(f"Response: {response}")
+    agent = create_weather_agent(get_checkpointer() if thread else None)
+    config = thread_config(thread)
+    if stream:
+        response, timings = print_stream(agent, query, config=config)
+        logger.info(f"Stream timings: {timings}")
+    else:
+        result = agent.invoke({"messages": [("user", query)]}, config)
+        response = result["messages"][-1].content
+        logger.info(f"Response: {response}")
     return response
 
 
 if __name__ == "__main__":
-    query = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else "What's the weather like in San Francisco?"
-    main(query)
+    parser = argparse.ArgumentParser(description="Weather agent")
+    parser.add_argument("query", nargs="*", help="Question to ask")
+    parser.add_argument("--stream", action="store_true", help="Print tokens and tool calls as they arrive")
+    parser.add_argument("--thread", help="Conversation id; runs with the same id continue the conversation")
+    args = parser.parse_args()
+    main(" ".join(args.query) or "What's the weather like in San Francisco?", stream=args.stream, thread=args.thread)
@@ -0,0 +1,162 @@
+"""Weather provider backends.
+
+A WeatherProvider answers current-weather and forecast lookups asynchronously:
+
+- MockWeatherProvider: the offline random data the agent has always used, optionally
+  after a simulated round trip.
+- HttpWeatherProvider: a JSON-over-HTTP backend on one pooled httpx client, with a
+  semaphore bounding in-flight requests. It expects ``GET {base_url}/current?city=...``
+  and ``GET {base_url}/forecast?city=...&days=...`` to return the same dicts as the mock.
+
+CachedWeatherProvider wraps either with a per-city TTL cache. Concurrent lookups of the
+same city share one in-flight fetch instead of each hitting the backend.
+"""
+
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+
+CONDITIONS = ["sunny", "cloudy", "rainy", "partly cloudy", "foggy"]
+
+MAX_FORECAST_DAYS = 7
+
+
+def clamp_days(days: int) -> int:
+    return min(max(days, 1), MAX_FORECAST_DAYS)
+
+
+class WeatherProvider(ABC):
+    @abstractmethod
+    async def current(self, city: str) -> dict:
+        """Current conditions: city, temperature_f, conditions, humidity."""
+
+    @abstractmethod
+    async def forecast(self, city: str, days: int = 3) -> dict:
+        """Forecast: city and a list of {day, high_f, low_f, conditions}."""
+
+    async def aclose(self):
+        """Release held connections; providers without any have nothing to close."""
+        return
+
+    async def batch(self, cities: list[str], days: int = 3) -> dict[str, dict]:
+        """Current weather and forecast for many cities, all fetched concurrently."""
+        results = await asyncio.gather(*(self._city_report(city, days) for city in cities))
+        return dict(zip(cities, results, strict=True))
+
+    async def _city_report(self, city: str, days: int) -> dict:
+        current, forecast = await asyncio.gather(self.current(city), self.forecast(city, days))
+        return {"current": current, "forecast": forecast["forecast"]}
+
+
+class MockWeatherProvider(WeatherProvider):
+    """Random mock data, no network; each lookup takes latency_s."""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+
+    async def current(self, city: str) -> dict:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return {
+            "city": city,
+            "temperature_f": random.randint(45, 85),
+            "conditions": random.choice(CONDITIONS),
+            "humidity": random.randint(30, 80),
+        }
+
+    async def forecast(self, city: str, days: int = 3) -> dict:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        forecast = [
+            {
+                "day": i + 1,
+                "high_f": random.randint(55, 90),
+                "low_f": random.randint(40, 65),
+                "conditions": random.choice(CONDITIONS),
+            }
+            for i in range(clamp_days(days))
+        ]
+        return {"city": city, "forecast": forecast}
+
+
+class HttpWeatherProvider(WeatherProvider):
+    """Weather over HTTP through one pooled async client."""
+
+    def __init__(self, base_url: str, api_key: str | None = None, max_concurrency: int = 16, timeout_s: float = 10):
+        import httpx
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _get(self, path: str, **params) -> dict:
+        async with self._semaphore:
+            response = await self._client.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def current(self, city: str) -> dict:
+        return await self._get("/current", city=city)
+
+    async def forecast(self, city: str, days: int = 3) -> dict:
+        return await self._get("/forecast", city=city, days=clamp_days(days))
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class CachedWeatherProvider(WeatherProvider):
+    """Per-city TTL cache that coalesces concurrent requests for the same key."""
+
+    def __init__(self, provider: WeatherProvider, ttl_s: float = 300, max_entries: int = 1024):
+        self.provider = provider
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._inflight = {}
+
+    async def _fetch(self, key: tuple, fetch):
+        try:
+            value = await fetch()
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _cached(self, key: tuple, fetch):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(key, fetch))
+        else:
+            self.hits += 1
+        # Shielded, so a cancelled caller doesn't cancel the fetch other callers are waiting on
+        return await asyncio.shield(task)
+
+    async def current(self, city: str) -> dict:
+        return await self._cached(("current", city.strip().lower()), lambda: self.provider.current(city))
+
+    async def forecast(self, city: str, days: int = 3) -> dict:
+        days = clamp_days(days)
+        return await self._cached(("forecast", city.strip().lower(), days), lambda: self.provider.forecast(city, days))
+
+    def invalidate(self):
+        self._entries.clear()
+
+    async def aclose(self):
+        await self.provider.aclose()
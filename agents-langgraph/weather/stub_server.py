@@ -0,0 +1,234 @@
+"""Local stub of the weather HTTP API, for exercising HttpWeatherProvider without network.
+
+Serves ``/current`` and ``/forecast`` with deterministic data derived from the city name,
+optionally after a fixed delay, and counts the requests and connections it received:
+
+    uv run agents-langgraph/weather/stub_server.py --port 8765 --latency-ms 50
+    WEATHER_PROVIDER_URL=http://127.0.0.1:8765 uv run agents-langgraph/weather/agent.py
+
+In-process (e.g. from a test), start_stub_server() returns the running server and its URL.
+``--check`` runs HttpWeatherProvider and CachedWeatherProvider against an in-process stub
+and verifies connection pooling, TTL caching, request coalescing and batch lookups. The
+checks raise CheckFailed rather than assert, so they also run under ``python -O``, and
+the script exits 1 if any of them fails:
+
+    uv run agents-langgraph/weather/stub_server.py --check
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from providers import CONDITIONS, CachedWeatherProvider, HttpWeatherProvider, clamp_days
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.sha256(":".join(map(str, parts)).encode("utf-8")).digest()[:4], "little")
+
+
+def current_weather(city: str) -> dict:
+    seed = _seed(city.lower())
+    return {
+        "city": city,
+        "temperature_f": 45 + seed % 41,
+        "conditions": CONDITIONS[seed % len(CONDITIONS)],
+        "humidity": 30 + seed % 51,
+    }
+
+
+def forecast(city: str, days: int) -> dict:
+    days_out = []
+    for day in range(1, clamp_days(days) + 1):
+        seed = _seed(city.lower(), day)
+        conditions = CONDITIONS[seed % len(CONDITIONS)]
+        days_out.append({"day": day, "high_f": 55 + seed % 36, "low_f": 40 + seed % 26, "conditions": conditions})
+    return {"city": city, "forecast": days_out}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients can reuse connections
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.count("requests")
+        if self.server.latency_s:
+            time.sleep(self.server.latency_s)
+        if url.path not in ("/current", "/forecast"):
+            self.send_error(404)
+            return
+        if "city" not in params:
+            self.send_error(400, "Missing city")
+            return
+        if url.path == "/current":
+            body = current_weather(params["city"])
+        else:
+            body = forecast(params["city"], int(params.get("days", 3)))
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """The stub, with counters of the requests and connections it received."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], latency_s: float = 0.0):
+        super().__init__(address, StubHandler)
+        self.latency_s = latency_s
+        self.requests = 0
+        self.connections = 0
+        # Handlers run on their own threads
+        self._counter_lock = threading.Lock()
+
+    def count(self, counter: str):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def counts(self) -> tuple[int, int]:
+        """(requests, connections) so far."""
+        with self._counter_lock:
+            return self.requests, self.connections
+
+
+class CheckFailed(Exception):
+    """A --check expectation did not hold."""
+
+
+def expect(condition: bool, message: str):
+    if not condition:
+        raise CheckFailed(message)
+
+
+def create_stub_server(host: str, port: int, latency_s: float = 0.0) -> StubServer:
+    return StubServer((host, port), latency_s)
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency_s: float = 0.0) -> tuple[StubServer, str]:
+    """Start the stub on a background thread (port 0 picks a free port); stop it with server.shutdown()."""
+    server = create_stub_server(host, port, latency_s)
+    threading.Thread(target=server.serve_forever, name="weather-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+async def _check_pooling(server, url) -> str:
+    provider = HttpWeatherProvider(url, max_concurrency=4)
+    try:
+        for i in range(10):
+            await provider.current(f"Pool {i}")
+        _, sequential = server.counts()
+        await asyncio.gather(*(provider.current(f"Pool {i}") for i in range(10, 30)))
+    finally:
+        await provider.aclose()
+    requests, connections = server.counts()
+    expect(sequential == 1, f"10 sequential requests opened {sequential} connections, expected 1")
+    expect(connections <= 4, f"20 concurrent requests opened {connections} connections, max 4")
+    return f"{requests} requests over {connections} connections"
+
+
+async def _check_ttl_cache(server, url) -> str:
+    provider = CachedWeatherProvider(HttpWeatherProvider(url), ttl_s=0.2)
+    try:
+        first = await provider.current("Paris")
+        second = await provider.current("paris ")
+        expect(first == second == current_weather("Paris"), "cached result differs from the stub's")
+        requests, _ = server.counts()
+        expect(requests == 1, f"repeated lookup sent {requests} requests, expected 1")
+        await asyncio.sleep(0.3)
+        await provider.current("Paris")
+    finally:
+        await provider.aclose()
+    requests, _ = server.counts()
+    expect(requests == 2, f"lookup after the TTL sent {requests - 1} requests, expected 1")
+    return f"{provider.hits} hit, {provider.misses} misses"
+
+
+async def _check_coalescing(server, url) -> str:
+    provider = CachedWeatherProvider(HttpWeatherProvider(url), ttl_s=60)
+    try:
+        results = await asyncio.gather(*(provider.current("Rome") for _ in range(10)))
+    finally:
+        await provider.aclose()
+    expect(all(result == current_weather("Rome") for result in results), "coalesced result differs from the stub's")
+    requests, _ = server.counts()
+    expect(requests == 1, f"10 concurrent lookups sent {requests} requests, expected 1")
+    return "10 concurrent lookups, 1 request"
+
+
+async def _check_batch(server, url) -> str:
+    cities = ["Oslo", "Lima", "Cairo"]
+    provider = CachedWeatherProvider(HttpWeatherProvider(url), ttl_s=60)
+    try:
+        start = time.perf_counter()
+        reports = await provider.batch(cities, days=3)
+        elapsed = time.perf_counter() - start
+    finally:
+        await provider.aclose()
+    for city in cities:
+        expect(reports[city]["current"] == current_weather(city), f"wrong current weather for {city}")
+        expect(reports[city]["forecast"] == forecast(city, 3)["forecast"], f"wrong forecast for {city}")
+    requests, _ = server.counts()
+    expect(requests == 2 * len(cities), f"batch sent {requests} requests, expected {2 * len(cities)}")
+    # Sequential lookups would take 6 x the stub latency
+    expect(elapsed < 3 * server.latency_s, f"batch took {elapsed:.3f}s, requests did not overlap")
+    return f"{len(cities)} cities in {elapsed * 1000:.0f} ms"
+
+
+async def run_checks(latency_s: float = 0.05) -> bool:
+    """Run each provider check against a fresh stub; print the outcomes and return whether all passed."""
+    passed = True
+    for name, check in (
+        ("pooling", _check_pooling),
+        ("ttl cache", _check_ttl_cache),
+        ("coalescing", _check_coalescing),
+        ("batch", _check_batch),
+    ):
+        server, url = start_stub_server(latency_s=latency_s)
+        try:
+            print(f"{name:<12} ok    {await check(server, url)}")
+        except CheckFailed as e:
+            passed = False
+            print(f"{name:<12} FAIL  {e}")
+        finally:
+            server.shutdown()
+            server.server_close()
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the weather HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay before each response")
+    parser.add_argument("--check", action="store_true", help="Verify the HTTP provider against an in-process stub")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if asyncio.run(run_checks()) else 1)
+    server = create_stub_server(args.host, args.port, args.latency_ms / 1000)
+    print(f"Weather stub listening on http://{args.host}:{args.port}")
+    with contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
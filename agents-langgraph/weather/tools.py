@@ -1,29 +1,54 @@
-"""Weather tools."""
-import random
+"""Weather tools.
 
-CONDITIONS = ["sunny", "cloudy", "rainy", "partly cloudy", "foggy"]
+Lookups go through a cached WeatherProvider: HttpWeatherProvider when WEATHER_PROVIDER_URL
+is set, otherwise the offline MockWeatherProvider. The provider lives on the shared
+background event loop, so its connection pool and cache survive across tool calls. The
+``a``-prefixed variants await the same provider from another event loop.
+"""
+
+import os
+
+from providers import CachedWeatherProvider, HttpWeatherProvider, MockWeatherProvider, WeatherProvider
+
+from shared.aio import run_async, run_sync
+from shared.lazy import once
+
+
+def create_provider() -> WeatherProvider:
+    """Build the provider configured by WEATHER_PROVIDER_URL / WEATHER_PROVIDER_API_KEY / WEATHER_CACHE_TTL."""
+    url = os.getenv("WEATHER_PROVIDER_URL")
+    if url:
+        backend = HttpWeatherProvider(url, api_key=os.getenv("WEATHER_PROVIDER_API_KEY"))
+    else:
+        backend = MockWeatherProvider(latency_s=float(os.getenv("WEATHER_MOCK_LATENCY_MS", "0")) / 1000)
+    return CachedWeatherProvider(backend, ttl_s=float(os.getenv("WEATHER_CACHE_TTL", "300")))
+
+
+get_provider = once(create_provider)
 
 
 def get_current_weather(city: str) -> dict:
-    """Get current weather for a city (mock data)."""
-    return {
-        "city": city,
-        "temperature_f": random.randint(45, 85),
-        "conditions": random.choice(CONDITIONS),
-        "humidity": random.randint(30, 80),
-    }
+    """Get current weather for a city."""
+    return run_sync(get_provider().current(city))
 
 
 def get_forecast(city: str, days: int = 3) -> dict:
-    """Get weather forecast for a city (mock data)."""
-    days = min(max(days, 1), 7)
-    forecast = [
-        {
-            "day": i + 1,
-            "high_f": random.randint(55, 90),
-            "low_f": random.randint(40, 65),
-            "conditions": random.choice(CONDITIONS),
-        }
-        for i in range(days)
-    ]
-    return {"city": city, "forecast": forecast}
+    """Get weather forecast for a city."""
+    return run_sync(get_provider().forecast(city, days))
+
+
+def get_weather_batch(cities: list[str], days: int = 3) -> dict[str, dict]:
+    """Get current weather and forecast for many cities concurrently."""
+    return run_sync(get_provider().batch(cities, days))
+
+
+async def aget_current_weather(city: str) -> dict:
+    return await run_async(get_provider().current(city))
+
+
+async def aget_forecast(city: str, days: int = 3) -> dict:
+    return await run_async(get_provider().forecast(city, days))
+
+
+async def aget_weather_batch(cities: list[str], days: int = 3) -> dict[str, dict]:
+    return await run_async(get_provider().batch(cities, days))
@@ -0,0 +1,115 @@
+"""Approximate-nearest-neighbor benchmark - recall and latency of each index type vs flat.
+
+Builds every shared.vectorstore index type over a synthetic clustered corpus of unit
+vectors (embeddings cluster by topic the same way), then sweeps the search settings:
+``nprobe`` for the IVF indexes, ``ef_search`` for HNSW. Recall@k is measured against the
+exact results of the flat index, latency one query at a time as a retriever issues them.
+
+    uv run benchmarks/ann_recall.py --vectors 200000 --dim 256 --k 10
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from shared.stats import latency_summary
+from shared.vectorstore import IndexSpec
+
+NPROBES = (1, 4, 16, 64)
+EF_SEARCHES = (16, 32, 64, 128)
+
+
+def synthetic_corpus(vectors: int, queries: int, dim: int, clusters: int, spread: float, seed: int = 0) -> tuple:
+    """(corpus, queries) of unit vectors scattered around shared random cluster centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+
+    def sample(count):
+        noise = rng.standard_normal((count, dim), dtype=np.float32)
+        points = centers[rng.integers(clusters, size=count)] + spread * noise
+        return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+    return sample(vectors), sample(queries)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(
+        np.mean([len(set(row) & set(expected)) / len(expected) for row, expected in zip(found, truth, strict=True)])
+    )
+
+
+def search_each(index, queries: np.ndarray, k: int) -> tuple:
+    """(neighbor ids, per-query latencies) searching one query at a time."""
+    ids, latencies = np.empty((len(queries), k), dtype=np.int64), []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids[i] = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+    return ids, latencies
+
+
+def build(spec: IndexSpec, corpus: np.ndarray) -> tuple:
+    """(index holding corpus, build seconds including training)."""
+    start = time.perf_counter()
+    index = spec.build(corpus)
+    index.add(corpus)
+    return index, time.perf_counter() - start
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray | None, k: int) -> dict:
+    ids, latencies = search_each(index, queries, k)
+    summary = latency_summary(latencies)
+    return {
+        "recall": recall(ids, truth) if truth is not None else 1.0,
+        "p50_ms": summary["p50_ms"],
+        "p95_ms": summary["p95_ms"],
+        "ids": ids,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of the ANN index types against a flat index")
+    parser.add_argument("--vectors", type=int, default=100_000, help="Corpus size (default: 100000)")
+    parser.add_argument("--queries", type=int, default=500, help="Queries to run (default: 500)")
+    parser.add_argument("--dim", type=int, default=256, help="Vector dimensions (default: 256)")
+    parser.add_argument("--clusters", type=int, default=1000, help="Topic clusters in the corpus (default: 1000)")
+    parser.add_argument("--spread", type=float, default=1.5, help="Noise around cluster centers (default: 1.5)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbors per query (default: 10)")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (default: about 4 * sqrt(vectors))")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW graph degree (default: 32)")
+    parser.add_argument("--pq-m", type=int, default=16, help="Product-quantizer codes per vector (default: 16)")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS threads per query (default: 1)")
+    args = parser.parse_args()
+
+    corpus, queries = synthetic_corpus(args.vectors, args.queries, args.dim, args.clusters, args.spread)
+    runs = [("flat", IndexSpec("flat"))]
+    runs += [(f"ivf nprobe={n}", IndexSpec("ivf", nlist=args.nlist, nprobe=n)) for n in NPROBES]
+    runs += [(f"hnsw ef={ef}", IndexSpec("hnsw", hnsw_m=args.hnsw_m, ef_search=ef)) for ef in EF_SEARCHES]
+    runs += [(f"ivfpq nprobe={n}", IndexSpec("ivfpq", nlist=args.nlist, nprobe=n, pq_m=args.pq_m)) for n in NPROBES]
+
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}")
+    print(f"{'index':<18} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8} {'MiB':>8}")
+    build_threads = faiss.omp_get_max_threads()
+    truth, built = None, {}
+    for label, spec in runs:
+        # Search settings don't change the index, so each build is reused across the sweep
+        if spec.key not in built:
+            faiss.omp_set_num_threads(build_threads)
+            built[spec.key] = build(spec, corpus)
+        index, build_s = built[spec.key]
+        spec.tune(index)
+        faiss.omp_set_num_threads(args.threads)
+        result = measure(index, queries, truth, args.k)
+        if truth is None:
+            truth = result["ids"]
+        size_mib = faiss.serialize_index(index).nbytes / 2**20
+        print(
+            f"{label:<18} {result['recall']:>7.3f} {result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f} "
+            f"{build_s:>8.2f} {size_mib:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
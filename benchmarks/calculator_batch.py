@@ -0,0 +1,89 @@
+"""Calculator batch benchmark - vectorized what-if tables against one evaluation per row.
+
+Evaluates each expression over ``--rows`` random variable bindings twice: once through
+``calculate_batch`` (one vectorized pass) and once through ``calculate`` per row. The two
+must agree on every row, so the batch mapping of each function (``sum``, ``min``,
+``pow``...) keeps the scalar semantics; the script exits 1 on any mismatch.
+
+    uv run benchmarks/calculator_batch.py --rows 10000
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from shared.paths import ROOT
+
+sys.path.insert(0, str(ROOT / "agents-langgraph/calculator"))
+
+from tools import calculate, calculate_batch
+
+EXPRESSIONS = (
+    "p * (1 + r) ** n",
+    "sum([a, b, c]) / 3",
+    "sum((a, b), c) - min(a, b, c)",
+    "max([a, b]) - min((b, c))",
+    "pow(n, 3, 7) + abs(a - b)",
+    "round(sqrt(a * a + b * b), 2)",
+    "log(a, 2) + log10(b) + exp(-c)",
+    "(a > b) * a - (n % 4)",
+)
+
+
+def bindings(rows: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "a": rng.uniform(0.1, 100, rows),
+        "b": rng.uniform(0.1, 100, rows),
+        "c": rng.uniform(-5, 5, rows),
+        "p": rng.uniform(100, 10_000, rows),
+        "r": rng.uniform(0, 0.2, rows),
+        "n": rng.integers(0, 30, rows),
+    }
+
+
+def per_row(expression: str, values: dict, rows: int) -> np.ndarray:
+    results = np.empty(rows)
+    for i in range(rows):
+        # .item() keeps integer columns as ints, as a caller would pass them
+        result = calculate(expression, {name: column[i].item() for name, column in values.items()})
+        if not result["success"]:
+            raise ValueError(f"row {i}: {result['error']}")
+        results[i] = result["result"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs per-row calculator evaluation")
+    parser.add_argument("--rows", type=int, default=10_000, help="Variable bindings per expression (default: 10000)")
+    args = parser.parse_args()
+
+    values = bindings(args.rows)
+    failed = False
+    print(f"{'expression':<36} {'batch ms':>9} {'rows ms':>9} {'speedup':>8}  result")
+    for expression in EXPRESSIONS:
+        start = time.perf_counter()
+        batch = calculate_batch(expression, values)
+        batch_s = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            expected = per_row(expression, values, args.rows)
+            error = None if batch["success"] else batch["error"]
+        except ValueError as e:
+            expected, error = None, str(e)
+        rows_s = time.perf_counter() - start
+        if error is None and not np.allclose(batch["results"], expected, equal_nan=True):
+            mismatched = int(np.sum(~np.isclose(batch["results"], expected, equal_nan=True)))
+            error = f"{mismatched} of {args.rows} rows differ"
+        failed = failed or error is not None
+        print(
+            f"{expression:<36} {batch_s * 1000:>9.2f} {rows_s * 1000:>9.2f} {rows_s / batch_s:>7.0f}x  "
+            f"{'ok' if error is None else 'FAIL ' + error}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
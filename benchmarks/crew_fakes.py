@@ -0,0 +1,52 @@
+"""Deterministic offline stand-in for the CrewAI LLM, kept apart so fakes.py works without crewai."""
+
+import json
+import time
+
+from crewai import BaseLLM
+
+
+class ScriptedCrewLLM(BaseLLM):
+    """CrewAI LLM that answers in the ReAct text format CrewAI parses.
+
+    ``scripts`` maps an agent role to its turns; a turn is either ``(tool_name, args)`` or
+    the final answer text. The role is matched against the system prompt and the turn is
+    the number of assistant messages CrewAI has appended so far.
+    """
+
+    def __init__(self, model: str = "fake-chat", scripts: dict | None = None, latency_s: float = 0.0, **kwargs):
+        super().__init__(model=model, **kwargs)
+        self.scripts = scripts or {}
+        self.latency_s = latency_s
+
+    def _step(self, messages):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        system = messages[0]["content"] if messages else ""
+        script = next((turns for role, turns in self.scripts.items() if f"You are {role}" in system), [])
+        turn = sum(1 for message in messages if message["role"] == "assistant")
+        return script[turn] if turn < len(script) else (script[-1] if script else "Done.")
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        step = self._step(messages)
+        if isinstance(step, str):
+            return f"Thought: I now know the final answer\nFinal Answer: {step}"
+        name, args = step
+        return f"Thought: I should use a tool\nAction: {name}\nAction Input: {json.dumps(args)}"
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128_000
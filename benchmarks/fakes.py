@@ -0,0 +1,106 @@
+"""Deterministic offline stand-ins for the OpenAI chat model and embeddings.
+
+The fakes follow a fixed script and sleep for a configurable latency instead of calling
+the API, so benchmark runs measure framework, tool and tracing overhead only.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _usage(prompt: str, completion: str) -> dict:
+    # Rough whitespace token counts, enough to exercise the usage attributes on spans
+    input_tokens = len(prompt.split())
+    output_tokens = len(completion.split())
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays a script of tool-call turns followed by a final answer.
+
+    Each script entry is either a list of ``(tool_name, args)`` calls or the final answer
+    text. The turn is the number of AI messages already in the conversation, so every
+    invoke of a fresh conversation replays the script from the start.
+    """
+
+    script: list = Field(default_factory=list)
+    latency_s: float = 0.0
+    model_name: str = "fake-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next_message(self, messages) -> AIMessage:
+        turn = sum(1 for message in messages if isinstance(message, AIMessage))
+        step = self.script[min(turn, len(self.script) - 1)] if self.script else "Done."
+        prompt = " ".join(str(message.content) for message in messages)
+        if isinstance(step, str):
+            return AIMessage(content=step, usage_metadata=_usage(prompt, step))
+        tool_calls = [
+            {"name": name, "args": args, "id": f"call_{turn}_{i}", "type": "tool_call"}
+            for i, (name, args) in enumerate(step)
+        ]
+        return AIMessage(content="", tool_calls=tool_calls, usage_metadata=_usage(prompt, json.dumps(step)))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words embeddings, so similar texts still land near each other."""
+
+    def __init__(self, model: str = "fake-embedding", dimensions: int = 256, latency_s: float = 0.0):
+        self.model = model
+        self.dimensions = dimensions
+        self.latency_s = latency_s
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in _TOKEN.findall(text.lower()):
+            bucket = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+            vector[bucket % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return self._embed(text)
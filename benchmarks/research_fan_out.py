@@ -0,0 +1,82 @@
+"""Research crew fan-out benchmark - sequential crew vs parallel sub-question research.
+
+Runs the research crew offline with the scripted fakes from suite.py, with injected
+latency per fake model call standing in for the LLM round trip:
+
+- ``sequential``: the default crew, one researcher task then the analyst
+- ``serial xN``: N sub-question tasks, one at a time (concurrency 1)
+- ``fan-out xN``: N sub-question tasks running ``--concurrency`` at a time
+
+    uv run benchmarks/research_fan_out.py --fan-out 4 --concurrency 4 --latency-ms 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from suite import SCENARIOS, install_fakes, run_in_worker
+
+
+def run_worker(fan_out: int, concurrency: int, runs: int, latency_s: float) -> dict:
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    from shared.registry import get_factory
+    from shared.telemetry import init_telemetry
+
+    install_fakes("research", latency_s)
+    init_telemetry("benchmark", exporter=InMemorySpanExporter())
+    create_crew = get_factory("research")
+    topic = SCENARIOS["research"]["input"]
+    configs = {
+        "sequential": {},
+        f"serial x{fan_out}": {"fan_out": fan_out, "concurrency": 1},
+        f"fan-out x{fan_out}": {"fan_out": fan_out, "concurrency": concurrency},
+    }
+
+    results = {}
+    for label, options in configs.items():
+        create_crew(topic, **options).kickoff()  # warm-up
+        wall = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            create_crew(topic, **options).kickoff()
+            wall.append(time.perf_counter() - start)
+        results[label] = round(statistics.median(wall), 4)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the research crew with and without fan-out")
+    parser.add_argument("--fan-out", type=int, default=4, help="Sub-questions to research (default: 4)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Researcher tasks at once (default: 4)")
+    parser.add_argument("--runs", type=int, default=3, help="Measured runs per configuration (default: 3)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Latency per fake model call (default: 200)")
+    parser.add_argument("--worker", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.fan_out, args.concurrency, args.runs, args.latency_ms / 1000)
+        Path(args.worker).write_text(json.dumps(result))
+        return
+
+    options = [
+        "--fan-out",
+        str(args.fan_out),
+        "--concurrency",
+        str(args.concurrency),
+        "--runs",
+        str(args.runs),
+        "--latency-ms",
+        str(args.latency_ms),
+    ]
+    results, _ = run_in_worker(__file__, options)
+    sequential = results["sequential"]
+    print(f"{'crew':<14} {'wall s':>8} {'vs sequential':>14}")
+    for label, wall in results.items():
+        print(f"{label:<14} {wall:>8.3f} {wall / sequential:>13.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Startup benchmark - import cost and time to first response for every agent.
+
+Each agent starts in a fresh interpreter under ``-X importtime`` with the offline fakes
+from suite.py, so nothing touches the network:
+
+- ``import_s``: importing the agent's entry-point module. Agent modules must not do
+  work at import, so this is framework imports only.
+- ``first_response_s``: process launch to the end of the first scenario run, including
+  interpreter start, telemetry init, knowledge base build and agent construction.
+
+The slowest imports are listed per agent. Results are checked against the budgets in
+startup_budgets.json and the run fails when one is exceeded:
+
+    uv run benchmarks/startup.py                  # all agents, exit 1 over budget
+    uv run benchmarks/startup.py rag --top 20
+    uv run benchmarks/startup.py --update         # budgets = measured x (1 + headroom)
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from suite import install_fakes, run_in_worker, run_scenario
+
+BUDGETS = Path(__file__).with_name("startup_budgets.json")
+METRICS = ("import_s", "first_response_s")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """Parse ``-X importtime`` lines into (module, depth, self_us, cumulative_us)."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def run_worker(name: str, launched_at: float) -> dict:
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    from shared.registry import get_factory
+    from shared.telemetry import init_telemetry
+
+    install_fakes(name)
+    start = time.perf_counter()
+    factory = get_factory(name)
+    import_s = time.perf_counter() - start
+    # Initialized first, so the agent's own init_telemetry call is a no-op
+    init_telemetry("benchmark", exporter=InMemorySpanExporter())
+    run_scenario(name, factory)
+    return {"import_s": round(import_s, 4), "first_response_s": round(time.time() - launched_at, 4)}
+
+
+def measure(name: str, top: int) -> dict:
+    launched_at = time.time()
+    result, stderr = run_in_worker(__file__, [name, "--launched-at", repr(launched_at)], ("-X", "importtime"))
+    # The registry imports entry points with importlib, which importtime doesn't report, so
+    # their imports show up as top-level entries
+    top_level = sorted((c, module) for module, depth, _, c in parse_importtime(stderr) if depth == 0)
+    result["slowest_imports"] = [[module, round(c / 1e6, 4)] for c, module in reversed(top_level[-top:])]
+    return result
+
+
+def over_budget(results: dict, budgets: dict) -> list[str]:
+    failures = []
+    for name, metrics in results.items():
+        for metric in METRICS:
+            budget = budgets.get(name, {}).get(metric)
+            if budget is not None and metrics[metric] > budget:
+                failures.append(f"{name}.{metric}: {metrics[metric]:.3f}s > budget {budget:.3f}s")
+    return failures
+
+
+def main():
+    from shared.registry import AGENTS
+
+    parser = argparse.ArgumentParser(description="Import time and time to first response per agent")
+    parser.add_argument("agents", nargs="*", help=f"Agents to run: {', '.join(AGENTS)} (default: all)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports to list (default: 5)")
+    parser.add_argument("--update", action="store_true", help=f"Write budgets to {BUDGETS.name}")
+    parser.add_argument("--headroom", type=float, default=0.5, help="Budget headroom for --update (default: 0.5)")
+    parser.add_argument("--launched-at", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    names = args.agents or list(AGENTS)
+    unknown = [name for name in names if name not in AGENTS]
+    if unknown:
+        parser.error(f"Unknown agent(s): {', '.join(unknown)}")
+
+    if args.worker:
+        Path(args.worker).write_text(json.dumps(run_worker(names[0], args.launched_at)))
+        return
+
+    results = {}
+    print(f"{'agent':<12} {'import s':>9} {'first response s':>17}  slowest imports")
+    for name in names:
+        results[name] = metrics = measure(name, args.top)
+        slowest = ", ".join(f"{module} {seconds:.2f}s" for module, seconds in metrics["slowest_imports"])
+        print(f"{name:<12} {metrics['import_s']:>9.3f} {metrics['first_response_s']:>17.3f}  {slowest}")
+
+    budgets = json.loads(BUDGETS.read_text()) if BUDGETS.exists() else {}
+    if args.update:
+        for name, metrics in results.items():
+            budgets[name] = {metric: round(metrics[metric] * (1 + args.headroom), 2) for metric in METRICS}
+        BUDGETS.write_text(json.dumps(budgets, indent=2) + "\n")
+        print(f"Budgets written to {BUDGETS}")
+        return
+
+    failures = over_budget(results, budgets)
+    for failure in failures:
+        print(f"OVER BUDGET {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Offline benchmark suite - runs every agent against scripted fake models.
+
+Each agent runs in its own subprocess with the fake chat model, CrewAI LLM and embeddings
+from fakes.py swapped in through shared.models, and spans going to an in-memory exporter
+through the normal telemetry pipeline. Nothing touches the network, so the numbers only
+cover startup, framework/graph overhead, tools and tracing:
+
+- ``startup_s``: telemetry init plus importing the agent module
+- ``wall_s`` / ``cpu_s``: median per run of building the agent and invoking it once
+- ``alloc_peak_kib``: tracemalloc peak during one extra run
+- ``spans``: spans exported per run
+
+    uv run benchmarks/suite.py                          # run all agents, compare to baselines
+    uv run benchmarks/suite.py weather rag --runs 20
+    uv run benchmarks/suite.py --update                 # record new baselines
+    uv run benchmarks/suite.py --check --tolerance 0.5  # exit 1 on regressions (CI)
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BASELINES = Path(__file__).with_name("baselines.json")
+
+# Scripted conversation per agent: the user input and the fake model's turns
+SCENARIOS = {
+    "weather": {
+        "input": "What's the weather in Paris and the forecast for the next 3 days?",
+        "script": [
+            [("weather_tool", {"city": "Paris"}), ("forecast_tool", {"city": "Paris", "days": 3})],
+            "It is mild in Paris today with a similar outlook for the next three days.",
+        ],
+    },
+    "calculator": {
+        "input": "What is 15% of 2400, and how many miles is 42 km?",
+        "script": [
+            [("calc_tool", {"expression": "0.15 * 2400"})],
+            [("convert_tool", {"value": 42, "from_unit": "km", "to_unit": "mi"})],
+            "15% of 2400 is 360, and 42 km is about 26.1 miles.",
+        ],
+    },
+    "rag": {
+        "input": "What is RAG and how does it work?",
+        "script": [
+            [("retrieve_documents", {"query": "What is RAG and how does it work?"})],
+            "RAG retrieves relevant documents and passes them to the model as context.",
+        ],
+    },
+    "content": {
+        "input": "The Future of AI Agents",
+        "scripts": {
+            "Content Writer": ["A draft blog post about the future of AI agents."],
+            "Content Editor": ["A polished blog post about the future of AI agents."],
+        },
+    },
+    "research": {
+        "input": "Vector databases",
+        "scripts": {
+            "Researcher": [("knowledge_search", {"query": "vector databases"}), "Key findings on vector databases."],
+            "Analyst": ["Analysis and recommendations on vector databases."],
+        },
+    },
+}
+
+# Metrics compared against the baselines; spans must match exactly
+TIMED_METRICS = ("startup_s", "wall_s", "cpu_s", "alloc_peak_kib")
+
+
+def install_fakes(name: str, latency_s: float = 0.0):
+    """Route shared.models to the scripted fakes for this agent's scenario."""
+    # The fakes import their frameworks lazily, so startup_s still includes those imports
+    from shared.models import set_model_overrides
+
+    scenario = SCENARIOS[name]
+
+    def chat(model, **kwargs):
+        from fakes import ScriptedChatModel
+
+        return ScriptedChatModel(script=scenario.get("script", []), latency_s=latency_s)
+
+    def crew_llm(model, **kwargs):
+        from crew_fakes import ScriptedCrewLLM
+
+        return ScriptedCrewLLM(scripts=scenario.get("scripts", {}), latency_s=latency_s)
+
+    def embeddings(model):
+        from fakes import FakeEmbeddings
+
+        return FakeEmbeddings(latency_s=latency_s)
+
+    set_model_overrides(chat=chat, crew_llm=crew_llm, embeddings=embeddings)
+
+
+def run_scenario(name: str, factory):
+    """Build the agent with its factory and run the scenario input through it once."""
+    from shared.registry import AGENTS
+
+    user_input = SCENARIOS[name]["input"]
+    if AGENTS[name][2] == "create_crew":
+        return factory(user_input).kickoff()
+    return factory().invoke({"messages": [("user", user_input)]})
+
+
+def run_worker(name: str, runs: int, latency_s: float) -> dict:
+    """Benchmark one agent in this process and return its metrics."""
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    from shared.registry import get_factory
+    from shared.telemetry import init_telemetry
+
+    random.seed(0)
+    install_fakes(name, latency_s)
+    exporter = InMemorySpanExporter()
+
+    start = time.perf_counter()
+    # Initialized first, so the agent module's own init_telemetry call is a no-op
+    init_telemetry("benchmark", exporter=exporter)
+    provider = trace.get_tracer_provider()
+    factory = get_factory(name)
+    startup = time.perf_counter() - start
+    provider.force_flush()
+    exporter.clear()
+
+    def run_once():
+        run_scenario(name, factory)
+
+    run_once()  # warm-up: lazy imports, knowledge base build, first-call caches
+    provider.force_flush()
+    exporter.clear()
+
+    wall, cpu, spans = [], [], []
+    for _ in range(runs):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        run_once()
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+        provider.force_flush()
+        spans.append(len(exporter.get_finished_spans()))
+        exporter.clear()
+
+    tracemalloc.start()
+    run_once()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "startup_s": round(startup, 4),
+        "wall_s": round(statistics.median(wall), 4),
+        "cpu_s": round(statistics.median(cpu), 4),
+        "alloc_peak_kib": round(peak / 1024, 1),
+        "spans": max(spans, default=0),
+    }
+
+
+def worker_env(cache_dir: str) -> dict:
+    """Environment for benchmark workers: no credentials, exports, span sampling, response cache or CrewAI telemetry."""
+    excluded = ("OTLP_CAPTURE_DIR", "TELEMETRY_MODE", "TELEMETRY_SAMPLE_RATIO", "LLM_CACHE")
+    env = {key: value for key, value in os.environ.items() if key not in excluded}
+    env.update(
+        OPENAI_API_KEY="sk-benchmark",
+        TRACELOOP_TELEMETRY="false",
+        TRACELOOP_CONSOLE_EXPORTER_ENABLED="false",
+        CREWAI_DISABLE_TELEMETRY="true",
+        CREWAI_TRACING_ENABLED="false",
+        GALILEO_AGENTS_CACHE_DIR=cache_dir,
+    )
+    return env
+
+
+def run_in_worker(script: str, args: list[str], python_options: tuple = ()) -> tuple[dict, str]:
+    """Run a benchmark script's --worker mode in a clean subprocess and return (result, stderr)."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        # CrewAI's console output interleaves with stdout, so the result goes to a file
+        result_file = Path(work_dir) / "result.json"
+        command = [sys.executable, *python_options, script, *args, "--worker", str(result_file)]
+        env = worker_env(str(Path(work_dir) / "cache"))
+        completed = subprocess.run(
+            command, env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=False
+        )
+        if completed.returncode != 0 or not result_file.exists():
+            raise RuntimeError(f"Benchmark worker {' '.join(args)} failed:\n{completed.stderr[-4000:]}")
+        return json.loads(result_file.read_text()), completed.stderr
+
+
+def run_agent(name: str, runs: int, latency_ms: float) -> dict:
+    """Run the worker for one agent in a clean subprocess."""
+    result, _ = run_in_worker(__file__, [name, "--runs", str(runs), "--latency-ms", str(latency_ms)])
+    return result
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    """Return a description of every metric that regressed past the tolerance."""
+    regressions = []
+    for name, metrics in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        for metric in TIMED_METRICS:
+            if metric in baseline and metrics[metric] > baseline[metric] * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {metrics[metric]} > {baseline[metric]} (+{tolerance:.0%})")
+        if "spans" in baseline and metrics["spans"] != baseline["spans"]:
+            regressions.append(f"{name}.spans: {metrics['spans']} != {baseline['spans']}")
+    return regressions
+
+
+def main():
+    from shared.registry import AGENTS
+
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for all agents")
+    parser.add_argument("agents", nargs="*", help=f"Agents to run: {', '.join(AGENTS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=10, help="Measured runs per agent (default: 10)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Injected latency per fake model call")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a metric regressed past the baselines")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown for --check (default: 0.5)")
+    parser.add_argument("--update", action="store_true", help=f"Write the results to {BASELINES.name}")
+    parser.add_argument("--worker", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    names = args.agents or list(AGENTS)
+    unknown = [name for name in names if name not in AGENTS]
+    if unknown:
+        parser.error(f"Unknown agent(s): {', '.join(unknown)}")
+
+    if args.worker:
+        result = run_worker(names[0], args.runs, args.latency_ms / 1000)
+        Path(args.worker).write_text(json.dumps(result))
+        return
+
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    results = {}
+    print(f"{'agent':<12} {'startup s':>10} {'wall s':>8} {'cpu s':>8} {'peak KiB':>10} {'spans':>6}")
+    for name in names:
+        results[name] = metrics = run_agent(name, args.runs, args.latency_ms)
+        print(
+            f"{name:<12} {metrics['startup_s']:>10.3f} {metrics['wall_s']:>8.3f} {metrics['cpu_s']:>8.3f} "
+            f"{metrics['alloc_peak_kib']:>10.1f} {metrics['spans']:>6}"
+        )
+
+    if args.update:
+        BASELINES.write_text(json.dumps({**baselines, **results}, indent=2) + "\n")
+        print(f"Baselines written to {BASELINES}")
+        return
+
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
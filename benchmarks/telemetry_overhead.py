@@ -0,0 +1,66 @@
+"""Telemetry overhead benchmark - per-span cost of each shared.telemetry mode.
+
+Spans are exported to a stub exporter that sleeps to simulate the collector round trip,
+so the numbers show how much of that latency each mode puts on the thread ending spans.
+
+    uv run benchmarks/telemetry_overhead.py --spans 500 --export-latency-ms 20
+"""
+
+import argparse
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from shared.telemetry import MODES, create_span_processor
+
+
+class SlowExporter(SpanExporter):
+    """Exporter that drops spans after a fixed delay per export call."""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.exported = 0
+
+    def export(self, spans) -> SpanExportResult:
+        time.sleep(self.latency_s)
+        self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def measure(mode: str, spans: int, latency_s: float) -> dict:
+    exporter = SlowExporter(latency_s)
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(create_span_processor(exporter, mode))
+    tracer = provider.get_tracer("benchmark")
+    attributes = {"gen_ai.request.model": "gpt-4o-mini", "traceloop.entity.input": "x" * 512}
+
+    start = time.perf_counter()
+    for i in range(spans):
+        with tracer.start_as_current_span(f"span-{i % 10}", attributes=attributes):
+            pass
+    elapsed = time.perf_counter() - start
+
+    flush_start = time.perf_counter()
+    provider.shutdown()
+    flush = time.perf_counter() - flush_start
+    return {"mode": mode, "per_span_us": elapsed / spans * 1e6, "flush_s": flush, "exported": exporter.exported}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-span overhead of each telemetry mode")
+    parser.add_argument("--spans", type=int, default=500, help="Spans per mode (default: 500)")
+    parser.add_argument("--export-latency-ms", type=float, default=20, help="Simulated export round trip (default: 20)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'per-span us':>12} {'exit flush s':>13} {'exported':>9}")
+    for mode in MODES:
+        result = measure(mode, args.spans, args.export_latency_ms / 1000)
+        print(f"{mode:<12} {result['per_span_us']:>12.1f} {result['flush_s']:>13.3f} {result['exported']:>9}")
+
+
+if __name__ == "__main__":
+    main()
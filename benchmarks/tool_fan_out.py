@@ -0,0 +1,114 @@
+"""Tool fan-out benchmark - latency of one model turn that asks for several tool calls.
+
+Runs the weather and RAG agents offline with a scripted model turn of ``--calls``
+independent tool calls (``weather_tool`` for different cities, ``retrieve_documents`` for
+different queries), then the final answer. Each tool call waits ``--latency-ms``: the
+offline weather provider sleeps for it, and so does the fake embedding of each retrieval
+query. The model itself answers instantly, so the wall time is the tool turn:
+
+- ``serial``: tool concurrency 1, one call after another
+- ``parallel``: up to ``--concurrency`` calls at once under ``invoke``, sync tools on
+  LangGraph's thread pool
+- ``async``: the same under ``ainvoke``, async tools on the event loop
+
+    uv run benchmarks/tool_fan_out.py --calls 8 --concurrency 8 --latency-ms 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from suite import run_in_worker
+
+TOOL_CALLS = {
+    "weather": lambda run, i: ("weather_tool", {"city": f"City {run}-{i}"}),
+    "rag": lambda run, i: ("retrieve_documents", {"query": f"How do vector embeddings work? ({run}-{i})"}),
+}
+
+
+def run_worker(calls: int, concurrency: int, runs: int, latency_s: float) -> dict:
+    # The provider reads this when the weather agent first looks up a city
+    os.environ["WEATHER_MOCK_LATENCY_MS"] = str(latency_s * 1000)
+
+    from fakes import FakeEmbeddings, ScriptedChatModel
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    from shared.models import set_model_overrides
+    from shared.registry import get_factory
+    from shared.telemetry import init_telemetry
+
+    turn = {"run": 0}
+
+    def chat(model, **kwargs):
+        # Fresh arguments every run, so no call is served from a tool cache
+        make_call = TOOL_CALLS[turn["agent"]]
+        return ScriptedChatModel(script=[[make_call(turn["run"], i) for i in range(calls)], "Done."])
+
+    set_model_overrides(chat=chat, embeddings=lambda model: FakeEmbeddings(latency_s=latency_s))
+    init_telemetry("benchmark", exporter=InMemorySpanExporter())
+    configs = {
+        "serial": (1, False),
+        "parallel": (concurrency, False),
+        "async": (concurrency, True),
+    }
+
+    results = {}
+    for name in TOOL_CALLS:
+        turn["agent"] = name
+        create_agent = get_factory(name)
+        for label, (cap, use_async) in configs.items():
+            wall = []
+            for run in range(runs + 1):  # the first run warms up
+                turn["run"] = f"{label}{run}"
+                agent = create_agent(tool_concurrency=cap)
+                query = {"messages": [("user", "Look these up")]}
+                start = time.perf_counter()
+                if use_async:
+                    asyncio.run(agent.ainvoke(query))
+                else:
+                    agent.invoke(query)
+                wall.append(time.perf_counter() - start)
+            results[f"{name} {label}"] = round(statistics.median(wall[1:]), 4)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of a multi-call tool turn, serial vs parallel vs async")
+    parser.add_argument("--calls", type=int, default=8, help="Tool calls in the model turn (default: 8)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Tool calls at once when parallel (default: 8)")
+    parser.add_argument("--runs", type=int, default=3, help="Measured runs per configuration (default: 3)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Latency per tool call (default: 200)")
+    parser.add_argument("--worker", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.calls, args.concurrency, args.runs, args.latency_ms / 1000)
+        Path(args.worker).write_text(json.dumps(result))
+        return
+
+    options = [
+        "--calls",
+        str(args.calls),
+        "--concurrency",
+        str(args.concurrency),
+        "--runs",
+        str(args.runs),
+        "--latency-ms",
+        str(args.latency_ms),
+    ]
+    results, _ = run_in_worker(__file__, options)
+    print(f"{args.calls} tool calls per turn, {args.latency_ms:g} ms each")
+    print(f"{'turn':<20} {'wall s':>8} {'saved ms':>9}")
+    for name in TOOL_CALLS:
+        serial = results[f"{name} serial"]
+        for label in ("serial", "parallel", "async"):
+            wall = results[f"{name} {label}"]
+            print(f"{f'{name} {label}':<20} {wall:>8.3f} {(serial - wall) * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
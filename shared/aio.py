@@ -0,0 +1,59 @@
+"""Run coroutines from synchronous code on one shared background event loop.
+
+Async clients (pooled HTTP connections, semaphores, in-flight request maps) are bound to
+the loop they run on, so sync tool functions submit their coroutines to this long-lived
+loop instead of starting a fresh one with asyncio.run on every call. Async tools running
+on another loop (servers, ``ainvoke``) await them there with run_async, without tying up
+a thread.
+
+Coroutines run on the background loop under the caller's OpenTelemetry context, so spans
+they start nest under the calling tool's span.
+"""
+
+import asyncio
+import threading
+
+from opentelemetry import context
+
+_loop = None
+_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared loop, starting its daemon thread on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="shared-aio-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+async def _in_context(coro, ctx):
+    token = context.attach(ctx)
+    try:
+        return await coro
+    finally:
+        context.detach(token)
+
+
+def run_sync(coro, timeout: float | None = None):
+    """Run a coroutine on the background loop and block until it finishes."""
+    loop = background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync called from the background loop itself; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(_in_context(coro, context.get_current()), loop).result(timeout)
+
+
+async def run_async(coro):
+    """Await a coroutine on the background loop from any event loop."""
+    loop = background_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_in_context(coro, context.get_current()), loop))
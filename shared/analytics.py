@@ -0,0 +1,268 @@
+"""Latency and token analytics over captured OTLP .bin files.
+
+Spans are decoded straight into columnar NumPy arrays (integer-coded strings, int64
+durations and token counts), and percentiles are computed per group with one sort over
+the whole column instead of per-span Python objects.
+
+    uv run shared/analytics.py agents-langgraph/rag/otlp_trace agents-crewai/research/otlp_trace
+"""
+
+import argparse
+import glob
+import json
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from shared.otel import parse_trace
+
+KINDS = ("workflow", "agent", "task", "tool", "llm", "retriever", "other")
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+PERCENTILES = (50, 95, 99)
+
+_INPUT_TOKEN_KEYS = {"gen_ai.usage.input_tokens", "gen_ai.usage.prompt_tokens"}
+_OUTPUT_TOKEN_KEYS = {"gen_ai.usage.output_tokens", "gen_ai.usage.completion_tokens"}
+_MODEL_KEYS = {"gen_ai.request.model", "gen_ai.response.model"}
+_TOOL_NAME_KEYS = {"tool.name", "gen_ai.tool.name"}
+_COLUMN_DTYPES = {
+    "agent": np.int32,
+    "kind": np.int8,
+    "name": np.int32,
+    "target": np.int32,
+    "root": bool,
+    "duration_ns": np.int64,
+    "input_tokens": np.int64,
+    "output_tokens": np.int64,
+}
+
+
+class StringTable:
+    """Interns strings to dense integer codes."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _span_kind(traceloop_kind, llm, retriever, operation, name):
+    if llm:
+        return "llm"
+    if retriever or "retriever" in name.lower():
+        return "retriever"
+    if operation == "execute_tool":
+        return "tool"
+    if operation == "invoke_agent":
+        return "agent"
+    return traceloop_kind if traceloop_kind in KIND_CODES else "other"
+
+
+def decode_file(path: str) -> dict:
+    """Decode one .bin file into column arrays plus the string tables they index."""
+    with open(path, "rb") as f:
+        request = parse_trace(f.read())
+
+    agents, names, targets = StringTable(), StringTable(), StringTable()
+    agent_col, kind_col, name_col, target_col, root_col = array("i"), array("b"), array("i"), array("i"), array("b")
+    duration_col, input_col, output_col = array("q"), array("q"), array("q")
+
+    for resource_spans in request.resource_spans:
+        agent = "unknown"
+        for kv in resource_spans.resource.attributes:
+            if kv.key == "service.name":
+                agent = kv.value.string_value
+        agent_code = agents.code(agent)
+        for scope_spans in resource_spans.scope_spans:
+            for span in scope_spans.spans:
+                traceloop_kind = operation = model = tool_name = None
+                llm = retriever = False
+                input_tokens = output_tokens = 0
+                for kv in span.attributes:
+                    key = kv.key
+                    if key == "traceloop.span.kind":
+                        traceloop_kind = kv.value.string_value
+                    elif key == "llm.request.type":
+                        llm = True
+                    elif key in _MODEL_KEYS:
+                        llm = True
+                        model = model or kv.value.string_value
+                    elif key in _INPUT_TOKEN_KEYS:
+                        input_tokens = kv.value.int_value
+                    elif key in _OUTPUT_TOKEN_KEYS:
+                        output_tokens = kv.value.int_value
+                    elif key == "gen_ai.operation.name":
+                        operation = kv.value.string_value
+                    elif key in _TOOL_NAME_KEYS:
+                        tool_name = kv.value.string_value
+                    elif key == "openinference.span.kind":
+                        retriever = kv.value.string_value.lower() == "retriever"
+                    elif key == "db.operation":
+                        retriever = kv.value.string_value in ("query", "search")
+                kind = _span_kind(traceloop_kind, llm, retriever, operation, span.name)
+                if kind == "llm":
+                    target = model or span.name
+                elif kind == "tool":
+                    target = tool_name or span.name.removesuffix(".tool")
+                else:
+                    target = span.name
+                agent_col.append(agent_code)
+                kind_col.append(KIND_CODES[kind])
+                name_col.append(names.code(span.name))
+                target_col.append(targets.code(target))
+                root_col.append(0 if span.parent_span_id else 1)
+                duration_col.append(span.end_time_unix_nano - span.start_time_unix_nano)
+                input_col.append(input_tokens)
+                output_col.append(output_tokens)
+
+    return {
+        "agents": agents.values,
+        "names": names.values,
+        "targets": targets.values,
+        "agent": np.frombuffer(agent_col, dtype=np.int32),
+        "kind": np.frombuffer(kind_col, dtype=np.int8),
+        "name": np.frombuffer(name_col, dtype=np.int32),
+        "target": np.frombuffer(target_col, dtype=np.int32),
+        "root": np.frombuffer(root_col, dtype=np.int8).astype(bool),
+        "duration_ns": np.frombuffer(duration_col, dtype=np.int64),
+        "input_tokens": np.frombuffer(input_col, dtype=np.int64),
+        "output_tokens": np.frombuffer(output_col, dtype=np.int64),
+    }
+
+
+def _remap(codes: np.ndarray, local_values: list, table: StringTable) -> np.ndarray:
+    lookup = np.array([table.code(value) for value in local_values], dtype=np.int32)
+    return lookup[codes] if len(codes) else codes
+
+
+def load_columns(files: list[str], workers: int | None = None) -> dict:
+    """Decode files in parallel and concatenate them into one set of columns."""
+    agents, names, targets = StringTable(), StringTable(), StringTable()
+    parts = {key: [] for key in _COLUMN_DTYPES}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(decode_file, files, chunksize=16):
+            parts["agent"].append(_remap(part["agent"], part["agents"], agents))
+            parts["name"].append(_remap(part["name"], part["names"], names))
+            parts["target"].append(_remap(part["target"], part["targets"], targets))
+            for key in ("kind", "root", "duration_ns", "input_tokens", "output_tokens"):
+                parts[key].append(part[key])
+    columns = {
+        key: np.concatenate(values) if values else np.empty(0, dtype=_COLUMN_DTYPES[key])
+        for key, values in parts.items()
+    }
+    columns["agents"], columns["names"], columns["targets"] = agents.values, names.values, targets.values
+    return columns
+
+
+def group_percentiles(groups: np.ndarray, values: np.ndarray, percentiles=PERCENTILES):
+    """Return (group codes, counts, percentile matrix) with one lexsort over all rows.
+
+    Percentiles use linear interpolation between closest ranks, matching np.percentile.
+    """
+    if not len(groups):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, len(percentiles)))
+    order = np.lexsort((values, groups))
+    sorted_groups, sorted_values = groups[order], values[order].astype(np.float64)
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_groups)])
+    result = np.empty((len(starts), len(percentiles)))
+    for i, q in enumerate(percentiles):
+        rank = starts + (counts - 1) * (q / 100)
+        low = np.floor(rank).astype(np.int64)
+        high = np.ceil(rank).astype(np.int64)
+        result[:, i] = sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+    return sorted_groups[starts], counts, result
+
+
+def summarize(columns: dict) -> dict:
+    """Latency percentiles (ms) and token totals per agent, tool, LLM model and retriever."""
+    kind, duration = columns["kind"], columns["duration_ns"]
+    sections = {
+        "agents": (columns["root"], columns["agent"], columns["agents"]),
+        "tools": (kind == KIND_CODES["tool"], columns["target"], columns["targets"]),
+        "llm": (kind == KIND_CODES["llm"], columns["target"], columns["targets"]),
+        "retrievers": (kind == KIND_CODES["retriever"], columns["target"], columns["targets"]),
+    }
+    llm_mask = kind == KIND_CODES["llm"]
+    summary = {}
+    for section, (mask, codes, labels) in sections.items():
+        group_codes, counts, latencies = group_percentiles(codes[mask], duration[mask])
+        # Token totals are attributed to the same groups (LLM spans only, so nothing is double counted)
+        token_mask = llm_mask if section in ("agents", "llm") else np.zeros_like(llm_mask)
+        input_totals = np.bincount(
+            codes[token_mask], weights=columns["input_tokens"][token_mask], minlength=len(labels)
+        )
+        output_totals = np.bincount(
+            codes[token_mask], weights=columns["output_tokens"][token_mask], minlength=len(labels)
+        )
+        summary[section] = [
+            {
+                "name": labels[code],
+                "count": int(count),
+                **{f"p{q}_ms": float(latency[i]) / 1e6 for i, q in enumerate(PERCENTILES)},
+                "input_tokens": int(input_totals[code]),
+                "output_tokens": int(output_totals[code]),
+            }
+            for code, count, latency in zip(group_codes, counts, latencies, strict=True)
+        ]
+    summary["totals"] = {
+        "spans": len(duration),
+        "input_tokens": int(columns["input_tokens"][llm_mask].sum()),
+        "output_tokens": int(columns["output_tokens"][llm_mask].sum()),
+    }
+    return summary
+
+
+def format_summary(summary: dict) -> str:
+    lines = []
+    for section, title in (
+        ("agents", "Agents"),
+        ("tools", "Tools"),
+        ("llm", "LLM calls"),
+        ("retrievers", "Retrievers"),
+    ):
+        rows = sorted(summary[section], key=lambda row: row["p95_ms"], reverse=True)
+        if not rows:
+            continue
+        lines.append(f"{title}:")
+        lines.append(
+            f"  {'name':<40} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'in tok':>9} {'out tok':>9}"
+        )
+        for row in rows:
+            lines.append(
+                f"  {row['name'][:40]:<40} {row['count']:>7} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f} "
+                f"{row['p99_ms']:>10.1f} {row['input_tokens']:>9} {row['output_tokens']:>9}"
+            )
+        lines.append("")
+    totals = summary["totals"]
+    lines.append(
+        f"Spans: {totals['spans']}, input tokens: {totals['input_tokens']}, output tokens: {totals['output_tokens']}"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and token analytics over captured OTLP .bin files")
+    parser.add_argument("directories", nargs="+", help="Directories searched recursively for .bin files")
+    parser.add_argument("--workers", type=int, default=None, help="Decode processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    files = sorted(
+        file
+        for directory in args.directories
+        for file in glob.glob(os.path.join(directory, "**", "*.bin"), recursive=True)
+    )
+    summary = summarize(load_columns(files, workers=args.workers))
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Local OTLP span capture to rotating .bin segments with a trace-id index.
+
+Each segment is a concatenation of serialized ExportTraceServiceRequest batches. Protobuf
+merges concatenated messages, so every segment is itself a valid ExportTraceServiceRequest
+and can be replayed as-is with shared/otel.py. Each segment has a sidecar .jsonl index
+recording, per batch, its byte range, time range and trace ids, so looking up one trace
+only reads the batches that hold it. With ``max_segments`` the oldest segments are
+deleted together with their indexes, so a long-running capture stays bounded.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+# Single index of captures written before indexes were kept per segment; still read
+INDEX_FILE = "index.jsonl"
+SEGMENT_PREFIX = "traces_"
+
+
+def index_name(segment: str) -> str:
+    """Name of a segment's sidecar index (``traces_*.bin`` -> ``traces_*.jsonl``)."""
+    return os.path.splitext(segment)[0] + ".jsonl"
+
+
+def segment_names(directory: str) -> list[str]:
+    """Captured segments, oldest first (their names start with the creation time)."""
+    return sorted(name for name in os.listdir(directory) if name.startswith(SEGMENT_PREFIX) and name.endswith(".bin"))
+
+
+class FileSpanExporter(SpanExporter):
+    """Span exporter that appends OTLP batches to rotating segment files.
+
+    Each batch opens the segment and its index, appends and closes them, so no file stays
+    open between exports and nothing is left to flush.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        max_segment_seconds: float = 300,
+        max_segments: int = 0,
+    ):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._segment_name = None
+        self._segment_bytes = 0
+        self._segment_opened = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self):
+        self._segment_name = datetime.now().strftime(f"{SEGMENT_PREFIX}%Y%m%d_%H%M%S_%f.bin")
+        self._segment_bytes = 0
+        self._segment_opened = time.monotonic()
+        if self.max_segments > 0:
+            self._prune(self.max_segments - 1)
+
+    def _prune(self, keep: int):
+        """Delete all but the newest ``keep`` segments, each with its index."""
+        segments = segment_names(self.directory)
+        for segment in segments[: max(len(segments) - keep, 0)]:
+            for name in (segment, index_name(segment)):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.directory, name))
+
+    def _needs_rotation(self, size: int) -> bool:
+        if self._segment_name is None:
+            return True
+        if self._segment_bytes and self._segment_bytes + size > self.max_segment_bytes:
+            return True
+        return time.monotonic() - self._segment_opened > self.max_segment_seconds
+
+    def export(self, spans) -> SpanExportResult:
+        if not spans:
+            return SpanExportResult.SUCCESS
+        body = encode_spans(spans).SerializeToString()
+        entry = {
+            "offset": 0,
+            "length": len(body),
+            "start_ns": min(span.start_time or 0 for span in spans),
+            "end_ns": max(span.end_time or 0 for span in spans),
+            "trace_ids": sorted({format(span.context.trace_id, "032x") for span in spans}),
+        }
+        try:
+            with self._lock:
+                if self._needs_rotation(len(body)):
+                    self._rotate()
+                entry["segment"] = self._segment_name
+                entry["offset"] = self._segment_bytes
+                with open(os.path.join(self.directory, self._segment_name), "ab") as segment:
+                    segment.write(body)
+                self._segment_bytes += len(body)
+                # The index is written after the data so an entry never points past the end of a segment
+                with open(os.path.join(self.directory, index_name(self._segment_name)), "a", encoding="utf-8") as index:
+                    index.write(json.dumps(entry) + "\n")
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+    def shutdown(self) -> None:
+        pass
+
+
+def enable_capture(directory: str, **kwargs) -> FileSpanExporter | None:
+    """Add a background file capture exporter to the global tracer provider.
+
+    Spans are handed to a BatchSpanProcessor, so encoding and disk writes happen off the
+    agent's request thread.
+    """
+    tracer_provider = trace.get_tracer_provider()
+    if not hasattr(tracer_provider, "add_span_processor"):
+        return None
+    exporter = FileSpanExporter(directory, **kwargs)
+    tracer_provider.add_span_processor(BatchSpanProcessor(exporter))
+    return exporter
+
+
+def iter_index(directory: str, trace_id: str | None = None, start_ns: int | None = None, end_ns: int | None = None):
+    """Yield index entries matching a trace id and/or overlapping a time range."""
+    if not os.path.isdir(directory):
+        return
+    segments = segment_names(directory)
+    paths = [os.path.join(directory, name) for name in (INDEX_FILE, *map(index_name, segments))]
+    present = set(segments)
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            yield from _matching_entries(f, present, trace_id, start_ns, end_ns)
+
+
+def _matching_entries(lines, segments: set, trace_id: str | None, start_ns: int | None, end_ns: int | None):
+    for line in lines:
+        # Most lines don't hold the trace, so skip them before parsing
+        if not line.strip() or (trace_id is not None and trace_id not in line):
+            continue
+        entry = json.loads(line)
+        # The legacy index can outlive segments deleted by max_segments
+        if entry["segment"] not in segments:
+            continue
+        if trace_id is not None and trace_id not in entry["trace_ids"]:
+            continue
+        if start_ns is not None and entry["end_ns"] < start_ns:
+            continue
+        if end_ns is not None and entry["start_ns"] > end_ns:
+            continue
+        yield entry
+
+
+def read_entry(directory: str, entry: dict) -> ExportTraceServiceRequest:
+    """Read one indexed batch without touching the rest of its segment."""
+    with open(os.path.join(directory, entry["segment"]), "rb") as f:
+        f.seek(entry["offset"])
+        body = f.read(entry["length"])
+    request = ExportTraceServiceRequest()
+    request.ParseFromString(body)
+    return request
+
+
+def find_trace(directory: str, trace_id: str) -> ExportTraceServiceRequest:
+    """Collect all captured spans of one trace into a single ExportTraceServiceRequest."""
+    trace_id = trace_id.lower()
+    trace_id_bytes = bytes.fromhex(trace_id)
+    result = ExportTraceServiceRequest()
+    for entry in iter_index(directory, trace_id=trace_id):
+        for resource_spans in read_entry(directory, entry).resource_spans:
+            out_resource_spans = None
+            for scope_spans in resource_spans.scope_spans:
+                spans = [span for span in scope_spans.spans if span.trace_id == trace_id_bytes]
+                if not spans:
+                    continue
+                if out_resource_spans is None:
+                    out_resource_spans = result.resource_spans.add()
+                    out_resource_spans.resource.CopyFrom(resource_spans.resource)
+                    out_resource_spans.schema_url = resource_spans.schema_url
+                out_scope_spans = out_resource_spans.scope_spans.add()
+                out_scope_spans.scope.CopyFrom(scope_spans.scope)
+                out_scope_spans.schema_url = scope_spans.schema_url
+                out_scope_spans.spans.extend(spans)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up captured OTLP traces")
+    parser.add_argument("--directory", required=True, help="Capture directory (OTLP_CAPTURE_DIR)")
+    parser.add_argument("--trace-id", help="Hex trace id to extract")
+    parser.add_argument("--output", help="Write the extracted trace to this .bin file")
+    args = parser.parse_args()
+
+    if not args.trace_id:
+        trace_ids = set()
+        for entry in iter_index(args.directory):
+            trace_ids.update(entry["trace_ids"])
+        for trace_id in sorted(trace_ids):
+            print(trace_id)
+        return
+
+    request = find_trace(args.directory, args.trace_id)
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(request.SerializeToString())
+        print(f"Wrote {args.output}")
+        return
+    for resource_spans in request.resource_spans:
+        for scope_spans in resource_spans.scope_spans:
+            for span in scope_spans.spans:
+                duration_ms = (span.end_time_unix_nano - span.start_time_unix_nano) / 1e6
+                print(f"{span.span_id.hex()} parent={span.parent_span_id.hex() or '-'} {span.name} {duration_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""Multi-turn conversation memory for the LangGraph agents.
+
+Conversations are LangGraph checkpoints keyed by thread id and stored by SqliteSaver in
+one local SQLite file. Serialized values are zlib-compressed, unchanged channels are
+stored once and shared by later checkpoints, and only the newest ``keep_last``
+checkpoints of a thread are kept. That is all a conversation needs to continue.
+
+Without a policy the message history, and with it every prompt, grows with each turn.
+context_middleware bounds it two ways:
+
+- rolling summarization: once the history passes CONTEXT_SUMMARY_TOKENS, the older
+  messages (including any earlier summary) are replaced by a summary, keeping the last
+  CONTEXT_KEEP_MESSAGES, so the stored history stays bounded too
+- a token-budget trim: each model call sees at most CONTEXT_MAX_TOKENS of the most
+  recent messages (besides the system prompt), starting at a user turn; the stored
+  history is left alone
+
+Agents only get the checkpointer and the policy when created with a checkpointer, so
+single-shot runs are unchanged:
+
+    uv run agents-langgraph/weather/agent.py --thread trip "Weather in Paris?"
+    uv run agents-langgraph/weather/agent.py --thread trip "And tomorrow?"
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+
+from langchain.agents.middleware import AgentMiddleware, SummarizationMiddleware
+from langchain_core.messages import trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from opentelemetry import trace
+
+from shared.lazy import load_env, once
+from shared.paths import CACHE_DIR
+
+# Serialized values at least this large are compressed
+COMPRESS_MIN_BYTES = 256
+_ZLIB = "+zlib"
+
+
+class SqliteSaver(BaseCheckpointSaver):
+    """LangGraph checkpointer in a local SQLite file, keeping the newest checkpoints per thread."""
+
+    def __init__(self, path: str | Path, keep_last: int = 10, *, serde=None):
+        super().__init__(serde=serde)
+        self.path = Path(path)
+        self.keep_last = keep_last
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "thread_id TEXT NOT NULL, ns TEXT NOT NULL, id TEXT NOT NULL, parent_id TEXT, "
+            "type TEXT NOT NULL, checkpoint BLOB NOT NULL, metadata_type TEXT NOT NULL, metadata BLOB NOT NULL, "
+            "PRIMARY KEY (thread_id, ns, id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "thread_id TEXT NOT NULL, ns TEXT NOT NULL, channel TEXT NOT NULL, version TEXT NOT NULL, "
+            "type TEXT NOT NULL, value BLOB NOT NULL, "
+            "PRIMARY KEY (thread_id, ns, channel, version)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS writes ("
+            "thread_id TEXT NOT NULL, ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, task_id TEXT NOT NULL, "
+            "idx INTEGER NOT NULL, channel TEXT NOT NULL, type TEXT NOT NULL, value BLOB NOT NULL, task_path TEXT, "
+            "PRIMARY KEY (thread_id, ns, checkpoint_id, task_id, idx)) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+
+    def _dump(self, value) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) >= COMPRESS_MIN_BYTES:
+            return type_ + _ZLIB, zlib.compress(data)
+        return type_, data
+
+    def _load(self, type_: str, data: bytes):
+        if type_.endswith(_ZLIB):
+            type_, data = type_[: -len(_ZLIB)], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    def _tuple(self, thread_id: str, ns: str, row) -> CheckpointTuple:
+        """Assemble a CheckpointTuple from a checkpoints row; call with the lock held."""
+        checkpoint_id, parent_id, type_, data, metadata_type, metadata = row
+        checkpoint = self._load(type_, data)
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self._conn.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ? AND ns = ? AND channel = ? AND version = ?",
+                (thread_id, ns, channel, str(version)),
+            ).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self._load(*blob)
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? AND ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+
+        def config(checkpoint_id):
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}}
+
+        return CheckpointTuple(
+            config=config(checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self._load(metadata_type, metadata),
+            parent_config=config(parent_id) if parent_id else None,
+            pending_writes=[(task_id, channel, self._load(type_, value)) for task_id, channel, type_, value in writes],
+        )
+
+    def get_tuple(self, config) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "id, parent_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND ns = ? AND id = ?",
+                    (thread_id, ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND ns = ? ORDER BY id DESC LIMIT 1",
+                    (thread_id, ns),
+                ).fetchone()
+            return self._tuple(thread_id, ns, row) if row is not None else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query = "SELECT thread_id, ns, id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+        conditions, params = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                conditions.append("ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            conditions.append("id < ?")
+            params.append(before_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY thread_id, ns, id DESC"
+        results = []
+        with self._lock:
+            for thread_id, ns, *row in self._conn.execute(query, params).fetchall():
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self._load(row[4], row[5])
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                results.append(self._tuple(thread_id, ns, row))
+        yield from results
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"]["checkpoint_ns"]
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, data = self._dump(values[channel]) if channel in values else ("empty", b"")
+            blobs.append((thread_id, ns, channel, str(version), type_, data))
+        row = (
+            thread_id,
+            ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            *self._dump(checkpoint),
+            *self._dump(get_checkpoint_metadata(config, metadata)),
+        )
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            self._conn.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+            self._prune(thread_id, ns)
+            self._conn.commit()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def _prune(self, thread_id: str, ns: str):
+        """Drop all but the newest keep_last checkpoints, their writes and unreferenced blobs."""
+        rows = self._conn.execute(
+            "SELECT id, type, checkpoint FROM checkpoints WHERE thread_id = ? AND ns = ? ORDER BY id DESC",
+            (thread_id, ns),
+        ).fetchall()
+        if len(rows) <= self.keep_last:
+            return
+        dropped = [(thread_id, ns, checkpoint_id) for checkpoint_id, _, _ in rows[self.keep_last :]]
+        self._conn.executemany("DELETE FROM checkpoints WHERE thread_id = ? AND ns = ? AND id = ?", dropped)
+        self._conn.executemany("DELETE FROM writes WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?", dropped)
+        referenced = set()
+        for _, type_, data in rows[: self.keep_last]:
+            versions = self._load(type_, data)["channel_versions"]
+            referenced.update((channel, str(version)) for channel, version in versions.items())
+        stored = self._conn.execute(
+            "SELECT channel, version FROM blobs WHERE thread_id = ? AND ns = ?", (thread_id, ns)
+        ).fetchall()
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND ns = ? AND channel = ? AND version = ?",
+            [(thread_id, ns, channel, version) for channel, version in stored if (channel, version) not in referenced],
+        )
+
+    def put_writes(self, config, writes, task_id: str, task_path: str = ""):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        replace, keep = [], []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            # Special writes (errors, interrupts) replace earlier ones; regular writes are written once
+            (replace if idx < 0 else keep).append(
+                (thread_id, ns, checkpoint_id, task_id, idx, channel, *self._dump(value), task_path)
+            )
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", replace)
+            self._conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", keep)
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str):
+        with self._lock:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+    async def aget_tuple(self, config) -> CheckpointTuple | None:
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id: str, task_path: str = ""):
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str):
+        return self.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel) -> str:
+        # Same scheme as LangGraph's InMemorySaver: the counter, plus a random part so
+        # versions written by different forks of a thread never collide
+        current = 0 if current is None else current if isinstance(current, int) else int(current.split(".")[0])
+        return f"{current + 1:032}.{random.random():016}"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ContextTrimMiddleware(AgentMiddleware):
+    """Sends the model only the most recent messages that fit max_tokens, starting at a user turn."""
+
+    def __init__(self, max_tokens: int):
+        super().__init__()
+        self.max_tokens = max_tokens
+
+    def _trim(self, request):
+        messages = trim_messages(
+            request.messages,
+            max_tokens=self.max_tokens,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+        )
+        if not messages:
+            # The current turn alone is over budget; send it whole rather than cut it
+            starts = [i for i, message in enumerate(request.messages) if message.type == "human"]
+            messages = request.messages[starts[-1] if starts else 0 :]
+        span = trace.get_current_span()
+        span.set_attribute("agent.context.messages", len(request.messages))
+        span.set_attribute("agent.context.sent_messages", len(messages))
+        span.set_attribute("agent.context.sent_tokens", count_tokens_approximately(messages))
+        return request.override(messages=messages)
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._trim(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._trim(request))
+
+
+def context_middleware(model) -> list:
+    """The context policy from the CONTEXT_* variables; model writes the summaries."""
+    middleware = []
+    summary_tokens = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "4000"))
+    if summary_tokens:
+        keep = int(os.getenv("CONTEXT_KEEP_MESSAGES", "6"))
+        middleware.append(SummarizationMiddleware(model, trigger=("tokens", summary_tokens), keep=("messages", keep)))
+    max_tokens = int(os.getenv("CONTEXT_MAX_TOKENS", "8000"))
+    if max_tokens:
+        middleware.append(ContextTrimMiddleware(max_tokens))
+    return middleware
+
+
+def conversation_options(model, checkpointer=None, middleware: list = ()) -> dict:
+    """create_agent keyword arguments: middleware, plus the checkpointer and context policy if given one."""
+    if checkpointer is None:
+        return {"middleware": list(middleware)}
+    return {"checkpointer": checkpointer, "middleware": [*middleware, *context_middleware(model)]}
+
+
+def thread_config(thread: str | None) -> dict | None:
+    return {"configurable": {"thread_id": thread}} if thread else None
+
+
+@once
+def get_checkpointer() -> SqliteSaver:
+    """The process-wide conversation store in CACHE_DIR/checkpoints.sqlite."""
+    load_env()
+    return SqliteSaver(CACHE_DIR / "checkpoints.sqlite", keep_last=int(os.getenv("CHECKPOINT_KEEP_LAST", "10")))
@@ -0,0 +1,66 @@
+"""Response cache for CrewAI LLMs, kept apart so shared.llm_cache works without crewai."""
+
+import json
+
+from crewai import BaseLLM
+
+from shared.llm_cache import ResponseCache, message_pairs
+
+
+class CachedLLM(BaseLLM):
+    """CrewAI LLM that serves repeated text completions of the wrapped LLM from a ResponseCache.
+
+    Calls with tools, available functions or a response model always go to the wrapped
+    LLM, since their result may be a tool's output rather than the model's text.
+    """
+
+    def __init__(self, llm: BaseLLM, cache: ResponseCache):
+        super().__init__(model=llm.model, temperature=llm.temperature, stop=list(llm.stop))
+        self.llm = llm
+        self.cache = cache
+        params = {"model": llm.model, "temperature": llm.temperature, "params": getattr(llm, "additional_params", {})}
+        self.params = json.dumps(params, sort_keys=True, default=str)
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        # CrewAI executors set their stop words on the LLM they were given, which is this one
+        self.llm.stop = self.stop
+        cacheable = not (tools or available_functions or response_model)
+        if cacheable:
+            pairs = message_pairs(messages)
+            params = f"{self.params}|stop={sorted(self.stop)}"
+            cached = self.cache.lookup("crewai", params, pairs)
+            if cached is not None:
+                return cached
+        result = self.llm.call(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            from_task=from_task,
+            from_agent=from_agent,
+            response_model=response_model,
+        )
+        if cacheable and isinstance(result, str) and result:
+            self.cache.update("crewai", params, pairs, result)
+        return result
+
+    def supports_function_calling(self) -> bool:
+        return self.llm.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.llm.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.llm.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.llm.get_token_usage_summary()
@@ -0,0 +1,158 @@
+"""Disk-backed embedding cache shared by every embeddings user.
+
+CachedEmbeddings wraps any LangChain embeddings object. Vectors are stored as float32
+blobs in one SQLite file keyed by (model, sha256 of the text). Lookups are batched, so
+an embed_documents call only sends the cache misses to the underlying API. The async
+methods use the store the same way and await the wrapped model's async methods. The
+store is bounded: least recently used entries are evicted once it grows past max_entries.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from shared.paths import CACHE_DIR
+from shared.vectorstore import embedding_model_name
+
+# SQLite's default limit on host parameters per statement is 999 on older builds
+_LOOKUP_CHUNK = 500
+
+
+class EmbeddingStore:
+    """SQLite store of float32 vectors with LRU eviction."""
+
+    def __init__(self, path: str | Path, max_entries: int = 200_000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key BLOB NOT NULL, vector BLOB NOT NULL, accessed INTEGER NOT NULL, "
+            "PRIMARY KEY (model, key)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        """Return the cached vectors for keys, marking them as recently used."""
+        found = {}
+        now = time.time_ns()
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i : i + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})", (model, *chunk)
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET accessed = ? WHERE model = ? AND key = ?",
+                    [(now, model, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, items: list[tuple[bytes, list[float]]]):
+        now = time.time_ns()
+        rows = [(model, key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._count += self._conn.total_changes - before
+            if self._count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE (model, key) IN "
+                    "(SELECT model, key FROM embeddings ORDER BY accessed LIMIT ?)",
+                    (self._count - self.max_entries,),
+                )
+                self._count = self.max_entries
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingStore."""
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore | None = None):
+        self.embeddings = embeddings
+        self.store = store or EmbeddingStore(CACHE_DIR / "embeddings.sqlite")
+        self.model = embedding_model_name(embeddings)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(kind: str, text: str) -> bytes:
+        # Query and document embeddings are kept apart since some models embed them differently
+        return hashlib.sha256(f"{kind}:{text}".encode()).digest()
+
+    def _lookup_documents(self, texts: list[str]) -> tuple[list[bytes], dict, dict]:
+        """(keys, cached vectors by key, texts to embed by key) for an embed_documents call."""
+        keys = [self._key("doc", text) for text in texts]
+        cached = self.store.get_many(self.model, keys)
+        missing = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in cached:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return keys, cached, missing
+
+    def _store_documents(self, keys: list[bytes], cached: dict, missing: dict, vectors) -> list[list[float]]:
+        if missing:
+            self.store.put_many(self.model, list(zip(missing, vectors, strict=True)))
+            cached.update(
+                (key, np.asarray(vector, dtype=np.float32)) for key, vector in zip(missing, vectors, strict=True)
+            )
+        return [cached[key].tolist() for key in keys]
+
+    def _lookup_query(self, key: bytes) -> list[float] | None:
+        cached = self.store.get_many(self.model, [key])
+        if key in cached:
+            self.hits += 1
+            return cached[key].tolist()
+        self.misses += 1
+        return None
+
+    def _store_query(self, key: bytes, vector) -> list[float]:
+        vector = np.asarray(vector, dtype=np.float32)
+        self.store.put_many(self.model, [(key, vector)])
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, cached, missing = self._lookup_documents(texts)
+        vectors = self.embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._store_documents(keys, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key("query", text)
+        cached = self._lookup_query(key)
+        if cached is not None:
+            return cached
+        return self._store_query(key, self.embeddings.embed_query(text))
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, cached, missing = self._lookup_documents(texts)
+        vectors = await self.embeddings.aembed_documents(list(missing.values())) if missing else []
+        return self._store_documents(keys, cached, missing, vectors)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key("query", text)
+        cached = self._lookup_query(key)
+        if cached is not None:
+            return cached
+        return self._store_query(key, await self.embeddings.aembed_query(text))
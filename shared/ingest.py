@@ -0,0 +1,322 @@
+"""Streaming, resumable document ingestion into a vector store.
+
+Files under a directory are read in blocks and split into overlapping chunks as they are
+read. Chunks are embedded in fixed-size batches with at most ``concurrency`` batches in
+flight, and handed to a sink in order as each batch finishes. The pipeline holds only the
+in-flight batches and one read block.
+
+Sinks take ``add(documents, vectors, ids)`` and ``flush()``. The default,
+shared.mmap_store.MmapStoreWriter, appends each batch to files on disk, so memory stays
+flat however large the corpus. FaissSink keeps a whole FAISS index and docstore in memory
+and rewrites it on every flush, so its memory grows with the corpus and its I/O with the
+square of it; use it for small corpora only. A sink must skip ids it already holds,
+because chunks flushed after the last checkpoint are sent again on resume.
+
+Files are walked in sorted path order. After every ``flush_every`` batches the sink is
+flushed and a JSON checkpoint records the last chunk written. An interrupted run started
+again with the same checkpoint skips everything up to that chunk without re-embedding it.
+Files added later that sort after it are picked up by the next run. Files that changed
+before it are not, so re-ingest into a fresh sink after editing the corpus.
+
+    uv run shared/ingest.py ./docs --name handbook [--dtype int8]
+    RAG_INDEX_DIR=.cache/ingest/handbook uv run agents-langgraph/rag/agent.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from shared import logger
+from shared.paths import CACHE_DIR
+from shared.vectorstore import MANIFEST_FILE, embedding_model_name, save_faiss
+
+DEFAULT_PATTERNS = ("*.md", "*.txt")
+# Characters read from a file at a time
+READ_BLOCK = 1 << 16
+# Where a chunk may break early to end on a paragraph, line, sentence or word
+_BREAKS = ("\n\n", "\n", ". ", " ")
+
+
+def iter_files(directory: str | Path, patterns=DEFAULT_PATTERNS, after: tuple = ()):
+    """Files under directory matching any pattern, in sorted path order.
+
+    ``after`` is the parts of a relative path; files and directories sorting before it are
+    skipped without being listed.
+    """
+    root = Path(directory)
+
+    def walk(path: Path, parts: tuple):
+        for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+            entry_parts = (*parts, entry.name)
+            if entry_parts < after[: len(entry_parts)]:
+                continue
+            if entry.is_dir():
+                yield from walk(Path(entry.path), entry_parts)
+            elif entry.is_file() and any(Path(entry.name).match(pattern) for pattern in patterns):
+                yield Path(entry.path), entry_parts
+
+    yield from walk(root, ())
+
+
+def _chunk_end(text: str, start: int, limit: int) -> int:
+    """End of a chunk starting at start: a natural break in its second half, else the limit."""
+    end = start + limit
+    for separator in _BREAKS:
+        cut = text.rfind(separator, start + limit // 2, end)
+        if cut != -1:
+            return cut + len(separator)
+    return end
+
+
+def iter_chunks(path: str | Path, chunk_size: int = 1000, overlap: int = 200):
+    """(character offset, text) chunks of at most chunk_size characters, overlapping by up to overlap."""
+    if not 0 <= overlap < chunk_size // 2:
+        raise ValueError(f"Overlap must be less than half the chunk size, got {overlap} for {chunk_size}")
+    buffer, position, offset, eof = "", 0, 0, False
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            if len(buffer) - position <= chunk_size and not eof:
+                block = f.read(READ_BLOCK)
+                eof = not block
+                buffer, position = buffer[position:] + block, 0
+                continue
+            end = len(buffer) if len(buffer) - position <= chunk_size else _chunk_end(buffer, position, chunk_size)
+            text = buffer[position:end].strip()
+            if text:
+                yield offset, text
+            if end == len(buffer):
+                return
+            step = end - position - overlap
+            position += step
+            offset += step
+
+
+def chunk_id(source: str, index: int) -> str:
+    return hashlib.sha256(f"{source}\0{index}".encode()).hexdigest()
+
+
+class Checkpoint:
+    """The last chunk a sink durably holds, saved as JSON."""
+
+    def __init__(self, path: str | Path, chunk_size: int, overlap: int):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.source = None
+        self.chunk = -1
+        self.chunks = 0
+        if self.path.exists():
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+            if (state["chunk_size"], state["overlap"]) != (chunk_size, overlap):
+                raise ValueError(
+                    f"Checkpoint {self.path} was written with chunk_size={state['chunk_size']}, "
+                    f"overlap={state['overlap']}; resume with the same settings or start a new sink"
+                )
+            self.source, self.chunk, self.chunks = state["source"], state["chunk"], state["chunks"]
+
+    @property
+    def cursor(self) -> tuple[str, int] | None:
+        """(source, chunk index) of the last chunk written, None before the first save."""
+        return (self.source, self.chunk) if self.source else None
+
+    def save(self, source: str, chunk: int, chunks: int):
+        self.source, self.chunk, self.chunks = source, chunk, chunks
+        state = {
+            "chunk_size": self.chunk_size,
+            "overlap": self.overlap,
+            "source": source,
+            "chunk": chunk,
+            "chunks": chunks,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def iter_documents(
+    directory: str | Path,
+    patterns=DEFAULT_PATTERNS,
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    cursor: tuple[str, int] | None = None,
+):
+    """Chunk Documents of every file, starting after the (source, chunk index) cursor."""
+    after_source, after_chunk = cursor or (None, -1)
+    after = tuple(after_source.split("/")) if after_source else ()
+    for path, parts in iter_files(directory, patterns, after):
+        source = "/".join(parts)
+        for index, (start, text) in enumerate(iter_chunks(path, chunk_size, overlap)):
+            if source == after_source and index <= after_chunk:
+                continue
+            yield Document(page_content=text, metadata={"source": source, "chunk": index, "start": start})
+
+
+def _batches(documents, size: int):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class FaissSink:
+    """Appends chunks to a flat FAISS index saved in directory, continuing the one already there.
+
+    The whole index is held in memory and rewritten on every flush, which only suits small
+    corpora; MmapStoreWriter appends instead.
+    """
+
+    def __init__(self, directory: str | Path, embeddings):
+        from langchain_community.vectorstores import FAISS
+
+        self.directory = Path(directory)
+        self.embeddings = embeddings
+        self.vector_store = None
+        self._ids = set()
+        if (self.directory / MANIFEST_FILE).exists():
+            self.vector_store = FAISS.load_local(str(self.directory), embeddings, allow_dangerous_deserialization=True)
+            self._ids = set(self.vector_store.index_to_docstore_id.values())
+
+    def add(self, documents: list[Document], vectors: np.ndarray, ids: list[str]):
+        import faiss
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+
+        new = [i for i, doc_id in enumerate(ids) if doc_id not in self._ids]
+        if not new:
+            return
+        if self.vector_store is None:
+            self.vector_store = FAISS(self.embeddings, faiss.IndexFlatL2(vectors.shape[1]), InMemoryDocstore(), {})
+        self.vector_store.add_embeddings(
+            [(documents[i].page_content, vectors[i]) for i in new],
+            metadatas=[documents[i].metadata for i in new],
+            ids=[ids[i] for i in new],
+        )
+        self._ids.update(ids[i] for i in new)
+
+    def flush(self):
+        if self.vector_store is not None:
+            manifest = {"model": embedding_model_name(self.embeddings), "chunks": len(self._ids)}
+            save_faiss(self.vector_store, self.directory, manifest)
+
+
+def ingest(
+    directory: str | Path,
+    embeddings,
+    sink,
+    checkpoint_path: str | Path | None = None,
+    patterns=DEFAULT_PATTERNS,
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    batch_size: int = 64,
+    concurrency: int = 4,
+    flush_every: int = 16,
+) -> dict:
+    """Chunk, embed and write every file under directory to sink; returns counters.
+
+    With checkpoint_path, chunks written by an earlier run are skipped and progress is
+    saved after every flush.
+    """
+    checkpoint = Checkpoint(checkpoint_path, chunk_size, overlap) if checkpoint_path else None
+    written = checkpoint.chunks if checkpoint else 0
+    stats = {"chunks": 0, "batches": 0, "resumed_after": written}
+    start = time.perf_counter()
+    last = None
+    unflushed = 0
+
+    def flush():
+        sink.flush()
+        if checkpoint and last is not None:
+            checkpoint.save(last.metadata["source"], last.metadata["chunk"], written)
+        logger.info(f"Ingested {written} chunks ({stats['chunks'] / (time.perf_counter() - start):.1f}/s)")
+
+    def write(batch, future):
+        nonlocal last, unflushed, written
+        vectors = np.asarray(future.result(), dtype=np.float32)
+        ids = [chunk_id(doc.metadata["source"], doc.metadata["chunk"]) for doc in batch]
+        sink.add(batch, vectors, ids)
+        last = batch[-1]
+        written += len(batch)
+        stats["chunks"] += len(batch)
+        stats["batches"] += 1
+        unflushed += 1
+        if unflushed >= flush_every:
+            flush()
+            unflushed = 0
+
+    documents = iter_documents(directory, patterns, chunk_size, overlap, checkpoint.cursor if checkpoint else None)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest") as pool:
+        for batch in _batches(documents, batch_size):
+            pending.append((batch, pool.submit(embeddings.embed_documents, [doc.page_content for doc in batch])))
+            # Written in order, so the checkpoint never gets ahead of a batch still embedding
+            if len(pending) >= concurrency:
+                write(*pending.popleft())
+        while pending:
+            write(*pending.popleft())
+    if unflushed:
+        flush()
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk, embed and index a directory of documents")
+    parser.add_argument("directory", help="Directory of documents to ingest")
+    parser.add_argument("--name", required=True, help="Index name; written to <cache>/ingest/<name>")
+    parser.add_argument("--patterns", default=",".join(DEFAULT_PATTERNS), help="File patterns (default: *.md,*.txt)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Characters per chunk (default: 1000)")
+    parser.add_argument("--overlap", type=int, default=200, help="Characters shared by adjacent chunks (default: 200)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding request (default: 64)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests in flight (default: 4)")
+    parser.add_argument(
+        "--store",
+        choices=("mmap", "faiss"),
+        default="mmap",
+        help="Index format (default: mmap; faiss for small corpora)",
+    )
+    parser.add_argument("--dtype", default="float32", help="Vector dtype of an mmap store: float32, float16 or int8")
+    parser.add_argument("--flush-every", type=int, default=16, help="Batches between checkpoints (default: 16)")
+    args = parser.parse_args()
+
+    from shared.lazy import load_env
+    from shared.models import embeddings_model
+
+    load_env()
+    embeddings = embeddings_model("text-embedding-3-small")
+    output = CACHE_DIR / "ingest" / args.name
+    if args.store == "mmap":
+        from shared.mmap_store import MmapStoreWriter
+
+        sink = MmapStoreWriter(output, args.dtype, model=embedding_model_name(embeddings))
+    else:
+        sink = FaissSink(output, embeddings)
+    stats = ingest(
+        args.directory,
+        embeddings,
+        sink,
+        checkpoint_path=output.with_name(f"{args.name}.checkpoint.json"),
+        patterns=tuple(pattern.strip() for pattern in args.patterns.split(",") if pattern.strip()),
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        flush_every=args.flush_every,
+    )
+    logger.info(f"Ingestion finished: {stats}; index in {output}")
+
+
+if __name__ == "__main__":
+    main()
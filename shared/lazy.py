@@ -0,0 +1,49 @@
+"""Lazy, once-only initialization of expensive process-wide resources.
+
+Agent modules must be cheap to import (tests and tooling import ``tools`` or the
+``create_*`` factories without running anything), so clients, knowledge bases and
+environment loading are created by accessors on first use instead of at import time.
+"""
+
+import functools
+import threading
+
+from dotenv import load_dotenv
+
+_UNSET = object()
+
+
+def once(factory):
+    """Turn a zero-argument factory into a thread-safe accessor that builds its value once.
+
+    The accessor also has ``initialized()`` and ``reset()`` (drop the value so the next
+    call builds it again). The value is kept for the whole process, so a factory that
+    reads settings from the environment must call load_env() first; otherwise a caller
+    that reaches it before .env is loaded fixes the defaults for good.
+    """
+    value = _UNSET
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal value
+        if value is _UNSET:
+            with lock:
+                if value is _UNSET:
+                    value = factory()
+        return value
+
+    def reset():
+        nonlocal value
+        with lock:
+            value = _UNSET
+
+    get.initialized = lambda: value is not _UNSET
+    get.reset = reset
+    return get
+
+
+@once
+def load_env() -> bool:
+    """Load .env into the environment (once per process)."""
+    return load_dotenv()
@@ -0,0 +1,357 @@
+"""Disk-backed LLM response cache shared by the LangGraph agents and the crews.
+
+Responses are stored in one SQLite file keyed by a hash of the model, its parameters and
+the full message list, so a repeated call is served without an API round trip:
+
+- ``LangChainLLMCache`` is a LangChain ``BaseCache``; chat models take it as ``cache=``.
+- ``CachedLLM`` (shared.crew_llm_cache) wraps a CrewAI LLM and serves its text responses
+  from the cache.
+
+Both share a ResponseCache, which can also look up near-duplicate prompts by embedding
+similarity. That only applies to the first model turn (system prompt plus one user
+message), where a differently worded question should get the same answer, and only to
+final text answers. A tool call carries the arguments of the question it answered
+("15% of 2400"), and later turns carry tool results, so both only ever match exactly.
+Entries expire after ``ttl_s``, and the least recently used are evicted beyond
+``max_entries``.
+
+Configured by LLM_CACHE (``off``, ``exact`` or ``semantic``), LLM_CACHE_TTL,
+LLM_CACHE_MAX_ENTRIES and LLM_CACHE_SIMILARITY; shared.models attaches the cache to
+every model it creates.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from shared.lazy import load_env, once
+from shared.paths import CACHE_DIR
+
+MODES = ("off", "exact", "semantic")
+
+
+class _ScopeIndex:
+    """In-memory embedding matrix of one scope's responses, kept in step with the table.
+
+    Rows are appended on put and swapped out on eviction, so a semantic lookup is one
+    matrix-vector product instead of reading and decoding every embedding in the scope.
+    """
+
+    def __init__(self, dim: int):
+        self.keys = []
+        self.rows = {}
+        self.matrix = np.empty((16, dim), dtype=np.float32)
+        self.expires = np.empty(16)
+        self.lock = threading.Lock()
+
+    def add(self, key: bytes, vector: np.ndarray, expires: float):
+        if vector.shape != self.matrix.shape[1:]:
+            return  # a different embedding model; only exact lookups can match it
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                row = len(self.keys)
+                if row == len(self.matrix):
+                    self.matrix = np.concatenate([self.matrix, np.empty_like(self.matrix)])
+                    self.expires = np.concatenate([self.expires, np.empty_like(self.expires)])
+                self.keys.append(key)
+                self.rows[key] = row
+            self.matrix[row] = vector
+            self.expires[row] = expires
+
+    def remove(self, key: bytes):
+        with self.lock:
+            row = self.rows.pop(key, None)
+            if row is None:
+                return
+            last = len(self.keys) - 1
+            if row != last:
+                moved = self.keys[last]
+                self.keys[row] = moved
+                self.rows[moved] = row
+                self.matrix[row] = self.matrix[last]
+                self.expires[row] = self.expires[last]
+            self.keys.pop()
+
+    def nearest(self, vector: np.ndarray, now: float) -> tuple[bytes, float] | None:
+        with self.lock:
+            count = len(self.keys)
+            if not count or vector.shape != self.matrix.shape[1:]:
+                return None
+            similarities = self.matrix[:count] @ vector
+            similarities[self.expires[:count] <= now] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] == -np.inf:
+                return None
+            return self.keys[best], float(similarities[best])
+
+
+class ResponseStore:
+    """SQLite store of responses with TTL expiry and LRU eviction."""
+
+    def __init__(self, path: str | Path, ttl_s: float = 7 * 86400, max_entries: int = 10_000):
+        self.path = Path(path)
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key BLOB PRIMARY KEY, scope BLOB, embedding BLOB, value TEXT NOT NULL, "
+            "expires REAL NOT NULL, accessed INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        # Semantic lookup indexes, loaded per scope on its first lookup
+        self._scopes = {}
+
+    def get(self, key: bytes) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time_ns(), key))
+            self._conn.commit()
+            return row[0]
+
+    def _scope_index(self, scope: bytes, dim: int) -> _ScopeIndex:
+        """The scope's index, read from the table once; call with the lock held."""
+        index = self._scopes.get(scope)
+        if index is None:
+            index = self._scopes[scope] = _ScopeIndex(dim)
+            rows = self._conn.execute(
+                "SELECT key, embedding, expires FROM responses "
+                "WHERE scope = ? AND embedding IS NOT NULL AND expires > ?",
+                (scope, time.time()),
+            )
+            for key, blob, expires in rows:
+                index.add(key, np.frombuffer(blob, dtype=np.float32), expires)
+        return index
+
+    def nearest(self, scope: bytes, vector: np.ndarray, threshold: float) -> tuple[str, float] | None:
+        """Most similar unexpired response in scope, if its cosine similarity reaches threshold."""
+        with self._lock:
+            index = self._scope_index(scope, len(vector))
+        # Searched outside the store lock, so other lookups and puts aren't held up
+        match = index.nearest(vector, time.time())
+        if match is None or match[1] < threshold:
+            return None
+        key, similarity = match
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time_ns(), key))
+            self._conn.commit()
+            return row[0], similarity
+
+    def put(self, key: bytes, value: str, scope: bytes | None = None, embedding: np.ndarray | None = None):
+        blob = embedding.astype(np.float32).tobytes() if embedding is not None else None
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT scope FROM responses WHERE key = ?", (key,)).fetchone()
+            if previous is not None:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                self._unindex([(key, previous[0])])
+            self._conn.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, blob, value, now + self.ttl_s, time.time_ns()),
+            )
+            self._count += 1
+            if embedding is not None and scope in self._scopes:
+                self._scopes[scope].add(key, embedding.astype(np.float32), now + self.ttl_s)
+            if self._count > self.max_entries:
+                removed = self._conn.execute("SELECT key, scope FROM responses WHERE expires <= ?", (now,)).fetchall()
+                overflow = self._count - len(removed) - self.max_entries
+                if overflow > 0:
+                    removed += self._conn.execute(
+                        "SELECT key, scope FROM responses WHERE expires > ? ORDER BY accessed LIMIT ?", (now, overflow)
+                    ).fetchall()
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key, _ in removed])
+                self._unindex(removed)
+                self.evictions += len(removed)
+                self._count -= len(removed)
+            self._conn.commit()
+
+    def _unindex(self, entries: list[tuple[bytes, bytes | None]]):
+        """Drop (key, scope) entries from the loaded scope indexes; call with the lock held."""
+        for key, scope in entries:
+            if scope in self._scopes:
+                self._scopes[scope].remove(key)
+
+    def size(self) -> int:
+        with self._lock:
+            return self._count
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._count = 0
+            self._scopes.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _digest(*parts: str) -> bytes:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).digest()
+
+
+class ResponseCache:
+    """Exact plus optional semantic response lookup over a ResponseStore, with hit counters.
+
+    Messages are given as (role, text) pairs; ``namespace`` keeps the LangChain and CrewAI
+    entries, which serialize responses differently, apart.
+    """
+
+    def __init__(self, store: ResponseStore, embeddings=None, similarity: float = 0.95):
+        self.store = store
+        self.embeddings = embeddings
+        self.similarity = similarity
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(namespace: str, params: str, messages: list[tuple[str, str]]) -> bytes:
+        return _digest(namespace, params, json.dumps(messages))
+
+    @staticmethod
+    def _semantic_scope(namespace: str, params: str, messages: list[tuple[str, str]]) -> tuple[bytes, str] | None:
+        """(scope, question) for a first-turn prompt, None for anything else."""
+        system = [text for role, text in messages if role == "system"]
+        rest = [(role, text) for role, text in messages if role != "system"]
+        if len(rest) != 1 or rest[0][0] not in ("user", "human"):
+            return None
+        return _digest(namespace, params, json.dumps(system)), rest[0][1]
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, namespace: str, params: str, messages: list[tuple[str, str]]) -> str | None:
+        value = self.store.get(self._key(namespace, params, messages))
+        if value is not None:
+            self._count("hits")
+            return value
+        semantic = self.embeddings is not None and self._semantic_scope(namespace, params, messages)
+        if semantic:
+            scope, question = semantic
+            match = self.store.nearest(scope, self._embed(question), self.similarity)
+            if match is not None:
+                self._count("semantic_hits")
+                return match[0]
+        self._count("misses")
+        return None
+
+    def update(self, namespace: str, params: str, messages: list[tuple[str, str]], value: str, semantic: bool = True):
+        """Store a response; with ``semantic=False`` it is only served for the exact same prompt."""
+        scope, embedding = None, None
+        semantic = semantic and self.embeddings is not None and self._semantic_scope(namespace, params, messages)
+        if semantic:
+            scope, embedding = semantic[0], self._embed(semantic[1])
+        self.store.put(self._key(namespace, params, messages), value, scope, embedding)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.hits + self.semantic_hits
+            total = hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "size": self.store.size(),
+                "evictions": self.store.evictions,
+            }
+
+
+def message_pairs(messages) -> list[tuple[str, str]]:
+    """(role, text) pairs from LangChain messages or CrewAI message dicts."""
+    if isinstance(messages, str):
+        return [("user", messages)]
+    pairs = []
+    for message in messages:
+        if isinstance(message, dict):
+            role, content = message.get("role", ""), message.get("content", "")
+        else:
+            role, content = message.type, message.content
+            extra = getattr(message, "tool_calls", None) or getattr(message, "tool_call_id", None)
+            if extra:
+                content = json.dumps([content, extra], default=str)
+        pairs.append((role, content if isinstance(content, str) else json.dumps(content, default=str)))
+    return pairs
+
+
+class LangChainLLMCache(BaseCache):
+    """LangChain BaseCache over a ResponseCache; pass it to a chat model as ``cache=``."""
+
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+
+    def lookup(self, prompt: str, llm_string: str):
+        value = self.cache.lookup("langchain", llm_string, message_pairs(loads(prompt)))
+        return [loads(generation) for generation in json.loads(value)] if value is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        value = json.dumps([dumps(generation) for generation in return_val])
+        # A near-duplicate question can't reuse tool calls made with another question's arguments
+        final = not any(getattr(getattr(generation, "message", None), "tool_calls", None) for generation in return_val)
+        self.cache.update("langchain", llm_string, message_pairs(loads(prompt)), value, semantic=final)
+
+    def clear(self, **kwargs):
+        self.cache.store.clear()
+
+
+def cache_mode() -> str:
+    mode = os.getenv("LLM_CACHE", "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CACHE {mode!r}, expected one of {', '.join(MODES)}")
+    return mode
+
+
+@once
+def get_response_cache() -> ResponseCache | None:
+    """The process-wide response cache configured by the LLM_CACHE* variables, or None when off."""
+    load_env()
+    mode = cache_mode()
+    if mode == "off":
+        return None
+    store = ResponseStore(
+        CACHE_DIR / "llm_responses.sqlite",
+        ttl_s=float(os.getenv("LLM_CACHE_TTL", str(7 * 86400))),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+    )
+    embeddings = None
+    if mode == "semantic":
+        from shared.models import embeddings_model
+
+        embeddings = embeddings_model("text-embedding-3-small")
+    return ResponseCache(store, embeddings, similarity=float(os.getenv("LLM_CACHE_SIMILARITY", "0.95")))
@@ -0,0 +1,437 @@
+"""OpenTelemetry metrics for tool, LLM and retriever calls, labeled by agent.
+
+Traces answer "what happened in this run"; these metrics answer "how slow is weather_tool
+at p95" without post-processing spans:
+
+- ``agent.tool.duration``, ``agent.llm.duration``, ``agent.retriever.duration``:
+  histograms in seconds, labeled by agent and tool / model
+- ``agent.llm.tokens``: counter labeled by agent, model and type (input / output)
+- ``agent.errors``: counter labeled by agent and kind (tool / llm / retriever)
+- ``telemetry.bytes_saved``, ``telemetry.spans_dropped``: counters labeled by processor,
+  from the span processors in shared.span_processors
+
+LangChain runs (the LangGraph agents, and retrievers everywhere) are recorded by a callback
+handler registered for every run through LangChain's configure hook; the agent label comes
+from the ``agent`` run metadata. Crews are recorded from CrewAI's event bus and labeled by
+crew name; their token counts come from the crew's usage totals at the end of each kickoff.
+
+Instruments are created once and attribute dicts are cached per label combination, so a
+recording is a dict lookup and a histogram update. Metrics go to an OTLP exporter when
+METRICS_OTLP_ENDPOINT is set and can always be scraped in Prometheus text format: from
+the agent server's ``/metrics/prometheus``, or from a local endpoint on METRICS_PORT.
+"""
+
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    HistogramDataPoint,
+    InMemoryMetricReader,
+    MetricReader,
+    NumberDataPoint,
+    PeriodicExportingMetricReader,
+)
+from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
+from opentelemetry.sdk.resources import Resource
+
+from shared import logger
+
+# Seconds; LLM calls dominate the upper end, tools and retrievers the lower
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+EXPORT_INTERVAL_MILLIS = 15000
+UNKNOWN_AGENT = "unknown"
+
+_metrics = None
+_init_lock = threading.Lock()
+
+
+class AgentMetrics:
+    """The metric instruments, with cached attribute dicts per label combination."""
+
+    def __init__(self, provider: MeterProvider):
+        meter = provider.get_meter("galileo-agents")
+        self.tool_duration = meter.create_histogram("agent.tool.duration", unit="s", description="Tool call latency")
+        self.llm_duration = meter.create_histogram("agent.llm.duration", unit="s", description="LLM call latency")
+        self.retriever_duration = meter.create_histogram(
+            "agent.retriever.duration", unit="s", description="Retriever call latency"
+        )
+        self.tokens = meter.create_counter("agent.llm.tokens", unit="{token}", description="LLM tokens used")
+        self.errors = meter.create_counter(
+            "agent.errors", unit="{error}", description="Failed tool, LLM and retriever calls"
+        )
+        self.export_bytes_saved = meter.create_counter(
+            "telemetry.bytes_saved", unit="By", description="Span bytes not exported thanks to truncation or sampling"
+        )
+        self.export_spans_dropped = meter.create_counter(
+            "telemetry.spans_dropped", unit="{span}", description="Spans dropped by sampling"
+        )
+        self._attributes = {}
+
+    def _labels(self, **labels) -> dict:
+        key = tuple(labels.items())
+        attributes = self._attributes.get(key)
+        if attributes is None:
+            attributes = self._attributes.setdefault(key, labels)
+        return attributes
+
+    def record_tool(self, agent: str, tool: str, seconds: float, error: bool = False):
+        self.tool_duration.record(seconds, self._labels(agent=agent, tool=tool))
+        if error:
+            self.record_error(agent, "tool")
+
+    def record_llm(
+        self, agent: str, model: str, seconds: float, input_tokens: int = 0, output_tokens: int = 0, error: bool = False
+    ):
+        self.llm_duration.record(seconds, self._labels(agent=agent, model=model))
+        self.record_tokens(agent, model, input_tokens, output_tokens)
+        if error:
+            self.record_error(agent, "llm")
+
+    def record_tokens(self, agent: str, model: str, input_tokens: int, output_tokens: int):
+        if input_tokens:
+            self.tokens.add(input_tokens, self._labels(agent=agent, model=model, type="input"))
+        if output_tokens:
+            self.tokens.add(output_tokens, self._labels(agent=agent, model=model, type="output"))
+
+    def record_retriever(self, agent: str, seconds: float, error: bool = False):
+        self.retriever_duration.record(seconds, self._labels(agent=agent))
+        if error:
+            self.record_error(agent, "retriever")
+
+    def record_error(self, agent: str, kind: str):
+        self.errors.add(1, self._labels(agent=agent, kind=kind))
+
+    def record_export_savings(self, processor: str, bytes_saved: int, spans_dropped: int = 0):
+        labels = self._labels(processor=processor)
+        self.export_bytes_saved.add(bytes_saved, labels)
+        if spans_dropped:
+            self.export_spans_dropped.add(spans_dropped, labels)
+
+
+def get_metrics() -> AgentMetrics | None:
+    """The process-wide instruments, or None before init_metrics."""
+    return _metrics
+
+
+# Prometheus text exposition
+
+
+def _prometheus_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _prometheus_labels(attributes: dict, extra: dict | None = None) -> str:
+    labels = {**attributes, **(extra or {})}
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{_prometheus_name(k)}="{v}"' for k, v in zip(labels, escaped, strict=True)) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(float(bound))
+
+
+class PrometheusReader(InMemoryMetricReader):
+    """Pull-only reader rendering the current (cumulative) metrics in Prometheus text format."""
+
+    def render(self) -> str:
+        data = self.get_metrics_data()
+        lines = []
+        for resource_metrics in data.resource_metrics if data else []:
+            for scope_metrics in resource_metrics.scope_metrics:
+                for metric in scope_metrics.metrics:
+                    lines.extend(self._render_metric(metric))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_metric(metric) -> list[str]:
+        name = _prometheus_name(metric.name)
+        points = metric.data.data_points
+        if points and isinstance(points[0], HistogramDataPoint):
+            name = f"{name}_seconds" if metric.unit == "s" else name
+            lines = [f"# HELP {name} {metric.description}", f"# TYPE {name} histogram"]
+            for point in points:
+                cumulative = 0
+                for bound, count in zip((*point.explicit_bounds, math.inf), point.bucket_counts, strict=True):
+                    cumulative += count
+                    labels = _prometheus_labels(point.attributes, {"le": _format_bound(bound)})
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                lines.append(f"{name}_sum{_prometheus_labels(point.attributes)} {point.sum}")
+                lines.append(f"{name}_count{_prometheus_labels(point.attributes)} {point.count}")
+            return lines
+        lines = [f"# HELP {name}_total {metric.description}", f"# TYPE {name}_total counter"]
+        for point in points:
+            if isinstance(point, NumberDataPoint):
+                lines.append(f"{name}_total{_prometheus_labels(point.attributes)} {point.value}")
+        return lines
+
+
+_prometheus_reader = None
+
+
+def render_prometheus() -> str:
+    """Current metrics in Prometheus text format (empty before init_metrics)."""
+    return _prometheus_reader.render() if _prometheus_reader else ""
+
+
+def start_prometheus_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve render_prometheus() on http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# LangChain
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records tool, LLM and retriever runs; chains are skipped (tool events come with the agent ones)."""
+
+    run_inline = True
+    ignore_chain = True
+
+    def __init__(self):
+        self._runs = {}
+
+    def _start(self, run_id, *labels):
+        self._runs[run_id] = (time.perf_counter(), *labels)
+
+    def _end(self, run_id):
+        run = self._runs.pop(run_id, None)
+        return (time.perf_counter() - run[0], *run[1:]) if run else None
+
+    @staticmethod
+    def _agent(metadata) -> str:
+        return (metadata or {}).get("agent", UNKNOWN_AGENT)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, self._agent(metadata), (serialized or {}).get("name") or kwargs.get("name", "tool"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=True)
+
+    def _finish_tool(self, run_id, error: bool):
+        run = self._end(run_id)
+        if run and _metrics:
+            _metrics.record_tool(run[1], run[2], run[0], error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata, kwargs)
+
+    def _start_llm(self, run_id, metadata, kwargs):
+        model = (metadata or {}).get("ls_model_name") or (kwargs.get("invocation_params") or {}).get("model", "")
+        self._start(run_id, self._agent(metadata), model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._end(run_id)
+        if not (run and _metrics):
+            return
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        _metrics.record_llm(run[1], run[2], run[0], input_tokens, output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._end(run_id)
+        if run and _metrics:
+            _metrics.record_llm(run[1], run[2], run[0], error=True)
+
+    def on_retriever_start(self, serialized, query, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, self._agent(metadata))
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._finish_retriever(run_id, error=False)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._finish_retriever(run_id, error=True)
+
+    def _finish_retriever(self, run_id, error: bool):
+        run = self._end(run_id)
+        if run and _metrics:
+            _metrics.record_retriever(run[1], run[0], error)
+
+
+_langchain_hook = None
+# Turns on the configure hook below; instrument_langchain sets it
+LANGCHAIN_HOOK_ENV = "GALILEO_AGENTS_LANGCHAIN_METRICS"
+
+
+def instrument_langchain():
+    """Attach the metrics callback handler to every LangChain run in the process (idempotent)."""
+    global _langchain_hook
+    if _langchain_hook is not None:
+        return
+    from langchain_core.tracers.context import register_configure_hook
+
+    # The variable stays unset. With handle_class and env_var given, LangChain creates a
+    # handler for every top-level run, in whichever thread or task it starts, and child runs
+    # inherit it.
+    _langchain_hook = ContextVar("galileo_agents_metrics_handler", default=None)
+    os.environ[LANGCHAIN_HOOK_ENV] = "true"
+    register_configure_hook(
+        _langchain_hook, inheritable=True, handle_class=MetricsCallbackHandler, env_var=LANGCHAIN_HOOK_ENV
+    )
+
+
+# CrewAI
+
+_crewai_instrumented = False
+
+
+def _crew_name(agent) -> str:
+    crew = getattr(agent, "crew", None)
+    return getattr(crew, "name", None) or UNKNOWN_AGENT
+
+
+def instrument_crewai():
+    """Record CrewAI tool and LLM calls from its event bus (idempotent).
+
+    Called when the first crew LLM is created, so processes that never build a crew don't
+    import CrewAI. Handlers may run on CrewAI's handler pool, so durations use the events'
+    own timestamps, not the time a handler runs.
+    """
+    global _crewai_instrumented
+    with _init_lock:
+        if _crewai_instrumented:
+            return
+        _crewai_instrumented = True
+
+    from crewai.events import crewai_event_bus
+    from crewai.events.types.crew_events import (
+        CrewKickoffCompletedEvent,
+        CrewKickoffFailedEvent,
+        CrewKickoffStartedEvent,
+    )
+    from crewai.events.types.llm_events import LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent
+    from crewai.events.types.tool_usage_events import ToolUsageErrorEvent, ToolUsageFinishedEvent
+
+    # LLM events only carry agent and task ids: crew name per agent id of running crews, and
+    # the first event of each call, keyed by (agent, task) since an agent makes one call at a time
+    agent_crews = {}
+    llm_calls = {}
+    lock = threading.Lock()
+
+    def llm_event(event, error: bool = False):
+        key = (event.agent_id, event.task_id)
+        with lock:
+            other = llm_calls.pop(key, None)
+            if other is None:
+                llm_calls[key] = event
+                return
+            crew = agent_crews.get(event.agent_id, UNKNOWN_AGENT)
+        if _metrics:
+            seconds = abs((event.timestamp - other.timestamp).total_seconds())
+            failed = error or isinstance(other, LLMCallFailedEvent)
+            _metrics.record_llm(crew, event.model or other.model or "", seconds, error=failed)
+
+    @crewai_event_bus.on(CrewKickoffStartedEvent)
+    def on_crew_started(source, event):
+        with lock:
+            agent_crews.update((str(agent.id), source.name or UNKNOWN_AGENT) for agent in source.agents)
+
+    def forget_crew(crew):
+        with lock:
+            for agent in crew.agents:
+                agent_crews.pop(str(agent.id), None)
+
+    @crewai_event_bus.on(CrewKickoffFailedEvent)
+    def on_crew_failed(source, event):
+        forget_crew(source)
+
+    @crewai_event_bus.on(CrewKickoffCompletedEvent)
+    def on_crew_completed(source, event):
+        forget_crew(source)
+        usage = getattr(event.output, "token_usage", None)
+        if _metrics and usage is not None:
+            model = getattr(getattr(source.agents[0], "llm", None), "model", "") if source.agents else ""
+            _metrics.record_tokens(source.name or UNKNOWN_AGENT, model, usage.prompt_tokens, usage.completion_tokens)
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def on_llm_started(source, event):
+        llm_event(event)
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def on_llm_completed(source, event):
+        llm_event(event)
+
+    @crewai_event_bus.on(LLMCallFailedEvent)
+    def on_llm_failed(source, event):
+        llm_event(event, error=True)
+
+    # Tool events come from a ToolUsage, which knows its agent
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def on_tool_finished(source, event):
+        if _metrics:
+            seconds = (event.finished_at - event.started_at).total_seconds()
+            _metrics.record_tool(_crew_name(getattr(source, "agent", None)), event.tool_name, seconds)
+
+    @crewai_event_bus.on(ToolUsageErrorEvent)
+    def on_tool_error(source, event):
+        if _metrics:
+            _metrics.record_error(_crew_name(getattr(source, "agent", None)), "tool")
+
+
+def init_metrics(app_name: str, readers: list[MetricReader] | None = None) -> AgentMetrics:
+    """Create the meter provider and instruments once per process; later calls return them.
+
+    The provider is private to these agents rather than the global one, so it can't clash
+    with a meter provider set up by Traceloop.
+    """
+    global _metrics, _prometheus_reader
+    with _init_lock:
+        if _metrics is not None:
+            return _metrics
+        _prometheus_reader = PrometheusReader()
+        readers = [_prometheus_reader, *(readers or [])]
+        endpoint = os.getenv("METRICS_OTLP_ENDPOINT")
+        if endpoint:
+            from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+
+            readers.append(PeriodicExportingMetricReader(OTLPMetricExporter(endpoint=endpoint), EXPORT_INTERVAL_MILLIS))
+        buckets = ExplicitBucketHistogramAggregation(DURATION_BUCKETS)
+        views = [
+            View(instrument_name=f"agent.{kind}.duration", aggregation=buckets) for kind in ("tool", "llm", "retriever")
+        ]
+        provider = MeterProvider(
+            metric_readers=readers, resource=Resource.create({"service.name": app_name}), views=views
+        )
+        _metrics = AgentMetrics(provider)
+
+    instrument_langchain()
+    port = os.getenv("METRICS_PORT")
+    if port:
+        start_prometheus_server(int(port))
+        logger.info(f"Prometheus metrics on http://127.0.0.1:{port}/metrics")
+    return _metrics
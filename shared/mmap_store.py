@@ -0,0 +1,310 @@
+"""Memory-mapped vector store that several worker processes can share.
+
+A store is a directory of flat files:
+
+- ``vectors.bin``: one row per document, as float32, float16 or int8
+- ``scales.bin``: float32 per-row scale of int8 rows (row = int8 * scale / 127)
+- ``norms.bin``: float32 squared norm of each stored row, for L2 distances
+- ``docs.jsonl``: ``{"id", "text", "metadata"}`` per document
+- ``offsets.bin``: uint64 end offset of each document in docs.jsonl
+- ``meta.json``: dimensions, dtype, row count and cache key; written last on every flush
+
+MmapVectorStore maps these read-only, so N processes share one copy in the page cache
+instead of each holding its own FAISS index and docstore. Search is an exact scan in
+blocks of rows, scoring with squared L2 distance like the FAISS stores. float16 halves
+the vectors, and int8 quarters them at a small cost in precision.
+
+MmapStoreWriter appends documents and is also a shared.ingest sink. Readers only see
+rows covered by meta.json, so a store can be read while a writer appends to it.
+
+load_or_build_faiss builds knowledge bases in this format with VECTOR_STORE=mmap, and
+VECTOR_STORE_DTYPE picks the dtype.
+"""
+
+import json
+import mmap
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from shared import logger
+from shared.paths import CACHE_DIR
+from shared.vectorstore import document_hash, embedding_model_name, index_key
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+META_FILE = "meta.json"
+# Rows scored at a time; bounds the float32 copy float16 and int8 rows need
+SEARCH_BLOCK = 8192
+# Recently written ids a reopened writer checks, to skip chunks re-sent after a crash
+DEDUPE_WINDOW = 65536
+
+
+def _read_meta(directory: Path) -> dict | None:
+    try:
+        with open(directory / META_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_mmap_store(directory: str | Path) -> bool:
+    return (Path(directory) / META_FILE).exists()
+
+
+def _docs_range(offsets: np.ndarray, i: int) -> tuple[int, int]:
+    return (int(offsets[i - 1]) if i else 0), int(offsets[i])
+
+
+def _open_append(path: Path, size: int):
+    """Open a file for appending, cut back (or zero-filled) to ``size`` bytes first."""
+    path.touch()
+    os.truncate(path, size)
+    return open(path, "ab")
+
+
+class MmapStoreWriter:
+    """Appends documents and vectors to a store directory, creating it if needed."""
+
+    def __init__(self, directory: str | Path, dtype: str = "float32", model: str | None = None, key: str | None = None):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype {dtype!r}, expected one of {', '.join(DTYPES)}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta = _read_meta(self.directory)
+        if meta and meta["dtype"] != dtype:
+            raise ValueError(f"Store {self.directory} holds {meta['dtype']} vectors, not {dtype}")
+        self.meta = meta or {"dim": None, "dtype": dtype, "count": 0, "docs_bytes": 0, "model": model, "key": key}
+        if key is not None:
+            self.meta["key"] = key
+        self._recent = []
+        self._files = {}
+        self._open()
+
+    def _open(self):
+        """Open the files for appending, dropping anything written after the last flush."""
+        count, dim = self.meta["count"], self.meta["dim"] or 0
+        itemsize = np.dtype(DTYPES[self.meta["dtype"]]).itemsize
+        sizes = {
+            "vectors.bin": count * dim * itemsize,
+            "norms.bin": count * 4,
+            "offsets.bin": count * 8,
+            "docs.jsonl": self.meta["docs_bytes"],
+        }
+        if self.meta["dtype"] == "int8":
+            sizes["scales.bin"] = count * 4
+        for name, size in sizes.items():
+            self._files[name] = _open_append(self.directory / name, size)
+        if count:
+            offsets = np.fromfile(self.directory / "offsets.bin", dtype=np.uint64, count=count)
+            first = max(0, count - DEDUPE_WINDOW)
+            with open(self.directory / "docs.jsonl", "rb") as f:
+                f.seek(_docs_range(offsets, first)[0])
+                self._recent = [json.loads(line)["id"] for line in f.read(self.meta["docs_bytes"]).splitlines()]
+        self._recent_ids = set(self._recent)
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    def add(self, documents: list[Document], vectors, ids: list[str]):
+        keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._recent_ids]
+        if not keep:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)[keep]
+        if self.meta["dim"] is None:
+            self.meta["dim"] = vectors.shape[1]
+        elif vectors.shape[1] != self.meta["dim"]:
+            raise ValueError(f"Store {self.directory} holds {self.meta['dim']}-dim vectors, got {vectors.shape[1]}")
+
+        dtype = self.meta["dtype"]
+        if dtype == "int8":
+            scales = np.abs(vectors).max(axis=1)
+            scales[scales == 0] = 1.0
+            rows = np.round(vectors / scales[:, None] * 127).astype(np.int8)
+            stored = rows.astype(np.float32) * (scales[:, None] / 127)
+            self._files["scales.bin"].write(scales.astype(np.float32).tobytes())
+        else:
+            rows = vectors.astype(DTYPES[dtype])
+            stored = rows.astype(np.float32)
+        self._files["vectors.bin"].write(rows.tobytes())
+        self._files["norms.bin"].write(np.einsum("ij,ij->i", stored, stored).astype(np.float32).tobytes())
+
+        ends, end = [], self.meta["docs_bytes"]
+        docs = self._files["docs.jsonl"]
+        for i in keep:
+            record = {"id": ids[i], "text": documents[i].page_content, "metadata": documents[i].metadata}
+            line = json.dumps(record, default=str).encode("utf-8") + b"\n"
+            docs.write(line)
+            end += len(line)
+            ends.append(end)
+        self._files["offsets.bin"].write(np.asarray(ends, dtype=np.uint64).tobytes())
+        self.meta["docs_bytes"] = end
+        self.meta["count"] += len(keep)
+
+        self._recent.extend(ids[i] for i in keep)
+        self._recent_ids.update(ids[i] for i in keep)
+        if len(self._recent) > 2 * DEDUPE_WINDOW:
+            self._recent = self._recent[-DEDUPE_WINDOW:]
+            self._recent_ids = set(self._recent)
+
+    def flush(self):
+        """Make everything added so far durable and visible to readers."""
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        tmp = self.directory / f"{META_FILE}.tmp-{os.getpid()}"
+        tmp.write_text(json.dumps(self.meta), encoding="utf-8")
+        os.replace(tmp, self.directory / META_FILE)
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+class MmapVectorStore(VectorStore):
+    """Read-only LangChain vector store over a memory-mapped store directory."""
+
+    def __init__(self, directory: str | Path, embeddings):
+        self.directory = Path(directory)
+        self.embedding_function = embeddings
+        self.meta = _read_meta(self.directory)
+        if self.meta is None:
+            raise FileNotFoundError(f"No vector store in {self.directory}")
+        count, dim = self.meta["count"], self.meta["dim"]
+        dtype = DTYPES[self.meta["dtype"]]
+
+        def mapped(name, dtype, shape):
+            if not count:
+                return np.empty(shape, dtype)
+            return np.memmap(self.directory / name, dtype=dtype, mode="r", shape=shape)
+
+        self._vectors = mapped("vectors.bin", dtype, (count, dim or 0))
+        self._norms = mapped("norms.bin", np.float32, (count,))
+        self._offsets = mapped("offsets.bin", np.uint64, (count,))
+        self._scales = mapped("scales.bin", np.float32, (count,)) if self.meta["dtype"] == "int8" else None
+        self._docs = None
+        if count:
+            with open(self.directory / "docs.jsonl", "rb") as f:
+                self._docs = mmap.mmap(f.fileno(), self.meta["docs_bytes"], access=mmap.ACCESS_READ)
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+
+    def _document(self, i: int) -> Document:
+        start, end = _docs_range(self._offsets, i)
+        record = json.loads(self._docs[start:end])
+        return Document(page_content=record["text"], metadata=record["metadata"], id=record["id"])
+
+    def search_vector(self, query, k: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """(row indices, squared L2 distances) of the k nearest rows, nearest first."""
+        query = np.asarray(query, dtype=np.float32)
+        best_rows, best_distances = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        for start in range(0, len(self), SEARCH_BLOCK):
+            block = self._vectors[start : start + SEARCH_BLOCK]
+            dots = (block if block.dtype == np.float32 else block.astype(np.float32)) @ query
+            if self._scales is not None:
+                dots *= self._scales[start : start + SEARCH_BLOCK] / 127
+            distances = self._norms[start : start + SEARCH_BLOCK] - 2 * dots
+            if len(distances) > k:
+                top = np.argpartition(distances, k)[:k]
+                distances = distances[top]
+            else:
+                top = np.arange(len(distances))
+            best_rows = np.concatenate([best_rows, top + start])
+            best_distances = np.concatenate([best_distances, distances])
+            if len(best_rows) > k:
+                keep = np.argpartition(best_distances, k)[:k]
+                best_rows, best_distances = best_rows[keep], best_distances[keep]
+        order = np.argsort(best_distances)
+        return best_rows[order], best_distances[order] + float(query @ query)
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, **kwargs) -> list[tuple[Document, float]]:
+        if kwargs.get("filter"):
+            raise ValueError("MmapVectorStore doesn't support metadata filters")
+        rows, distances = self.search_vector(embedding, k)
+        return [(self._document(int(row)), float(distance)) for row, distance in zip(rows, distances, strict=True)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def get_by_ids(self, ids) -> list[Document]:
+        wanted = set(ids)
+        return [doc for doc in map(self._document, range(len(self))) if doc.id in wanted]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        directory: str | Path | None = None,
+        dtype: str = "float32",
+        **kwargs,
+    ) -> "MmapVectorStore":
+        """Embed texts into a new store at directory and open it."""
+        if directory is None:
+            raise ValueError("MmapVectorStore.from_texts needs a directory")
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [
+            Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas, strict=True)
+        ]
+        writer = MmapStoreWriter(directory, dtype, model=embedding_model_name(embedding))
+        writer.add(documents, embedding.embed_documents(list(texts)), ids or [document_hash(doc) for doc in documents])
+        writer.close()
+        return cls(directory, embedding)
+
+
+def load_or_build_mmap(
+    docs: list[Document], embeddings, name: str, cache_dir: Path | None = None, dtype: str | None = None
+) -> tuple:
+    """Return (vector_store, index_key) for docs as a memory-mapped store, reusing the one on disk.
+
+    Unlike the FAISS cache, any document change rebuilds the whole store: other processes
+    may have it mapped, so it is never modified in place.
+    """
+    dtype = dtype or os.getenv("VECTOR_STORE_DTYPE", "float32").lower()
+    directory = Path(cache_dir or CACHE_DIR / "mmap") / name
+    model = embedding_model_name(embeddings)
+    docs_by_id = {document_hash(doc): doc for doc in docs}
+    key = index_key(list(docs_by_id), model, f"mmap:{dtype}")
+    meta = _read_meta(directory)
+    if meta and meta.get("key") == key:
+        logger.info(f"Loaded cached store '{name}' ({len(docs_by_id)} documents)")
+        return MmapVectorStore(directory, embeddings), key
+
+    ids = list(docs_by_id)
+    documents = [docs_by_id[doc_id] for doc_id in ids]
+    tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    writer = MmapStoreWriter(tmp, dtype, model=model, key=key)
+    writer.add(documents, embeddings.embed_documents([doc.page_content for doc in documents]), ids)
+    writer.close()
+    # Swapped in whole; processes that mapped the old store keep reading it until they reload
+    old = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    if directory.exists():
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    logger.info(f"Built {dtype} store '{name}' ({len(ids)} documents)")
+    return MmapVectorStore(directory, embeddings), key
@@ -0,0 +1,69 @@
+"""Model factories shared by all agents.
+
+Agents create their chat models, CrewAI LLMs and embeddings through these factories, so
+alternative implementations (e.g. the offline fakes used by the benchmarks) can be swapped
+in at one place with set_model_overrides before an agent is loaded. When LLM_CACHE is set,
+chat models and CrewAI LLMs (overrides included) also get the shared response cache from
+shared.llm_cache.
+"""
+
+_overrides = {}
+
+
+def set_model_overrides(chat=None, crew_llm=None, embeddings=None):
+    """Replace the default factories; each override is called with the same arguments."""
+    for name, factory in (("chat", chat), ("crew_llm", crew_llm), ("embeddings", embeddings)):
+        if factory is not None:
+            _overrides[name] = factory
+
+
+def clear_model_overrides():
+    _overrides.clear()
+
+
+def chat_model(model: str = "gpt-4o-mini", **kwargs):
+    """LangChain chat model for the LangGraph agents."""
+    if "chat" in _overrides:
+        llm = _overrides["chat"](model=model, **kwargs)
+    else:
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(model=model, **kwargs)
+    from shared.llm_cache import LangChainLLMCache, get_response_cache
+
+    cache = get_response_cache()
+    if cache is not None:
+        llm.cache = LangChainLLMCache(cache)
+    return llm
+
+
+def crew_llm(model: str = "gpt-4o-mini", **kwargs):
+    """CrewAI LLM for the crews; the first call also starts recording CrewAI metrics."""
+    from shared.metrics import instrument_crewai
+
+    instrument_crewai()
+    if "crew_llm" in _overrides:
+        llm = _overrides["crew_llm"](model=model, **kwargs)
+    else:
+        from crewai import LLM
+
+        llm = LLM(model=model, **kwargs)
+    from shared.llm_cache import get_response_cache
+
+    cache = get_response_cache()
+    if cache is None:
+        return llm
+    from shared.crew_llm_cache import CachedLLM
+
+    return CachedLLM(llm, cache)
+
+
+def embeddings_model(model: str = "text-embedding-3-small"):
+    """Embeddings for the knowledge bases, backed by the shared on-disk embedding cache."""
+    if "embeddings" in _overrides:
+        return _overrides["embeddings"](model=model)
+    from langchain_openai import OpenAIEmbeddings
+
+    from shared.embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(OpenAIEmbeddings(model=model))
@@ -1,10 +1,22 @@
 import argparse
+import functools
 import glob
+import gzip
+import mmap
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from google.protobuf.message import DecodeError
 from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (
     ExportTraceServiceRequest,
 )
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
 
 
 def parse_trace(body_bytes):
@@ -13,6 +25,157 @@ def parse_trace(body_bytes):
     return reqtrace
 
 
+def create_session(workers):
+    """Create a keep-alive HTTP session with a connection pool sized for the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def open_payload(file, validate=False):
+    """Memory-map a .bin file so its original bytes can be sent without a decode/re-encode.
+
+    The protobuf is only decoded when validate is set, and the decoded message is
+    discarded: the bytes on the wire are always the file's own bytes.
+    """
+    with open(file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        payload = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if validate:
+        try:
+            with memoryview(payload) as view:
+                parse_trace(view)
+        except DecodeError:
+            payload.close()
+            raise
+    return payload
+
+
+class InflightBudget:
+    """Bounds the total bytes of payloads that are queued or being sent.
+
+    A payload larger than the whole budget is admitted once nothing else is in flight,
+    so a single oversized capture never deadlocks the upload.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size):
+        with self._cond:
+            while self._used and self._used + size > self.max_bytes:
+                self._cond.wait()
+            self._used += size
+
+    def release(self, size):
+        with self._cond:
+            self._used -= size
+            self._cond.notify_all()
+
+
+def iter_batches(files, batch_bytes, on_invalid=None):
+    """Yield (files, ExportTraceServiceRequest) batches merged up to batch_bytes.
+
+    A file larger than batch_bytes is sent on its own. With batch_bytes <= 0 every
+    file becomes its own batch. Files that don't decode are passed to
+    on_invalid(file, error) and left out, or raise without it.
+    """
+    batch_files = []
+    batch = ExportTraceServiceRequest()
+    size = 0
+    for file in files:
+        with open(file, "rb") as f:
+            body_bytes = f.read()
+        try:
+            resource_spans = parse_trace(body_bytes).resource_spans
+        except DecodeError as e:
+            if on_invalid is None:
+                raise
+            on_invalid(file, e)
+            continue
+        if batch_files and (batch_bytes <= 0 or size + len(body_bytes) > batch_bytes):
+            yield batch_files, batch
+            batch_files = []
+            batch = ExportTraceServiceRequest()
+            size = 0
+        batch.resource_spans.extend(resource_spans)
+        batch_files.append(file)
+        size += len(body_bytes)
+    if batch_files:
+        yield batch_files, batch
+
+
+def _retry_delay(response, attempt, backoff):
+    """Seconds to wait before the next attempt, honoring Retry-After when present."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return backoff * (2**attempt) * (0.5 + random.random() / 2)
+
+
+def post_with_retry(session, url, headers, body, max_retries=5, backoff=0.5):
+    """POST body, backing off on 429/5xx responses and connection errors."""
+    for attempt in range(max_retries + 1):
+        if hasattr(body, "seek"):
+            body.seek(0)
+        try:
+            response = session.post(url, headers=headers, data=body)
+        except requests.ConnectionError:
+            if attempt == max_retries:
+                raise
+            time.sleep(_retry_delay(None, attempt, backoff))
+            continue
+        if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+            return response
+        time.sleep(_retry_delay(response, attempt, backoff))
+    return response
+
+
+class UploadStats:
+    """Thread-safe counters for the end-of-run throughput summary."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = 0
+        self.requests = 0
+        self.failed = 0
+        self.skipped = 0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+        self.started = time.perf_counter()
+
+    def record(self, files, bytes_raw, bytes_sent, ok):
+        with self._lock:
+            self.files += files
+            self.requests += 1
+            self.failed += 0 if ok else 1
+            self.bytes_raw += bytes_raw
+            self.bytes_sent += bytes_sent
+
+    def skip(self, file, error):
+        """Count a file left out because it isn't a valid OTLP payload."""
+        with self._lock:
+            self.skipped += 1
+        print(f"Skipping invalid file: {file}: {error}")
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f"Sent {self.files} files in {self.requests} requests ({self.failed} failed, {self.skipped} files skipped) "
+            f"in {elapsed:.2f}s: "
+            f"{self.files / elapsed:.1f} files/sec, {self.bytes_raw / elapsed / 1024:.1f} KiB/sec payload, "
+            f"{self.bytes_sent / elapsed / 1024:.1f} KiB/sec on the wire"
+        )
+
+
 def main():
     parser = argparse.ArgumentParser(description="Send OTLP traces to Galileo API")
     parser.add_argument(
@@ -46,6 +209,45 @@ def main():
         default="agents-langgraph/weather/otlp_trace",
         help="Directory containing .bin trace files (default: agents-langgraph/weather/otlp_trace)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of concurrent upload workers (default: 1)",
+    )
+    parser.add_argument(
+        "--batch-bytes",
+        type=int,
+        default=0,
+        help="Merge files into requests of up to this many bytes (default: 0, one file per request)",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Decode every file before sending it to check it is a valid ExportTraceServiceRequest",
+    )
+    parser.add_argument(
+        "--max-inflight-bytes",
+        type=int,
+        default=256 * 1024 * 1024,
+        help="Upper bound on bytes of payloads queued or being sent at once (default: 256 MiB)",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Gzip request bodies (sets Content-Encoding: gzip)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries per request on 429/5xx responses (default: 5)",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Only print failed responses and the final summary",
+    )
 
     args = parser.parse_args()
 
@@ -62,6 +264,8 @@ def main():
         "Galileo-API-Key": args.api_key,
         "Content-Type": "application/x-protobuf",
     }
+    if args.gzip:
+        headers["Content-Encoding"] = "gzip"
 
     # Add project or projectid to headers (prefer project over projectid if both provided)
     if args.project:
@@ -77,14 +281,67 @@ def main():
 
     glob_files = glob.glob(f"{args.directory}/*.bin")
     glob_files.sort()
-    for file in glob_files:
-        print(f"Processing file: {file}")
-        with open(file, "rb") as f:
-            body_bytes = f.read()
-            reqtrace = parse_trace(body_bytes)
-        response = requests.post(args.url, headers=headers, data=reqtrace.SerializeToString())
-        print(f"Status: {response.status_code}")
-        print(f"Response: {response.text}")
+
+    session = create_session(args.workers)
+    stats = UploadStats()
+
+    budget = InflightBudget(args.max_inflight_bytes)
+
+    def send(batch_files, body, size):
+        try:
+            wire_body = gzip.compress(body) if args.gzip else body
+            wire_size = len(wire_body)
+            response = post_with_retry(session, args.url, headers, wire_body, max_retries=args.max_retries)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+            budget.release(size)
+        ok = response.status_code == 200
+        stats.record(len(batch_files), size, wire_size, ok)
+        if not args.quiet or not ok:
+            print(f"Processing file: {', '.join(batch_files)}")
+            print(f"Status: {response.status_code}")
+            print(f"Response: {response.text}")
+
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        # Bound the number of queued requests as well as their bytes
+        pending = threading.BoundedSemaphore(max(args.workers, 1) * 2)
+        futures = []
+
+        def submit(batch_files, size, open_body):
+            # Opened before taking any budget, so an invalid file has nothing to give back
+            try:
+                body = open_body()
+            except DecodeError as e:
+                stats.skip(batch_files[0], e)
+                return
+            pending.acquire()
+            budget.acquire(size)
+            try:
+                future = executor.submit(send, batch_files, body, size)
+            except BaseException:
+                budget.release(size)
+                pending.release()
+                if hasattr(body, "close"):
+                    body.close()
+                raise
+            future.add_done_callback(lambda _: pending.release())
+            futures.append(future)
+
+        if args.batch_bytes > 0:
+            # Merging needs the decoded messages; each merged batch is serialized once
+            for batch_files, reqtrace in iter_batches(glob_files, args.batch_bytes, on_invalid=stats.skip):
+                # ByteSize() is the serialized length, and caches the sizes SerializeToString needs
+                submit(batch_files, reqtrace.ByteSize(), reqtrace.SerializeToString)
+        else:
+            # Pass-through: send each file's original bytes straight from a memory map
+            for file in glob_files:
+                submit([file], os.path.getsize(file), functools.partial(open_payload, file, validate=args.validate))
+
+        for future in futures:
+            future.result()
+
+    print(stats.summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,7 @@
+"""Repository and cache locations."""
+
+import os
+from pathlib import Path
+
+ROOT = Path(os.getenv("GALILEO_AGENTS_ROOT") or Path(__file__).resolve().parent.parent)
+CACHE_DIR = Path(os.getenv("GALILEO_AGENTS_CACHE_DIR") or ROOT / ".cache")
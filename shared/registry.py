@@ -0,0 +1,59 @@
+"""Load agent entry-point modules by name.
+
+Every agent directory imports its siblings as top-level modules (``tools``, ``prompt``,
+``agents``...), so two agents can't simply be imported into one process. The loader puts
+the agent's directory on sys.path, evicts any sibling modules left over from another
+agent, and caches the loaded entry point under a unique name.
+"""
+
+import importlib
+import sys
+import threading
+from pathlib import Path
+
+from shared.paths import ROOT
+
+# name -> (directory, entry-point module, factory)
+AGENTS = {
+    "weather": ("agents-langgraph/weather", "agent", "create_weather_agent"),
+    "calculator": ("agents-langgraph/calculator", "agent", "create_calculator_agent"),
+    "rag": ("agents-langgraph/rag", "agent", "create_rag_agent"),
+    "content": ("agents-crewai/content", "crew", "create_crew"),
+    "research": ("agents-crewai/research", "crew", "create_crew"),
+}
+LANGGRAPH_AGENTS = ("weather", "calculator", "rag")
+CREWAI_AGENTS = ("content", "research")
+
+_modules = {}
+_lock = threading.Lock()
+
+
+def _evict_siblings(directory: Path):
+    for path in directory.glob("*.py"):
+        if path.stem != "__init__":
+            sys.modules.pop(path.stem, None)
+
+
+def load_agent_module(name: str):
+    """Import (once) and return the entry-point module of an agent."""
+    if name not in AGENTS:
+        raise ValueError(f"Unknown agent: {name} (expected one of {', '.join(AGENTS)})")
+    with _lock:
+        if name in _modules:
+            return _modules[name]
+        directory = ROOT / AGENTS[name][0]
+        _evict_siblings(directory)
+        sys.path.insert(0, str(directory))
+        try:
+            module = importlib.import_module(AGENTS[name][1])
+        finally:
+            sys.path.remove(str(directory))
+            _evict_siblings(directory)
+        sys.modules[f"galileo_agents.{name}"] = module
+        _modules[name] = module
+        return module
+
+
+def get_factory(name: str):
+    """Return the agent's factory (create_*_agent for LangGraph, create_crew for CrewAI)."""
+    return getattr(load_agent_module(name), AGENTS[name][2])
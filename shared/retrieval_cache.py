@@ -0,0 +1,89 @@
+"""TTL/LRU cache for retrieval tool results.
+
+Entries are keyed by normalized query text, k and the knowledge-base index version, so a
+repeated or near-identical query (case, punctuation, whitespace) skips both the embedding
+round trip and the vector search. Setting a new index version drops every entry.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", query.lower()).split())
+
+
+class RetrievalCache:
+    """Thread-safe size- and TTL-bounded cache with hit-rate counters."""
+
+    def __init__(self, ttl_s: float = 600, max_entries: int = 1024):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_version(self, version: str):
+        """Record the current index version, invalidating the cache if it changed."""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def _store(self, key: tuple, value):
+        with self._lock:
+            # Don't store results computed against an index that was replaced meanwhile
+            if key[2] == self.version:
+                self._entries[key] = (time.monotonic() + self.ttl_s, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def get_or_compute(self, query: str, k: int | None, compute):
+        key = (normalize_query(query), k, self.version)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[1]
+        value = compute()
+        self._store(key, value)
+        return value
+
+    async def aget_or_compute(self, query: str, k: int | None, compute):
+        """get_or_compute with an async compute."""
+        key = (normalize_query(query), k, self.version)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[1]
+        value = await compute()
+        self._store(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
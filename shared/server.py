@@ -0,0 +1,235 @@
+"""Agent server - hosts the agents as warm singletons behind one ASGI app.
+
+Each agent is loaded once at startup, so requests skip imports, telemetry init, knowledge
+base builds and graph compilation. LangGraph agents are compiled once and shared by all
+requests; crews are cheap to assemble and are built per request from the warm module.
+Every agent has its own concurrency limit, and requests beyond ``max_waiting`` queued
+callers are rejected with 429 instead of piling up.
+
+    uv run shared/server.py --port 8000 --concurrency 4
+
+    curl -X POST localhost:8000/agents/weather/invoke -d '{"query": "Weather in Paris?"}'
+    curl -N -X POST localhost:8000/agents/rag/stream -d '{"query": "What is RAG?"}'
+    curl localhost:8000/health
+    curl localhost:8000/metrics
+    curl localhost:8000/metrics/prometheus
+
+``/stream`` answers with server-sent events (``token``, ``tool_call``, ``tool_result``,
+``final``, ``error``). Crews can't stream partial output, so they send one ``final`` event.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+from collections import deque
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from shared import logger
+from shared.lazy import load_env
+from shared.metrics import render_prometheus
+from shared.registry import AGENTS, CREWAI_AGENTS, get_factory
+from shared.stats import latency_summary
+from shared.streaming import astream_events
+from shared.telemetry import init_telemetry
+
+# Latencies kept per agent for the /metrics percentiles
+LATENCY_WINDOW = 1000
+
+
+class AgentHost:
+    """One warm agent with its concurrency limit and request counters."""
+
+    def __init__(self, name: str, concurrency: int, max_waiting: int):
+        self.name = name
+        self.crew = name in CREWAI_AGENTS
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting
+        self.factory = None
+        self.agent = None
+        self.ready = False
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def warm(self):
+        self.factory = get_factory(self.name)
+        if self.crew:
+            # Building one crew initializes everything the crew module shares across requests
+            self.factory("warm-up")
+        else:
+            self.agent = self.factory()
+        self.ready = True
+
+    def overloaded(self) -> bool:
+        return self._semaphore.locked() and self.waiting >= self.max_waiting
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.requests += 1
+            self.latencies.append(time.perf_counter() - start)
+            self._semaphore.release()
+
+    async def invoke(self, query: str) -> str:
+        if self.crew:
+            return str(await self.factory(query).kickoff_async())
+        result = await self.agent.ainvoke({"messages": [("user", query)]})
+        return result["messages"][-1].content
+
+    async def stream(self, query: str):
+        if self.crew:
+            yield {"type": "final", "response": await self.invoke(query)}
+            return
+        async for event in astream_events(self.agent, query):
+            yield event
+
+    def metrics(self) -> dict:
+        return {
+            "ready": self.ready,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "concurrency": self.concurrency,
+            "latency": latency_summary(list(self.latencies)),
+        }
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def _request(request):
+    """Resolve the agent and query of an /agents/{name}/... request, or an error response."""
+    host = request.app.state.hosts.get(request.path_params["name"])
+    if host is None:
+        return None, None, JSONResponse({"error": f"Unknown agent: {request.path_params['name']}"}, status_code=404)
+    if not host.ready:
+        return None, None, JSONResponse({"error": f"Agent {host.name} is still starting"}, status_code=503)
+    try:
+        query = (await request.json())["query"]
+    except (ValueError, KeyError, TypeError):
+        return None, None, JSONResponse({"error": 'Expected a JSON body like {"query": "..."}'}, status_code=400)
+    if host.overloaded():
+        host.rejected += 1
+        return None, None, JSONResponse({"error": f"Agent {host.name} is overloaded"}, status_code=429)
+    return host, query, None
+
+
+async def invoke(request):
+    host, query, error = await _request(request)
+    if error:
+        return error
+    start = time.perf_counter()
+    try:
+        async with host.slot():
+            response = await host.invoke(query)
+    except Exception as e:
+        logger.exception(f"{host.name} request failed")
+        return JSONResponse({"error": f"{type(e).__name__}: {e}"}, status_code=500)
+    return JSONResponse({"response": response, "latency_ms": round((time.perf_counter() - start) * 1000, 1)})
+
+
+async def stream(request):
+    host, query, error = await _request(request)
+    if error:
+        return error
+
+    async def events():
+        try:
+            async with host.slot():
+                async for event in host.stream(query):
+                    yield _sse(event)
+        except Exception as e:
+            logger.exception(f"{host.name} stream failed")
+            yield _sse({"type": "error", "error": f"{type(e).__name__}: {e}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def health(request):
+    hosts = request.app.state.hosts
+    status = "ok" if all(host.ready for host in hosts.values()) else "starting"
+    return JSONResponse({"status": status, "agents": {name: host.ready for name, host in hosts.items()}})
+
+
+async def metrics(request):
+    return JSONResponse({name: host.metrics() for name, host in request.app.state.hosts.items()})
+
+
+async def prometheus_metrics(request):
+    """Tool, LLM and retriever metrics from shared.metrics, for Prometheus to scrape."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def create_app(agents: list[str] | None = None, concurrency: int = 4, max_waiting: int = 64) -> Starlette:
+    """Build the app; agents are warmed (in a worker thread) before it starts serving."""
+    names = agents or list(AGENTS)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        load_env()
+        # One logstream for the whole server, rather than whichever agent warms up first
+        init_telemetry("agent-server")
+        app.state.hosts = {name: AgentHost(name, concurrency, max_waiting) for name in names}
+        for host in app.state.hosts.values():
+            start = time.perf_counter()
+            await asyncio.to_thread(host.warm)
+            logger.info(f"Warmed {host.name} in {time.perf_counter() - start:.2f}s")
+        yield
+
+    routes = [
+        Route("/health", health),
+        Route("/metrics", metrics),
+        Route("/metrics/prometheus", prometheus_metrics),
+        Route("/agents/{name}/invoke", invoke, methods=["POST"]),
+        Route("/agents/{name}/stream", stream, methods=["POST"]),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve all agents from one warm process")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--agents", help=f"Comma-separated agents to host (default: {','.join(AGENTS)})")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests per agent (default: 4)")
+    parser.add_argument(
+        "--max-waiting", type=int, default=64, help="Queued requests per agent before 429 (default: 64)"
+    )
+    args = parser.parse_args()
+
+    agents = [name.strip() for name in args.agents.split(",")] if args.agents else None
+    unknown = [name for name in agents or [] if name not in AGENTS]
+    if unknown:
+        parser.error(f"Unknown agent(s): {', '.join(unknown)}")
+    uvicorn.run(create_app(agents, args.concurrency, args.max_waiting), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Span processors that cut export volume: attribute truncation and trace sampling.
+
+Both wrap the processor that exports (a batch or simple processor) and hand it modified
+or fewer spans:
+
+- ``AttributeLimitProcessor`` truncates string attributes (and event attributes) past a
+  byte limit, or replaces them with a sha256 digest. Limits are per attribute name,
+  with ``*`` wildcards, plus a default for everything else. Whole prompts, retrieved
+  documents and blog drafts are what make RAG and crew spans large.
+- ``SamplingProcessor`` keeps a ``ratio`` of traces, decided from the trace id when its
+  first span ends, so every span of a trace shares the decision. The spans of the other
+  traces are held until the trace's local root ends. Traces with an error or a root
+  slower than ``slow_ms`` are kept anyway, and the rest are dropped.
+
+Spans are still created and recorded; only what reaches the exporter shrinks. Both
+processors count the bytes they saved (approximate attribute and name sizes, not exact
+OTLP encoding) in ``stats()`` and in the ``telemetry.bytes_saved`` metric.
+
+init_telemetry installs them from TELEMETRY_ATTRIBUTE_MAX_BYTES, TELEMETRY_ATTRIBUTE_LIMITS,
+TELEMETRY_SAMPLE_RATIO and TELEMETRY_SLOW_TRACE_MS; by default neither is active.
+"""
+
+import fnmatch
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from opentelemetry.sdk.trace import Event, ReadableSpan, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+from shared.metrics import get_metrics
+
+HASH = "hash"
+TRUNCATED_SUFFIX = "...[truncated {} bytes]"
+# Rough per-span cost of ids, timestamps, kind and status in OTLP, for dropped-span savings
+SPAN_OVERHEAD_BYTES = 64
+
+
+def _value_bytes(value) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (list, tuple)):
+        return sum(_value_bytes(item) for item in value)
+    return 8
+
+
+def _attributes_bytes(attributes) -> int:
+    return sum(len(key) + _value_bytes(value) for key, value in (attributes or {}).items())
+
+
+def span_bytes(span: ReadableSpan) -> int:
+    """Approximate exported size of a span."""
+    size = SPAN_OVERHEAD_BYTES + len(span.name) + _attributes_bytes(span.attributes)
+    return size + sum(len(event.name) + _attributes_bytes(event.attributes) for event in span.events)
+
+
+def parse_limits(spec: str) -> dict:
+    """Parse ``name=bytes`` / ``name=hash`` pairs, e.g. ``traceloop.entity.*=2048,gen_ai.prompt.*=hash``.
+
+    A limit of 0 keeps the attribute whole.
+    """
+    limits = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, _, limit = item.partition("=")
+        limit = limit.strip().lower()
+        limits[name.strip()] = HASH if limit == HASH else int(limit)
+    return limits
+
+
+def _record_saved(processor: str, saved: int, spans_dropped: int = 0):
+    metrics = get_metrics()
+    if metrics is not None and (saved or spans_dropped):
+        metrics.record_export_savings(processor, saved, spans_dropped)
+
+
+class AttributeLimitProcessor(SpanProcessor):
+    """Truncates or hashes large string attributes before spans reach the wrapped processor."""
+
+    def __init__(self, processor: SpanProcessor, max_bytes: int = 4096, limits: dict | None = None):
+        self.processor = processor
+        self.max_bytes = max_bytes
+        self.limits = limits or {}
+        self._exact = {name: limit for name, limit in self.limits.items() if "*" not in name}
+        self._patterns = [(name, limit) for name, limit in self.limits.items() if "*" in name]
+        self._resolved = {}
+        self.bytes_saved = 0
+        self.attributes_limited = 0
+        self._lock = threading.Lock()
+
+    def _limit_for(self, key: str):
+        limit = self._resolved.get(key)
+        if limit is None:
+            limit = self._exact.get(key)
+            if limit is None:
+                matches = (lim for pattern, lim in self._patterns if fnmatch.fnmatchcase(key, pattern))
+                limit = next(matches, self.max_bytes)
+            self._resolved[key] = limit
+        return limit
+
+    @staticmethod
+    def _shrink(value: str, limit) -> str:
+        encoded = value.encode("utf-8")
+        if limit == HASH:
+            return "sha256:" + hashlib.sha256(encoded).hexdigest()
+        if len(encoded) <= limit:
+            return value
+        return encoded[:limit].decode("utf-8", errors="ignore") + TRUNCATED_SUFFIX.format(len(encoded))
+
+    def _limit_value(self, value, limit):
+        if isinstance(value, str):
+            if limit != HASH and len(value) <= limit // 4:
+                return value  # can't exceed limit bytes even at 4 bytes per character
+            return self._shrink(value, limit)
+        if isinstance(value, (list, tuple)) and value and isinstance(value[0], str):
+            return tuple(self._shrink(item, limit) for item in value)
+        return value
+
+    def _limit_attributes(self, attributes):
+        """(limited attributes or None if unchanged, bytes saved)."""
+        limited, saved = None, 0
+        for key, value in (attributes or {}).items():
+            limit = self._limit_for(key)
+            if not limit:
+                continue
+            new = self._limit_value(value, limit)
+            if new is not value and new != value:
+                if limited is None:
+                    limited = dict(attributes)
+                limited[key] = new
+                # A digest or truncation marker can outgrow a short value; count that as no saving
+                saved += max(_value_bytes(value) - _value_bytes(new), 0)
+        return limited, saved
+
+    def on_start(self, span, parent_context=None):
+        self.processor.on_start(span, parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        attributes, saved = self._limit_attributes(span.attributes)
+        events, changed_events = [], False
+        for event in span.events:
+            event_attributes, event_saved = self._limit_attributes(event.attributes)
+            if event_attributes is not None:
+                changed_events = True
+                saved += event_saved
+                event = Event(event.name, event_attributes, event.timestamp)
+            events.append(event)
+        if attributes is None and not changed_events:
+            self.processor.on_end(span)
+            return
+        with self._lock:
+            self.bytes_saved += saved
+            self.attributes_limited += 1
+        _record_saved("attribute_limit", saved)
+        self.processor.on_end(
+            ReadableSpan(
+                name=span.name,
+                context=span.context,
+                parent=span.parent,
+                resource=span.resource,
+                attributes=attributes if attributes is not None else span.attributes,
+                events=events,
+                links=span.links,
+                kind=span.kind,
+                status=span.status,
+                start_time=span.start_time,
+                end_time=span.end_time,
+                instrumentation_scope=span.instrumentation_scope,
+            )
+        )
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.processor.force_flush(timeout_millis)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"bytes_saved": self.bytes_saved, "spans_limited": self.attributes_limited}
+
+
+class _PendingTrace:
+    __slots__ = ("errored", "spans")
+
+    def __init__(self):
+        self.spans = []
+        self.errored = False
+
+
+class SamplingProcessor(SpanProcessor):
+    """Ratio sampling by trace id, keeping errored or slow traces that the ratio would drop."""
+
+    def __init__(
+        self,
+        processor: SpanProcessor,
+        ratio: float = 1.0,
+        slow_ms: float | None = None,
+        max_pending_traces: int = 10_000,
+    ):
+        if not 0 <= ratio <= 1:
+            raise ValueError(f"Sample ratio must be between 0 and 1, got {ratio}")
+        self.processor = processor
+        self.ratio = ratio
+        self.slow_ns = slow_ms * 1e6 if slow_ms else None
+        self.max_pending_traces = max_pending_traces
+        # Same rule as OpenTelemetry's TraceIdRatioBased sampler, on the low 64 bits
+        self._bound = round(ratio * (1 << 64))
+        self._pending = OrderedDict()
+        # Decisions for traces whose root already ended, for spans that end after it
+        self._decided = OrderedDict()
+        self._lock = threading.Lock()
+        self.traces_kept = 0
+        self.traces_dropped = 0
+        self.spans_dropped = 0
+        self.bytes_saved = 0
+
+    def sampled(self, trace_id: int) -> bool:
+        return (trace_id & 0xFFFFFFFFFFFFFFFF) < self._bound
+
+    def on_start(self, span, parent_context=None):
+        self.processor.on_start(span, parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = span.context.trace_id
+        if self.sampled(trace_id):
+            self.processor.on_end(span)
+            return
+        errored = span.status.status_code == StatusCode.ERROR
+        is_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            decided = self._decided.get(trace_id)
+            if decided is None:
+                trace = self._pending.get(trace_id)
+                if trace is None:
+                    trace = self._pending[trace_id] = _PendingTrace()
+                trace.spans.append(span)
+                trace.errored = trace.errored or errored
+                if not is_root:
+                    if len(self._pending) <= self.max_pending_traces:
+                        return
+                    # Out of room: settle the oldest trace on what is known so far
+                    trace_id, trace = self._pending.popitem(last=False)
+                    keep = trace.errored
+                else:
+                    del self._pending[trace_id]
+                    slow = self.slow_ns is not None and span.end_time - span.start_time >= self.slow_ns
+                    keep = trace.errored or slow
+                self._decide(trace_id, keep)
+                spans = trace.spans
+            else:
+                keep, spans = decided, [span]
+                if errored and not keep:
+                    # An error after the root ended still counts, for the rest of the trace
+                    keep = self._decided[trace_id] = True
+            if not keep:
+                self._drop(spans)
+        if keep:
+            for kept in spans:
+                self.processor.on_end(kept)
+
+    def _decide(self, trace_id: int, keep: bool):
+        self._decided[trace_id] = keep
+        if len(self._decided) > self.max_pending_traces:
+            self._decided.popitem(last=False)
+        if keep:
+            self.traces_kept += 1
+        else:
+            self.traces_dropped += 1
+
+    def _drop(self, spans: list):
+        saved = sum(span_bytes(span) for span in spans)
+        self.spans_dropped += len(spans)
+        self.bytes_saved += saved
+        _record_saved("sampling", saved, len(spans))
+
+    def _settle_pending(self):
+        """Decide every pending trace on what is known so far."""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            kept = []
+            for trace_id, trace in pending.items():
+                self._decide(trace_id, trace.errored)
+                if trace.errored:
+                    kept.extend(trace.spans)
+                else:
+                    self._drop(trace.spans)
+        for span in kept:
+            self.processor.on_end(span)
+
+    def shutdown(self):
+        self._settle_pending()
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        # Pending traces stay pending: their roots haven't ended, so they can still be kept
+        return self.processor.force_flush(timeout_millis)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "traces_kept": self.traces_kept,
+                "traces_dropped": self.traces_dropped,
+                "spans_dropped": self.spans_dropped,
+                "bytes_saved": self.bytes_saved,
+                "pending_traces": len(self._pending),
+            }
+
+
+def wrap_export_processor(processor: SpanProcessor) -> SpanProcessor:
+    """Put the processors configured by TELEMETRY_* variables in front of the exporting processor.
+
+    Sampling runs first, so dropped traces are never truncated.
+    """
+    max_bytes = int(os.getenv("TELEMETRY_ATTRIBUTE_MAX_BYTES", "0"))
+    limits = parse_limits(os.getenv("TELEMETRY_ATTRIBUTE_LIMITS", ""))
+    if max_bytes or limits:
+        processor = AttributeLimitProcessor(processor, max_bytes, limits)
+    ratio = float(os.getenv("TELEMETRY_SAMPLE_RATIO", "1"))
+    if ratio < 1:
+        slow_ms = float(os.getenv("TELEMETRY_SLOW_TRACE_MS", "0")) or None
+        processor = SamplingProcessor(processor, ratio, slow_ms)
+    return processor
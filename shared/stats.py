@@ -0,0 +1,26 @@
+"""Latency statistics helpers."""
+
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def latency_summary(latencies_s) -> dict:
+    """Summarize latencies (seconds) as count, mean, percentiles and max in milliseconds."""
+    values = np.asarray(latencies_s, dtype=np.float64) * 1000
+    if not len(values):
+        return {"count": 0}
+    summary = {"count": len(values), "mean_ms": float(values.mean())}
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES), strict=True):
+        summary[f"p{q}_ms"] = float(value)
+    summary["max_ms"] = float(values.max())
+    return summary
+
+
+def format_latency_summary(summary: dict) -> str:
+    if not summary.get("count"):
+        return "no samples"
+    parts = [f"n={summary['count']}", f"mean={summary['mean_ms']:.1f}ms"]
+    parts += [f"p{q}={summary[f'p{q}_ms']:.1f}ms" for q in PERCENTILES]
+    parts.append(f"max={summary['max_ms']:.1f}ms")
+    return " ".join(parts)
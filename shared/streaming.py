@@ -0,0 +1,143 @@
+"""Stream LangGraph agent runs as a flat sequence of events.
+
+The graph is streamed with the ``messages`` mode (LLM tokens as they are generated) and
+the ``updates`` mode (completed node outputs, which carry tool calls and tool results).
+Both are translated into plain dicts:
+
+- ``{"type": "token", "text": ...}``
+- ``{"type": "tool_call", "name": ..., "args": ...}``
+- ``{"type": "tool_result", "name": ..., "content": ...}``
+- ``{"type": "final", "response": ..., "timings": ...}`` once the run is done
+
+Each run is recorded in an ``agent.stream`` span with time to first token, the gaps
+between tool calls and total latency as ``agent.stream.*`` attributes, so perceived
+latency can be tracked and not only end-to-end time.
+"""
+
+import itertools
+import json
+import sys
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+from opentelemetry import trace
+
+STREAM_MODES = ["messages", "updates"]
+# Characters of each tool result print_stream shows
+TOOL_RESULT_PREVIEW = 200
+
+_tracer = trace.get_tracer("galileo-agents.streaming")
+
+
+class StreamTimer:
+    """When the first token and each tool call of one streamed run arrived."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.end = None
+        self.first_token = None
+        self.tool_calls = []
+
+    def observe(self, event: dict):
+        now = time.perf_counter()
+        if event["type"] == "token" and self.first_token is None:
+            self.first_token = now
+        elif event["type"] == "tool_call":
+            self.tool_calls.append(now)
+
+    def finish(self) -> dict:
+        self.end = time.perf_counter()
+        return self.timings()
+
+    def timings(self) -> dict:
+        def ms(start, end):
+            return round((end - start) * 1000, 1)
+
+        timings = {"total_ms": ms(self.start, self.end or time.perf_counter()), "tool_calls": len(self.tool_calls)}
+        if self.first_token is not None:
+            timings["time_to_first_token_ms"] = ms(self.start, self.first_token)
+        if self.tool_calls:
+            timings["time_to_first_tool_call_ms"] = ms(self.start, self.tool_calls[0])
+        if len(self.tool_calls) > 1:
+            timings["tool_call_gaps_ms"] = [ms(a, b) for a, b in itertools.pairwise(self.tool_calls)]
+        return timings
+
+    def span_attributes(self) -> dict:
+        return {f"agent.stream.{key}": value for key, value in self.timings().items()}
+
+
+class _Translator:
+    """Turns (mode, chunk) pairs from the graph stream into events, keeping the final answer."""
+
+    def __init__(self):
+        self.response = ""
+
+    def events(self, mode: str, chunk):
+        if mode == "messages":
+            # Streaming models send AIMessageChunks; models that don't stream send one AIMessage
+            message, _ = chunk
+            if isinstance(message, AIMessage) and isinstance(message.content, str) and message.content:
+                yield {"type": "token", "text": message.content}
+            return
+        for node_output in chunk.values():
+            messages = node_output.get("messages", []) if isinstance(node_output, dict) else []
+            for message in messages:
+                if isinstance(message, ToolMessage):
+                    yield {"type": "tool_result", "name": message.name, "content": message.content}
+                elif isinstance(message, AIMessage) and message.tool_calls:
+                    for call in message.tool_calls:
+                        yield {"type": "tool_call", "name": call["name"], "args": call["args"]}
+                elif isinstance(message, AIMessage):
+                    self.response = message.content
+
+
+def stream_events(agent, query: str, config: dict | None = None):
+    """Run the query through a compiled LangGraph agent, yielding events as they happen."""
+    translator, timer = _Translator(), StreamTimer()
+    # The current span, so the agent's own spans nest under it
+    with _tracer.start_as_current_span("agent.stream", attributes={"agent.stream.query": query}) as span:
+        for mode, chunk in agent.stream({"messages": [("user", query)]}, config, stream_mode=STREAM_MODES):
+            for event in translator.events(mode, chunk):
+                timer.observe(event)
+                yield event
+        timings = timer.finish()
+        span.set_attributes(timer.span_attributes())
+    yield {"type": "final", "response": translator.response, "timings": timings}
+
+
+async def astream_events(agent, query: str, config: dict | None = None):
+    """Async stream_events, for servers."""
+    translator, timer = _Translator(), StreamTimer()
+    # Not made current: an async generator can be resumed or closed from another context,
+    # which breaks OpenTelemetry's context detach
+    span = _tracer.start_span("agent.stream", attributes={"agent.stream.query": query})
+    try:
+        async for mode, chunk in agent.astream({"messages": [("user", query)]}, config, stream_mode=STREAM_MODES):
+            for event in translator.events(mode, chunk):
+                timer.observe(event)
+                yield event
+        timings = timer.finish()
+        span.set_attributes(timer.span_attributes())
+    finally:
+        span.end()
+    yield {"type": "final", "response": translator.response, "timings": timings}
+
+
+def print_stream(agent, query: str, out=None, config: dict | None = None) -> tuple[str, dict]:
+    """Print tokens and tool events as they arrive; return the final response and its timings."""
+    out = out or sys.stdout
+    response, timings = "", {}
+    for event in stream_events(agent, query, config):
+        if event["type"] == "token":
+            out.write(event["text"])
+        elif event["type"] == "tool_call":
+            out.write(f"\n[tool call] {event['name']}({json.dumps(event['args'], default=str)})\n")
+        elif event["type"] == "tool_result":
+            content = str(event["content"])
+            preview = content if len(content) <= TOOL_RESULT_PREVIEW else content[:TOOL_RESULT_PREVIEW] + "..."
+            out.write(f"[tool result] {event['name']}: {preview}\n")
+        else:
+            response, timings = event["response"], event["timings"]
+            out.write("\n")
+        out.flush()
+    return response, timings
@@ -0,0 +1,128 @@
+"""Shared Traceloop/OpenTelemetry bootstrap for all agents.
+
+Spans are exported by a bounded-queue background BatchSpanProcessor, so the agent's
+request thread only enqueues finished spans and never waits on the exporter's network
+round trip. Modes (TELEMETRY_MODE, or the mode argument):
+
+- ``batch`` (default): OpenTelemetry batch defaults, tunable through the standard
+  OTEL_BSP_MAX_QUEUE_SIZE, OTEL_BSP_MAX_EXPORT_BATCH_SIZE, OTEL_BSP_SCHEDULE_DELAY and
+  OTEL_BSP_EXPORT_TIMEOUT variables or keyword arguments.
+- ``low_latency``: still asynchronous, but flushes every 100 ms in small batches so spans
+  show up in the UI almost immediately.
+- ``sync``: debug mode that exports every span synchronously on the thread that ends it
+  (the old ``disable_batch=True`` behavior). Adds an export round trip per span.
+
+Queued spans are flushed when the process exits.
+
+Only the instrumentations these agents need are loaded (TELEMETRY_INSTRUMENTS, default
+``openai,langchain,crewai``; ``all`` restores Traceloop's default of every installed
+one). Instrumenting every installed library costs seconds of startup.
+
+Attribute truncation and trace sampling (shared.span_processors) sit in front of the
+exporting processor when configured. Metrics (shared.metrics) are initialized alongside
+the traces.
+"""
+
+import atexit
+import os
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor, SpanExporter
+from opentelemetry.util.re import parse_env_headers
+
+from shared.capture import enable_capture
+from shared.metrics import init_metrics
+from shared.span_processors import wrap_export_processor
+
+MODES = {
+    "batch": {},
+    "low_latency": {"schedule_delay_millis": 100, "max_export_batch_size": 64},
+    "sync": None,
+}
+
+DEFAULT_INSTRUMENTS = "openai,langchain,crewai"
+
+PROJECT_NAME = "galileo-agents"
+FLUSH_TIMEOUT_MILLIS = 10000
+
+_initialized = False
+
+
+def create_span_processor(exporter: SpanExporter, mode: str = "batch", **batch_options) -> SpanProcessor:
+    """Wrap an exporter in the span processor for the given mode.
+
+    batch_options (max_queue_size, max_export_batch_size, schedule_delay_millis,
+    export_timeout_millis) override the mode's presets; anything left unset falls back to
+    the OTEL_BSP_* environment variables.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown telemetry mode: {mode} (expected one of {', '.join(MODES)})")
+    if MODES[mode] is None:
+        return SimpleSpanProcessor(exporter)
+    return BatchSpanProcessor(exporter, **{**MODES[mode], **batch_options})
+
+
+def create_otlp_exporter() -> SpanExporter:
+    """Create the OTLP exporter Traceloop would build from TRACELOOP_BASE_URL / TRACELOOP_HEADERS."""
+    from traceloop.sdk.tracing.tracing import init_spans_exporter
+
+    api_endpoint = os.getenv("TRACELOOP_BASE_URL") or "https://api.traceloop.com"
+    headers = parse_env_headers(os.getenv("TRACELOOP_HEADERS", ""))
+    api_key = os.getenv("TRACELOOP_API_KEY")
+    if api_key and not headers:
+        headers = {"Authorization": f"Bearer {api_key}"}
+    return init_spans_exporter(api_endpoint, headers)
+
+
+def selected_instruments(names: str | None = None) -> set | None:
+    """Traceloop instruments for a comma-separated list of names; None (all) for ``all``."""
+    from traceloop.sdk.instruments import Instruments
+
+    names = (names or os.getenv("TELEMETRY_INSTRUMENTS") or DEFAULT_INSTRUMENTS).strip().lower()
+    if names == "all":
+        return None
+    return {Instruments[name.strip().upper()] for name in names.split(",") if name.strip()}
+
+
+def init_telemetry(app_name: str, mode: str | None = None, exporter: SpanExporter | None = None, **batch_options):
+    """Initialize Traceloop once per process with the shared exporter pipeline.
+
+    Also adds the console exporter when TRACELOOP_CONSOLE_EXPORTER_ENABLED=true and local
+    file capture when OTLP_CAPTURE_DIR is set, and initializes the shared metrics. Later
+    calls are no-ops, so several agents can share one process.
+    """
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+
+    from traceloop.sdk import Traceloop
+
+    mode = mode or os.getenv("TELEMETRY_MODE", "batch").lower()
+    processor = wrap_export_processor(create_span_processor(exporter or create_otlp_exporter(), mode, **batch_options))
+    Traceloop.init(
+        app_name=app_name,
+        resource_attributes={
+            "galileo.project.name": PROJECT_NAME,
+            "galileo.logstream.name": app_name,
+        },
+        processor=processor,
+        instruments=selected_instruments(),
+    )
+
+    tracer_provider = trace.get_tracer_provider()
+
+    # Add console exporter for debugging if enabled
+    console = os.getenv("TRACELOOP_CONSOLE_EXPORTER_ENABLED", "false").lower() == "true"
+    if console and hasattr(tracer_provider, "add_span_processor"):
+        tracer_provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+
+    # Capture spans to local OTLP segment files if enabled
+    if os.getenv("OTLP_CAPTURE_DIR"):
+        enable_capture(os.getenv("OTLP_CAPTURE_DIR"), max_segments=int(os.getenv("OTLP_CAPTURE_MAX_SEGMENTS", "0")))
+
+    if hasattr(tracer_provider, "force_flush"):
+        atexit.register(tracer_provider.force_flush, FLUSH_TIMEOUT_MILLIS)
+
+    init_metrics(app_name)
@@ -0,0 +1,69 @@
+"""Concurrency cap for the tool calls of the LangGraph agents.
+
+When the model asks for several tools in one turn, create_agent sends each call to the
+tool node as its own task, and LangGraph runs those tasks side by side. Sync tools run on
+its thread pool under ``invoke``. Async tools run as tasks on the caller's event loop
+under ``ainvoke``/``astream``, so a turn takes about as long as its slowest call instead
+of the sum of all of them. Tool spans still nest under the agent's spans, because both
+paths carry the caller's context.
+
+Nothing bounds that fan-out by default. A turn asking for fifty cities would open fifty
+backend requests at once, and with the server every concurrent request adds its own.
+ToolConcurrencyMiddleware caps the tool calls one agent runs at once across all its runs
+(TOOL_MAX_CONCURRENCY, default 8, 0 = no cap). The calls over the cap wait for a free
+slot, and the wait is recorded on the tool node's span as ``agent.tools.queue_ms``.
+benchmarks/tool_fan_out.py measures the latency a multi-call turn saves.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+from langchain.agents.middleware import AgentMiddleware
+from opentelemetry import trace
+
+
+def default_tool_concurrency() -> int:
+    return int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+
+
+class ToolConcurrencyMiddleware(AgentMiddleware):
+    """Runs at most max_concurrency of an agent's tool calls at once (0 = no cap)."""
+
+    def __init__(self, max_concurrency: int | None = None):
+        super().__init__()
+        self.max_concurrency = default_tool_concurrency() if max_concurrency is None else max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max(self.max_concurrency, 1))
+        # asyncio semaphores belong to one event loop, so async runs get one per loop
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    @staticmethod
+    def _record_wait(start: float):
+        trace.get_current_span().set_attribute("agent.tools.queue_ms", round((time.perf_counter() - start) * 1000, 3))
+
+    def wrap_tool_call(self, request, handler):
+        if self.max_concurrency <= 0:
+            return handler(request)
+        start = time.perf_counter()
+        with self._semaphore:
+            self._record_wait(start)
+            return handler(request)
+
+    async def awrap_tool_call(self, request, handler):
+        if self.max_concurrency <= 0:
+            return await handler(request)
+        start = time.perf_counter()
+        async with self._async_semaphore():
+            self._record_wait(start)
+            return await handler(request)
@@ -0,0 +1,247 @@
+"""Persistent FAISS knowledge-base indexes keyed by document content and embedding model.
+
+A built index is saved under CACHE_DIR/faiss/<name> together with a manifest of the
+documents it holds. On the next start the index is loaded from disk when the cache key
+(embedding model + document hashes) matches. When only some documents changed, the old
+index is loaded and only the added or changed documents are embedded.
+
+The index is exact (flat, brute force) by default. Large corpora can use an approximate
+index instead, chosen by an IndexSpec or the VECTOR_INDEX* variables:
+
+- ``ivf``: vectors are bucketed into ``nlist`` k-means lists and a query scans the
+  ``nprobe`` nearest lists
+- ``hnsw``: a navigable small-world graph of degree ``hnsw_m``, searched with a candidate
+  list of ``ef_search``
+- ``ivfpq``: IVF with vectors product-quantized to ``pq_m`` codes of ``pq_bits`` bits, for
+  corpora that don't fit in memory as float32
+
+IVF indexes are trained on the corpus when built and rebuilt once it has doubled since.
+Corpora too small to train on fall back to a flat index (and ``ivfpq`` to
+``ivf`` when there are too few vectors for its codebooks). benchmarks/ann_recall.py
+measures recall and latency of each setting against the flat index.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from shared import logger
+from shared.paths import CACHE_DIR
+
+MANIFEST_FILE = "manifest.json"
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+# FAISS warns below 39 training points per k-means centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+class IndexSpec:
+    """Which FAISS index to build, and the search settings to apply to it.
+
+    ``nlist`` (0 picks about 4 * sqrt(n)), ``hnsw_m``, ``pq_m`` and ``pq_bits`` shape the
+    built index and are part of its cache key. ``nprobe`` and ``ef_search`` trade recall
+    for latency at search time and are applied on every load.
+    """
+
+    def __init__(
+        self,
+        index_type: str = "flat",
+        nlist: int = 0,
+        nprobe: int = 8,
+        hnsw_m: int = 32,
+        ef_search: int = 64,
+        pq_m: int = 16,
+        pq_bits: int = 8,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}, expected one of {', '.join(INDEX_TYPES)}")
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.pq_bits = pq_bits
+
+    @classmethod
+    def from_env(cls) -> "IndexSpec":
+        return cls(
+            os.getenv("VECTOR_INDEX", "flat").lower(),
+            nlist=int(os.getenv("VECTOR_INDEX_NLIST", "0")),
+            nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+            hnsw_m=int(os.getenv("VECTOR_INDEX_HNSW_M", "32")),
+            ef_search=int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64")),
+            pq_m=int(os.getenv("VECTOR_INDEX_PQ_M", "16")),
+            pq_bits=int(os.getenv("VECTOR_INDEX_PQ_BITS", "8")),
+        )
+
+    @property
+    def key(self) -> str:
+        """The build settings, for cache keys."""
+        if self.index_type == "ivf":
+            return f"ivf:nlist={self.nlist}"
+        if self.index_type == "hnsw":
+            return f"hnsw:m={self.hnsw_m}"
+        if self.index_type == "ivfpq":
+            return f"ivfpq:nlist={self.nlist},m={self.pq_m},bits={self.pq_bits}"
+        return "flat"
+
+    def __repr__(self) -> str:
+        return f"IndexSpec({self.key}, nprobe={self.nprobe}, ef_search={self.ef_search})"
+
+    def factory_string(self, n: int, dim: int) -> str:
+        """faiss.index_factory description for n vectors of dim, ``Flat`` when n is too few to train on."""
+        if self.index_type == "hnsw":
+            return f"HNSW{self.hnsw_m}"
+        if self.index_type == "flat":
+            return "Flat"
+        nlist = min(self.nlist or round(4 * math.sqrt(n)), n // MIN_POINTS_PER_CENTROID)
+        if nlist < 1:
+            return "Flat"
+        if self.index_type == "ivf":
+            return f"IVF{nlist},Flat"
+        if n < (1 << self.pq_bits) * MIN_POINTS_PER_CENTROID:
+            return f"IVF{nlist},Flat"
+        # Sub-quantizers must split the dimensions evenly
+        pq_m = max(m for m in range(1, min(self.pq_m, dim) + 1) if dim % m == 0)
+        return f"IVF{nlist},PQ{pq_m}x{self.pq_bits}"
+
+    def build(self, vectors: np.ndarray):
+        """An empty index trained on vectors, with the search settings applied."""
+        import faiss
+
+        n, dim = vectors.shape
+        index = faiss.index_factory(dim, self.factory_string(n, dim), faiss.METRIC_L2)
+        if not index.is_trained:
+            index.train(vectors)
+        self.tune(index)
+        return index
+
+    def tune(self, index):
+        """Apply nprobe / ef_search to a built or loaded index."""
+        import faiss
+
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = min(self.nprobe, ivf.nlist)
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = self.ef_search
+
+
+def embedding_model_name(embeddings) -> str:
+    """Best-effort identifier of the model behind an embeddings object."""
+    return getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None) or type(embeddings).__name__
+
+
+def document_hash(doc: Document) -> str:
+    payload = json.dumps({"content": doc.page_content, "metadata": doc.metadata}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def index_key(doc_ids: list[str], model: str, index: str = "flat") -> str:
+    digest = hashlib.sha256(model.encode("utf-8"))
+    if index != "flat":
+        digest.update(index.encode("utf-8"))
+    for doc_id in sorted(doc_ids):
+        digest.update(doc_id.encode("ascii"))
+    return digest.hexdigest()
+
+
+def _read_manifest(directory: Path) -> dict | None:
+    try:
+        with open(directory / MANIFEST_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_faiss(vector_store, directory: Path, manifest: dict):
+    """Save index and manifest to a temp directory, then swap it in."""
+    tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    vector_store.save_local(str(tmp))
+    with open(tmp / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    old = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    if directory.exists():
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _build(docs: list[Document], ids: list[str], embeddings, spec: IndexSpec):
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    if spec.index_type == "flat":
+        return FAISS.from_documents(docs, embeddings, ids=ids)
+    texts = [doc.page_content for doc in docs]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    vector_store = FAISS(embeddings, spec.build(vectors), InMemoryDocstore(), {})
+    vector_store.add_embeddings(zip(texts, vectors, strict=True), metadatas=[doc.metadata for doc in docs], ids=ids)
+    return vector_store
+
+
+def load_or_build_faiss(
+    docs: list[Document], embeddings, name: str, cache_dir: Path | None = None, index: IndexSpec | None = None
+) -> tuple:
+    """Return (vector_store, index_key) for docs, reusing the on-disk index when possible.
+
+    ``index`` defaults to IndexSpec.from_env(). With VECTOR_STORE=mmap the store is a
+    shared.mmap_store MmapVectorStore instead, which worker processes share.
+    """
+    if os.getenv("VECTOR_STORE", "faiss").lower() == "mmap":
+        from shared.mmap_store import load_or_build_mmap
+
+        return load_or_build_mmap(docs, embeddings, name, cache_dir)
+
+    from langchain_community.vectorstores import FAISS
+
+    spec = index or IndexSpec.from_env()
+    directory = Path(cache_dir or CACHE_DIR / "faiss") / name
+    model = embedding_model_name(embeddings)
+    docs_by_id = {document_hash(doc): doc for doc in docs}
+    key = index_key(list(docs_by_id), model, spec.key)
+    manifest = _read_manifest(directory)
+
+    if manifest and manifest["key"] == key:
+        vector_store = FAISS.load_local(str(directory), embeddings, allow_dangerous_deserialization=True)
+        spec.tune(vector_store.index)
+        logger.info(f"Loaded cached index '{name}' ({len(docs_by_id)} documents)")
+        return vector_store, key
+
+    reusable = manifest and manifest["model"] == model and manifest.get("index", "flat") == spec.key
+    cached_ids = set(manifest["ids"]) if reusable else set()
+    kept_ids = cached_ids & docs_by_id.keys()
+    trained = manifest.get("trained", len(cached_ids)) if reusable else 0
+    if spec.index_type in ("ivf", "ivfpq") and len(docs_by_id) > 2 * trained:
+        kept_ids = set()  # lists trained on a much smaller corpus end up unbalanced
+    if spec.index_type == "hnsw" and kept_ids != cached_ids:
+        kept_ids = set()  # HNSW graphs can't remove vectors
+    if kept_ids:
+        vector_store = FAISS.load_local(str(directory), embeddings, allow_dangerous_deserialization=True)
+        spec.tune(vector_store.index)
+        removed_ids = sorted(cached_ids - kept_ids)
+        added_ids = [doc_id for doc_id in docs_by_id if doc_id not in kept_ids]
+        if removed_ids:
+            vector_store.delete(removed_ids)
+        if added_ids:
+            vector_store.add_documents([docs_by_id[doc_id] for doc_id in added_ids], ids=added_ids)
+        logger.info(f"Updated cached index '{name}': {len(added_ids)} embedded, {len(removed_ids)} removed")
+    else:
+        ids = list(docs_by_id)
+        vector_store = _build([docs_by_id[doc_id] for doc_id in ids], ids, embeddings, spec)
+        trained = len(ids)
+        logger.info(f"Built {spec.index_type} index '{name}' ({len(ids)} documents)")
+
+    manifest = {"key": key, "model": model, "index": spec.key, "trained": trained, "ids": sorted(docs_by_id)}
+    try:
+        save_faiss(vector_store, directory, manifest)
+    except OSError as e:
+        logger.warning(f"Could not cache index '{name}': {e}")
+    return vector_store, key